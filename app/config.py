@@ -5,21 +5,109 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BASE_DIR = "/home/user/app"
-DATA_DIR = os.path.join(BASE_DIR, "data")
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
 os.makedirs(DATA_DIR, exist_ok=True)
 
 class Settings:
     """Application settings loaded from environment variables"""
     
+    DATA_DIR: str = DATA_DIR
+
     # Faiss (local) configuration
     FAISS_INDEX_PATH: str = os.path.join(DATA_DIR, "faiss.index")
     FAISS_PAYLOADS_PATH: str = os.path.join(DATA_DIR, "faiss_payloads.json")
 
+    # Vector storage: float32 (exact), float16, int8 or pca; compact modes rescore
+    # the top RESCORE_FACTOR x limit candidates against on-disk float32 vectors
+    VECTOR_STORAGE: str = os.getenv("VECTOR_STORAGE", "float32").lower()
+    PCA_DIM: int = int(os.getenv("PCA_DIM", 256))
+    RESCORE_FACTOR: int = int(os.getenv("RESCORE_FACTOR", 4))
+    QUANTIZER_TRAIN_SIZE: int = int(os.getenv("QUANTIZER_TRAIN_SIZE", 20000))
+    COMPACT_PAYLOADS: bool = os.getenv("COMPACT_PAYLOADS", "true").lower() == "true"  # column-encoded payloads in memory
+    # Rows appended or removed since the last full save before a collection is compacted;
+    # until then writes only touch a small delta and its write-ahead log
+    DELTA_MAX_ROWS: int = int(os.getenv("DELTA_MAX_ROWS", 2000))
+
+    # Named collections (the default collection keeps the paths above)
+    DEFAULT_COLLECTION: str = os.getenv("DEFAULT_COLLECTION", "default")
+    COLLECTIONS_DIR: str = os.path.join(DATA_DIR, "collections")
+    COLLECTION_MEMORY_BUDGET_MB: int = int(os.getenv("COLLECTION_MEMORY_BUDGET_MB", 4096))
+
+    # Vector store mode: "single" (in-process index) or "sharded" (scatter-gather over shard processes)
+    VECTOR_STORE_MODE: str = os.getenv("VECTOR_STORE_MODE", "single").lower()
+    SHARD_COUNT: int = int(os.getenv("SHARD_COUNT", 4))
+    SHARD_ADDRESSES: str = os.getenv("SHARD_ADDRESSES", "")  # host:port,host:port for remote shards
+    SHARD_AUTHKEY: str = os.getenv("SHARD_AUTHKEY", "")
+    SHARD_CONNECTIONS: int = int(os.getenv("SHARD_CONNECTIONS", 8))  # per shard
+
     # Qdrant Configuration
     QDRANT_URL: str = os.getenv("QDRANT_URL", "http://localhost:6333")
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
     QDRANT_COLLECTION_NAME: str = os.getenv("QDRANT_COLLECTION_NAME", "jira_tickets")
     
+    # Background ingest jobs
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", 1))
+    INGEST_MAX_QUEUED: int = int(os.getenv("INGEST_MAX_QUEUED", 8))
+    INGEST_CHUNK_SIZE: int = int(os.getenv("INGEST_CHUNK_SIZE", 512))  # records embedded per progress step
+    INGEST_ARROW_BATCH_ROWS: int = int(os.getenv("INGEST_ARROW_BATCH_ROWS", 16384))  # Parquet/Arrow rows read per batch
+    INGEST_JOB_HISTORY: int = int(os.getenv("INGEST_JOB_HISTORY", 100))
+
+    # Incremental Jira sync (Jira-compatible REST API)
+    JIRA_BASE_URL: str = os.getenv("JIRA_BASE_URL", "")
+    JIRA_EMAIL: str = os.getenv("JIRA_EMAIL", "")
+    JIRA_API_TOKEN: str = os.getenv("JIRA_API_TOKEN", "")
+    JIRA_SYNC_JQL: str = os.getenv("JIRA_SYNC_JQL", "")  # extra filter, e.g. project = CORE
+    JIRA_SYNC_PAGE_SIZE: int = int(os.getenv("JIRA_SYNC_PAGE_SIZE", 100))
+    JIRA_SYNC_MAX_RETRIES: int = int(os.getenv("JIRA_SYNC_MAX_RETRIES", 5))
+    JIRA_SYNC_OVERLAP_MINUTES: int = int(os.getenv("JIRA_SYNC_OVERLAP_MINUTES", 1))  # re-fetch window; also absorbs clock skew
+
+    # Near-duplicate detection (self-similarity join over a collection)
+    DUPLICATE_THRESHOLD: float = float(os.getenv("DUPLICATE_THRESHOLD", 0.95))  # cosine
+    DUPLICATES_BLOCK_SIZE: int = int(os.getenv("DUPLICATES_BLOCK_SIZE", 1024))  # query rows per range_search
+    DUPLICATES_ANN_MIN: int = int(os.getenv("DUPLICATES_ANN_MIN", 50000))  # below this, exact search
+    DUPLICATES_IVF_LIST_SIZE: int = int(os.getenv("DUPLICATES_IVF_LIST_SIZE", 256))
+    DUPLICATES_NPROBE: int = int(os.getenv("DUPLICATES_NPROBE", 16))
+    DUPLICATES_AUTO_REFRESH: bool = os.getenv("DUPLICATES_AUTO_REFRESH", "true").lower() == "true"
+
+    # Topic clustering (spherical k-means over a collection, used for broad questions)
+    TOPIC_CLUSTERS: int = int(os.getenv("TOPIC_CLUSTERS", 20))
+    TOPIC_KMEANS_ITERATIONS: int = int(os.getenv("TOPIC_KMEANS_ITERATIONS", 20))
+    TOPIC_REPRESENTATIVES: int = int(os.getenv("TOPIC_REPRESENTATIVES", 3))  # tickets closest to each centroid
+    TOPIC_RECENT_DAYS: int = int(os.getenv("TOPIC_RECENT_DAYS", 90))
+    TOPIC_CONTEXT_LIMIT: int = int(os.getenv("TOPIC_CONTEXT_LIMIT", 10))  # topics rendered into generator context
+    TOPICS_AUTO_REFRESH: bool = os.getenv("TOPICS_AUTO_REFRESH", "true").lower() == "true"
+
+    # Structured-query fast path (count/distribution/trend questions answered from a field index, no LLM)
+    STRUCTURED_QUERIES_ENABLED: bool = os.getenv("STRUCTURED_QUERIES_ENABLED", "true").lower() == "true"
+
+    # Snapshot bundles (export/import; a replica can boot from SNAPSHOT_BOOT_PATH)
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshots"))
+    SNAPSHOT_BOOT_PATH: str = os.getenv("SNAPSHOT_BOOT_PATH", "")  # bundle file or unpacked directory
+    SNAPSHOT_BOOT_COLLECTION: str = os.getenv("SNAPSHOT_BOOT_COLLECTION", "")  # defaults to the manifest's
+
+    # Embedding model migration (re-embed a collection into a shadow index, then cut over)
+    MIGRATION_BATCH_SIZE: int = int(os.getenv("MIGRATION_BATCH_SIZE", 64))
+    MIGRATION_MAX_RATE: float = float(os.getenv("MIGRATION_MAX_RATE", 50))  # records/s, 0 = unthrottled
+    MIGRATION_DUAL_SERVE_SECONDS: int = int(os.getenv("MIGRATION_DUAL_SERVE_SECONDS", 600))  # before auto cutover
+    MIGRATION_CATCHUP_INTERVAL: float = float(os.getenv("MIGRATION_CATCHUP_INTERVAL", 5))  # seconds
+
+    # Admission control (/ask is served ahead of /metrics and /ingest; excess load gets 429/503)
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_CONCURRENCY: int = int(os.getenv("ADMISSION_CONCURRENCY", 4))  # shared slots across routes
+    ADMISSION_QUERY_LIMIT: int = int(os.getenv("ADMISSION_QUERY_LIMIT", 4))
+    ADMISSION_QUERY_QUEUE: int = int(os.getenv("ADMISSION_QUERY_QUEUE", 32))
+    ADMISSION_METRICS_LIMIT: int = int(os.getenv("ADMISSION_METRICS_LIMIT", 2))
+    ADMISSION_METRICS_QUEUE: int = int(os.getenv("ADMISSION_METRICS_QUEUE", 8))
+    ADMISSION_INGEST_LIMIT: int = int(os.getenv("ADMISSION_INGEST_LIMIT", 1))
+    ADMISSION_INGEST_QUEUE: int = int(os.getenv("ADMISSION_INGEST_QUEUE", 4))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 10))  # seconds before 503
+    MODEL_CONCURRENCY: int = int(os.getenv("MODEL_CONCURRENCY", 1))  # concurrent forward passes on the shared model
+
+    # Request profiling (X-Profile: <PROFILE_TOKEN> header, or a sampled fraction of /ask and /ingest)
+    PROFILE_TOKEN: str = os.getenv("PROFILE_TOKEN", "")  # also required to read profiles; empty = profile routes disabled
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
+    PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", 20))  # profiles kept in memory
+
     # Hugging Face Configuration
     HF_API_URL: str = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.1")
     HF_TOKEN: str = os.getenv("HF_TOKEN", "")
@@ -30,10 +118,33 @@ class Settings:
     #EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "intfloat/e5-large-v2")
     
+    # Parallel ingest embedding (EMBED_WORKERS > 1 spreads batches over that many worker
+    # processes, each with its own model copy; MODEL_CONCURRENCY only bounds the in-process model)
+    EMBED_WORKERS: int = int(os.getenv("EMBED_WORKERS", 0))
+    EMBED_TOKEN_BUDGET: int = int(os.getenv("EMBED_TOKEN_BUDGET", 16384))  # padded tokens per batch
+    EMBED_MAX_BATCH: int = int(os.getenv("EMBED_MAX_BATCH", 256))
+
+    # Shared embedding server (EMBEDDING_MODE=remote: API workers send embed calls to one
+    # process that owns the model, over a Unix socket; small calls are batched across workers)
+    EMBEDDING_MODE: str = os.getenv("EMBEDDING_MODE", "local").lower()  # local or remote
+    EMBEDDING_SOCKET: str = os.getenv("EMBEDDING_SOCKET", os.path.join(DATA_DIR, "embedding.sock"))
+    EMBEDDING_AUTHKEY: str = os.getenv("EMBEDDING_AUTHKEY", "")  # optional; the socket is owner-only
+    EMBEDDING_SERVER_AUTOSTART: bool = os.getenv("EMBEDDING_SERVER_AUTOSTART", "true").lower() == "true"
+    EMBEDDING_SERVER_START_TIMEOUT: float = float(os.getenv("EMBEDDING_SERVER_START_TIMEOUT", 300))  # seconds
+    EMBEDDING_SERVER_MAX_BATCH: int = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", 64))  # texts per coalesced batch
+    EMBEDDING_BATCH_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 2))  # window to coalesce calls
+    EMBEDDING_CONNECTIONS: int = int(os.getenv("EMBEDDING_CONNECTIONS", 8))  # per API worker
+    
     # Server Configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", 7860))
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "debug")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
+
+    # Logging (records go through a queue to one writer thread; see app/utils/logger.py)
+    LOG_LEVELS: str = os.getenv("LOG_LEVELS", "")  # per-module overrides, e.g. app.services.retriever=debug
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json").lower()  # json or text
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 1.0))  # fraction of DEBUG records kept
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", 10000))  # records dropped (not blocked) beyond this
     
     # CORS
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
@@ -1,9 +1,13 @@
 """Main FastAPI application entry point"""
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.config import settings
-from app.routes import ingest_routes, ask_routes, metrics_routes
-from app.services.vector_store import vector_store
+from app.routes import ingest_routes, ask_routes, metrics_routes, collection_routes, sync_routes, duplicate_routes, topic_routes, snapshot_routes, admission_routes, ticket_routes, migration_routes, profile_routes
+from app.services.admission import AdmissionRejected, admission, route_class_for
+from app.services.collection_manager import collection_manager
+from app.services.profiler import PROFILE_HEADER, request_profiler
+from app.services.snapshots import snapshot_service
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -23,16 +27,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Admit /ask, /metrics and /ingest through per-route limits; shed excess load with 429/503"""
+    route_class = route_class_for(request.method, request.url.path) if settings.ADMISSION_ENABLED else None
+    if route_class is None:
+        return await call_next(request)
+    try:
+        async with admission.admit(route_class):
+            return await call_next(request)
+    except AdmissionRejected as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"detail": e.reason, "route_class": e.route_class, "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Profile /ask and /ingest when asked to (X-Profile header) or sampled"""
+    path = request.url.path
+    trigger = None
+    if request.method == "POST" and path in ("/api/ask", "/api/ingest"):
+        trigger = request_profiler.trigger_for(request.headers.get(PROFILE_HEADER))
+    if trigger is None:
+        return await call_next(request)
+    with request_profiler.session(f"{request.method} {path}", trigger) as session:
+        response = await call_next(request)
+        session.status_code = response.status_code
+    response.headers["X-Profile-Id"] = session.profile_id
+    return response
+
 # Include routers
 app.include_router(ingest_routes.router, prefix="/api", tags=["Ingestion"])
 app.include_router(ask_routes.router, prefix="/api", tags=["Query"])
 app.include_router(metrics_routes.router, prefix="/api", tags=["Metrics"])
+app.include_router(collection_routes.router, prefix="/api", tags=["Collections"])
+app.include_router(sync_routes.router, prefix="/api", tags=["Sync"])
+app.include_router(duplicate_routes.router, prefix="/api", tags=["Duplicates"])
+app.include_router(topic_routes.router, prefix="/api", tags=["Topics"])
+app.include_router(snapshot_routes.router, prefix="/api", tags=["Snapshots"])
+app.include_router(ticket_routes.router, prefix="/api", tags=["Tickets"])
+app.include_router(migration_routes.router, prefix="/api", tags=["Migration"])
+app.include_router(admission_routes.router, prefix="/api", tags=["Admission"])
+app.include_router(profile_routes.router, prefix="/api", tags=["Profiling"])
 #app.include_router(debug_routes.router, prefix="/api", tags=["Debug"])
 
 logger.info("✅ Routers initialized ::")
 for route in app.routes:
     logger.info(f" - {route.path}")
 
+@app.on_event("startup")
+async def restore_snapshot():
+    """Boot from SNAPSHOT_BOOT_PATH if set; an incompatible snapshot fails startup"""
+    restored = snapshot_service.restore_on_boot()
+    if restored:
+        logger.info(f"Booted '{restored['collection']}' from snapshot {restored['snapshot_id']}")
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -46,12 +97,14 @@ async def root():
 async def health_check():
     """Detailed health check"""
     try:
-        info = vector_store.get_collection_info()
+        default = collection_manager.default_name
+        info = collection_manager.get(default).get_collection_info() if collection_manager.exists(default) else {}
         return {
             "status": "healthy",
             "index_path": settings.FAISS_INDEX_PATH,
             "payloads_path": settings.FAISS_PAYLOADS_PATH,
-            "vectors_count": info.get("vectors_count", 0)
+            "vectors_count": info.get("vectors_count", 0),
+            "resident_collections": collection_manager.get_stats()["resident_collections"]
 
             #"qdrant_url": settings.QDRANT_URL,
             #"collection": settings.QDRANT_COLLECTION_NAME
@@ -1,6 +1,6 @@
 """Pydantic models for Jira ticket data"""
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 class JiraTicket(BaseModel):
@@ -35,9 +35,145 @@ class IngestResponse(BaseModel):
     records_indexed: int
     message: Optional[str] = None
 
+class IngestJobStatus(BaseModel):
+    """Progress of a background ingest job"""
+    job_id: str
+    collection: str
+    filename: str
+    status: str = Field(..., description="queued, running, completed, failed or cancelled")
+    stage: Optional[str] = Field(None, description="parsing, embedding or committing")
+    records_total: int = 0
+    records_parsed: int = 0
+    records_embedded: int = 0
+    records_indexed: int = 0
+    throughput_records_per_sec: float = 0.0
+    eta_seconds: Optional[float] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
+class IngestJobList(BaseModel):
+    """Response model for ingest job listing"""
+    jobs: List[IngestJobStatus]
+
+class JiraSyncStatus(BaseModel):
+    """State of the incremental Jira sync for a collection"""
+    collection: str
+    running: bool = False
+    started: Optional[bool] = None
+    watermark: Optional[str] = Field(None, description="Newest `updated` timestamp synced")
+    last_run_at: Optional[str] = None
+    last_fetched: Optional[int] = None
+    last_upserted: Optional[int] = None
+    last_duration_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+
+class DuplicateCluster(BaseModel):
+    """Tickets connected by near-duplicate pairs"""
+    cluster_id: int
+    size: int
+    max_score: float = Field(..., description="Highest cosine similarity within the cluster")
+    ticket_ids: List[str]
+
+class DuplicatesResponse(BaseModel):
+    """Persisted near-duplicate clusters for a collection"""
+    collection: str
+    running: bool = False
+    started: Optional[bool] = None
+    threshold: Optional[float] = None
+    updated_at: Optional[str] = None
+    mode: Optional[str] = Field(None, description="full or incremental")
+    tickets_total: int = 0
+    tickets_queried: int = 0
+    duration_seconds: Optional[float] = None
+    total_clusters: int = 0
+    clusters: List[DuplicateCluster] = []
+
+class TopicRepresentative(BaseModel):
+    """Ticket close to a topic's centroid"""
+    ticket_id: Optional[str] = None
+    summary: Optional[str] = None
+    similarity: float
+
+class Topic(BaseModel):
+    """A cluster of semantically similar tickets"""
+    topic_id: int
+    size: int
+    recent_count: int = Field(0, description="Tickets created in the last TOPIC_RECENT_DAYS days")
+    keywords: List[str] = []
+    breakdown: Dict[str, Dict[str, int]] = Field({}, description="Top values per field (project, priority, ...)")
+    representatives: List[TopicRepresentative] = []
+
+class TopicsResponse(BaseModel):
+    """Persisted topic clustering for a collection"""
+    collection: str
+    running: bool = False
+    started: Optional[bool] = None
+    updated_at: Optional[str] = None
+    tickets_total: int = 0
+    num_topics: int = 0
+    duration_seconds: Optional[float] = None
+    topics: List[Topic] = []
+
+class SnapshotInfo(BaseModel):
+    """Manifest summary of a snapshot bundle"""
+    snapshot_id: str
+    collection: str
+    created_at: str
+    embedding_model: str
+    dimension: Optional[int] = None
+    storage: Optional[str] = None
+    record_count: int
+    format_version: int
+    name: Optional[str] = Field(None, description="Bundle file name in SNAPSHOT_DIR")
+    bytes: Optional[int] = None
+    loaded_records: Optional[int] = Field(None, description="Records loaded by an import")
+
+class SnapshotList(BaseModel):
+    """Snapshot bundles available in SNAPSHOT_DIR"""
+    snapshots: List[SnapshotInfo]
+
+class TicketRecord(BaseModel):
+    """A stored ticket looked up by primary key"""
+    collection: str
+    ticket_id: str
+    vector_id: int
+    payload: Dict
+
+class SimilarTicket(BaseModel):
+    """Ticket close to a reference ticket's stored vector"""
+    ticket_id: Optional[str] = None
+    score: float
+    payload: Dict
+
+class SimilarTicketsResponse(BaseModel):
+    """Nearest neighbours of an existing ticket (the ticket itself excluded)"""
+    collection: str
+    ticket_id: str
+    results: List[SimilarTicket] = []
+
+class MigrationStatus(BaseModel):
+    """Re-embedding of a collection with a new embedding model"""
+    collection: str
+    phase: Optional[str] = Field(None, description="loading_model, embedding, catching_up, ready, cutting_over, completed, failed or cancelled")
+    running: bool = False
+    model: Optional[str] = None
+    from_model: Optional[str] = None
+    dual_serve: float = Field(0.0, description="Fraction of queries served from the shadow index while ready")
+    auto_cutover: bool = True
+    records_total: int = 0
+    records_embedded: int = 0
+    records_caught_up: int = Field(0, description="Tickets re-embedded or dropped after changing during the migration")
+    rate_per_second: float = 0.0
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
 class QueryRequest(BaseModel):
     """Request model for RAG queries"""
     query: str = Field(..., description="Natural language question")
+    collection: Optional[str] = Field(None, description="Collection to search (default collection if omitted)")
 
 class ChartData(BaseModel):
     """Chart data structure"""
@@ -50,6 +186,20 @@ class QueryResponse(BaseModel):
     chart: Optional[ChartData] = None
     sources: Optional[List[str]] = None
 
+class CollectionInfo(BaseModel):
+    """Residency and size of a named collection"""
+    name: str
+    resident: bool
+    pinned: bool = False
+    vectors_count: Optional[int] = None
+    memory_bytes: Optional[int] = None
+
+class CollectionsResponse(BaseModel):
+    """Response model for collection listing"""
+    collections: List[CollectionInfo]
+    resident_bytes: int
+    memory_budget_bytes: int
+
 class MetricsResponse(BaseModel):
     """Response model for metrics endpoint"""
     avg_resolution_time: str
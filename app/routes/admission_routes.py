@@ -0,0 +1,15 @@
+"""Routes for admission control stats"""
+from fastapi import APIRouter
+from app.services.admission import admission, model_gate
+
+router = APIRouter()
+
+@router.get("/admission")
+async def get_admission_stats():
+    """
+    Admission control state
+    - Per route class: in-flight, queue depth, admitted/rejected totals and
+      the rejection rate over the last minute
+    - Shared embedding model gate: busy slots and waiting interactive/bulk callers
+    """
+    return {**admission.stats(), "model_gate": model_gate.stats()}
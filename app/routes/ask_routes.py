@@ -4,6 +4,10 @@ from fastapi import APIRouter, HTTPException
 from app.models.jira_schema import QueryRequest, QueryResponse
 from app.services.retriever import retriever
 from app.services.generator import generator
+from app.services.collection_manager import collection_manager
+from app.services.topics import is_broad_question, topic_clusterer
+from app.services.structured_query import structured_queries
+from app.services.profiler import request_profiler
 #from app.services.reranker import reranker
 from app.utils.response_builder import build_query_response, extract_chart_intent
 from app.utils.logger import setup_logger
@@ -13,19 +17,45 @@ logger = setup_logger(__name__)
 router = APIRouter()
 
 @router.post("/ask", response_model=QueryResponse)
-async def ask_question(request: QueryRequest):
+@request_profiler.profiled
+def ask_question(request: QueryRequest):
     """
     Answer natural language questions using RAG
     
+    - Answers count/distribution/trend questions from the field index (no LLM)
     - Retrieves relevant Jira tickets
     - Generates answer using LLM
     - Optionally includes visualizations
     """
     try:
-        logger.info(f"Processing query: {request.query}")
+        collection = collection_manager.validate_name(request.collection or collection_manager.default_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not collection_manager.exists(collection):
+        raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
+
+    try:
+        logger.debug("Processing query: %s (collection=%s)", request.query, collection)
+
+        # Aggregation questions are answered directly from the collection's field index
+        structured = structured_queries.answer(request.query, collection)
+        if structured:
+            logger.debug("Answered from the field index (collection=%s)", collection)
+            return build_query_response(**structured)
+
+        # Corpus-wide questions are answered from precomputed topic summaries
+        if is_broad_question(request.query):
+            topic_context = topic_clusterer.format_context(collection)
+            if topic_context:
+                logger.debug("Answering from topic summaries (collection=%s)", collection)
+                answer = generator.generate_rag_response(request.query, topic_context)
+                return build_query_response(
+                    answer=answer,
+                    sources=topic_clusterer.representative_ids(collection, limit=3)
+                )
         
         # Retrieve relevant documents
-        results = retriever.retrieve(request.query)
+        results = retriever.retrieve(request.query, collection=collection)
         
         if not results:
             return build_query_response(
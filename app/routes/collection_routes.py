@@ -0,0 +1,34 @@
+"""Routes for named collections"""
+from fastapi import APIRouter, HTTPException
+from app.models.jira_schema import CollectionsResponse
+from app.services.collection_manager import collection_manager
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+@router.get("/collections", response_model=CollectionsResponse)
+async def list_collections():
+    """
+    List known collections
+    - Resident collections report vector count and approximate memory
+    - Cold collections are loaded lazily on first access
+    """
+    stats = collection_manager.get_stats()
+    return CollectionsResponse(
+        collections=collection_manager.list_collections(),
+        resident_bytes=stats["resident_bytes"],
+        memory_budget_bytes=stats["memory_budget_bytes"],
+    )
+
+@router.post("/collections/{name}/evict")
+async def evict_collection(name: str):
+    """Drop a collection from memory; it is reloaded from disk on next use"""
+    try:
+        collection_manager.validate_name(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    evicted = collection_manager.evict(name)
+    logger.info(f"Evict request for '{name}': evicted={evicted}")
+    return {"collection": name, "evicted": evicted}
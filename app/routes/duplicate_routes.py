@@ -0,0 +1,59 @@
+"""Routes for near-duplicate ticket clusters"""
+from fastapi import APIRouter, HTTPException, Query
+from app.models.jira_schema import DuplicatesResponse
+from app.services.collection_manager import collection_manager
+from app.services.duplicates import duplicate_detector
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+def _collection(name: str) -> str:
+    try:
+        return collection_manager.validate_name(name or collection_manager.default_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _response(collection: str, min_size: int = 2, limit: int = 100, **extra) -> DuplicatesResponse:
+    result = duplicate_detector.load(collection) or {}
+    clusters = [c for c in result.get("clusters", []) if c["size"] >= min_size]
+    return DuplicatesResponse(
+        collection=collection,
+        running=duplicate_detector.is_running(collection),
+        threshold=result.get("threshold"),
+        updated_at=result.get("updated_at"),
+        mode=result.get("mode"),
+        tickets_total=result.get("tickets_total", 0),
+        tickets_queried=result.get("tickets_queried", 0),
+        duration_seconds=result.get("duration_seconds"),
+        total_clusters=len(clusters),
+        clusters=clusters[:limit],
+        **extra,
+    )
+
+@router.get("/duplicates", response_model=DuplicatesResponse)
+async def get_duplicates(
+    collection: str = Query(None, description="Collection (default collection if omitted)"),
+    min_size: int = Query(2, ge=2, description="Smallest cluster to return"),
+    limit: int = Query(100, ge=1, le=10000, description="Maximum clusters to return (largest first)")
+):
+    """Near-duplicate ticket clusters from the last refresh"""
+    return _response(_collection(collection), min_size=min_size, limit=limit)
+
+@router.post("/duplicates/refresh", response_model=DuplicatesResponse, status_code=202)
+async def refresh_duplicates(
+    collection: str = Query(None, description="Collection (default collection if omitted)"),
+    full: bool = Query(False, description="Recompute all pairs instead of only new/changed tickets")
+):
+    """
+    Recompute duplicate clusters in the background
+    - Incremental by default: only new or changed tickets are re-queried
+    - Poll GET /duplicates for the result
+    """
+    collection = _collection(collection)
+    if not collection_manager.exists(collection):
+        raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
+
+    started = duplicate_detector.start(collection, full=full)
+    logger.info(f"Duplicate refresh requested for '{collection}' (full={full}, started={started})")
+    return _response(collection, started=started)
@@ -1,89 +1,111 @@
 """Routes for data ingestion"""
 import os
+import shutil
 import tempfile
 import spaces
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from app.models.jira_schema import IngestResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from app.models.jira_schema import IngestJobStatus, IngestJobList
+from app.services.collection_manager import collection_manager
 from app.services.data_ingestion import DataIngestionService
-from app.services.embeddings import embedding_service
-from app.services.vector_store import vector_store
+from app.services.ingest_jobs import ingest_jobs, IngestQueueFullError
+from app.services.profiler import request_profiler
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 router = APIRouter()
 
-@router.post("/ingest", response_model=IngestResponse)
-async def ingest_data(file: UploadFile = File(...)):
+def _save_upload(upload: UploadFile, suffix: str) -> str:
+    """Copy an upload to a temporary file (blocking; run off the event loop)."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        try:
+            shutil.copyfileobj(upload.file, temp_file, 1 << 20)
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+        return temp_file.name
+
+@router.post("/ingest", response_model=IngestJobStatus, status_code=202)
+async def ingest_data(
+    file: UploadFile = File(...),
+    collection: str = Query(None, description="Target collection (default collection if omitted)")
+):
     """
-    Ingest Jira data from uploaded CSV/JSON file
-    
+    Ingest Jira data from uploaded CSV/JSON/Parquet/Arrow file
+
     - Accepts file upload
-    - Parses the file
-    - Generates embeddings
-    - Stores in vector database
+    - Queues a background job and returns its id immediately
+    - The job parses the file, generates embeddings and builds a new index
+    - Searches keep using the previous index until the job commits
     """
     temp_file_path = None
-    
+
+    try:
+        collection = collection_manager.validate_name(collection or collection_manager.default_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        logger.info(f"Receiving file upload: {file.filename}")
-        
+        logger.info(f"Receiving file upload: {file.filename} (collection={collection})")
+
         # Validate file type
-        if not file.filename.endswith(('.csv', '.json')):
+        if not file.filename.lower().endswith(DataIngestionService.SUPPORTED_FORMATS):
             raise HTTPException(
-                status_code=400, 
-                detail="Invalid file type. Only CSV and JSON files are supported."
+                status_code=400,
+                detail="Invalid file type. Only CSV, JSON, Parquet and Arrow (.arrow/.feather/.arrows) files are supported."
             )
-        
-        # Create temporary file to store upload
+
+        # Create temporary file to store upload (owned by the job from here on)
         suffix = os.path.splitext(file.filename)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            temp_file_path = temp_file.name
-            
-            # Read and write uploaded file content
-            contents = await file.read()
-            temp_file.write(contents)
-            temp_file.flush()
-        
+        temp_file_path = await run_in_threadpool(_save_upload, file, suffix)
+
         logger.info(f"File saved temporarily at: {temp_file_path}")
-        
-        # Load data from temporary file
-        records = DataIngestionService.load_data(temp_file_path)
-        logger.debug(f"Loaded {len(records)} records from file")
-        
-        if not records:
-            raise HTTPException(status_code=400, detail="No records found in file")
-        
-        # Extract searchable text
-        texts = [record.get('searchable_text', '') for record in records]
-        
-        # Generate embeddings
-        embeddings = embedding_service.embed_batch(texts)
-        
-        # Create collection (recreates if exists)
-        vector_store.create_collection(vector_size=embedding_service.get_dimension())
-        
-        # Store vectors
-        count = vector_store.upsert_vectors(embeddings, records)
-        
-        logger.info(f"Successfully indexed {count} records from {file.filename}")
-        
-        return IngestResponse(
-            status="success",
-            records_indexed=count,
-            message=f"Successfully ingested and indexed {count} Jira tickets from {file.filename}"
-        )
-    
+
+        # A profiled upload also profiles the background job doing the work
+        session = request_profiler.current()
+        job = ingest_jobs.submit(temp_file_path, file.filename, collection,
+                                 profile_id=session.profile_id if session else None)
+        temp_file_path = None
+        return IngestJobStatus(**job.to_dict())
+
     except HTTPException:
         raise
+    except IngestQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Ingestion failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-    
+
     finally:
-        # Clean up temporary file
+        # Clean up temporary file if the job was never queued
         if temp_file_path and os.path.exists(temp_file_path):
             try:
                 os.unlink(temp_file_path)
                 logger.info(f"Cleaned up temporary file: {temp_file_path}")
             except Exception as e:
-                logger.warning(f"Failed to delete temporary file: {e}")
\ No newline at end of file
+                logger.warning(f"Failed to delete temporary file: {e}")
+
+@router.get("/ingest/jobs", response_model=IngestJobList)
+async def list_ingest_jobs():
+    """List recent ingest jobs, newest first"""
+    return IngestJobList(jobs=[IngestJobStatus(**job.to_dict()) for job in ingest_jobs.list_jobs()])
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobStatus)
+async def get_ingest_job(job_id: str):
+    """
+    Progress of an ingest job
+    - Records parsed, embedded and indexed
+    - Throughput and ETA
+    """
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    return IngestJobStatus(**job.to_dict())
+
+@router.post("/ingest/jobs/{job_id}/cancel", response_model=IngestJobStatus)
+async def cancel_ingest_job(job_id: str):
+    """Cancel a queued or running ingest job; the previous index stays in place"""
+    job = ingest_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    return IngestJobStatus(**job.to_dict())
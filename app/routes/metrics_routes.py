@@ -1,8 +1,8 @@
 """Routes for aggregate metrics"""
 import spaces
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.models.jira_schema import MetricsResponse
-from app.services.vector_store import vector_store
+from app.services.collection_manager import CollectionNotFound, collection_manager
 from app.utils.logger import setup_logger
 import pandas as pd
 
@@ -10,7 +10,9 @@ logger = setup_logger(__name__)
 router = APIRouter()
 
 @router.get("/metrics", response_model=MetricsResponse)
-async def get_metrics():
+def get_metrics(
+    collection: str = Query(None, description="Collection to summarize (default collection if omitted)")
+):
     """
     Compute key metrics from Jira data:
     - Total tickets
@@ -20,7 +22,14 @@ async def get_metrics():
     - Priority and Issue Type distribution
     """
     try:
-        logger.info("Calculating metrics...")
+        vector_store = collection_manager.get(collection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    try:
+        logger.info(f"Calculating metrics for collection '{vector_store.name}'...")
 
         info = vector_store.get_collection_info()
         total_tickets = info.get("vectors_count", 0)
@@ -0,0 +1,71 @@
+"""Routes for embedding model migrations"""
+from fastapi import APIRouter, HTTPException, Query
+from app.models.jira_schema import MigrationStatus
+from app.services.collection_manager import collection_manager
+from app.services.migration import embedding_migrator
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+def _collection(name: str) -> str:
+    try:
+        return collection_manager.validate_name(name or collection_manager.default_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _status(collection: str) -> MigrationStatus:
+    status = embedding_migrator.status(collection)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"No migration for collection '{collection}'")
+    return MigrationStatus(**status)
+
+@router.post("/migration", response_model=MigrationStatus, status_code=202)
+async def start_migration(
+    model: str = Query(..., description="Embedding model to move the collection to"),
+    collection: str = Query(None, description="Collection (default collection if omitted)"),
+    dual_serve: float = Query(0.0, ge=0.0, le=1.0, description="Fraction of queries served by the new model once the shadow index is complete"),
+    auto_cutover: bool = Query(True, description="Cut over when done (after MIGRATION_DUAL_SERVE_SECONDS when dual-serving)")
+):
+    """
+    Re-embed a collection with a new model in the background
+    - Searches keep using the current model until cutover
+    - Poll GET /migration for progress
+    """
+    collection = _collection(collection)
+    if not collection_manager.exists(collection):
+        raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
+    try:
+        status = embedding_migrator.start(collection, model, dual_serve=dual_serve, auto_cutover=auto_cutover)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return MigrationStatus(**status)
+
+@router.get("/migration", response_model=MigrationStatus)
+async def get_migration(
+    collection: str = Query(None, description="Collection (default collection if omitted)")
+):
+    """Progress of the current or last migration"""
+    return _status(_collection(collection))
+
+@router.post("/migration/cutover", response_model=MigrationStatus)
+async def cutover_migration(
+    collection: str = Query(None, description="Collection (default collection if omitted)")
+):
+    """Cut over as soon as the shadow index is ready (ends dual-serving early)"""
+    collection = _collection(collection)
+    if not embedding_migrator.cutover(collection):
+        raise HTTPException(status_code=409, detail=f"No running migration for collection '{collection}'")
+    logger.info(f"Cutover requested for '{collection}'")
+    return _status(collection)
+
+@router.post("/migration/cancel", response_model=MigrationStatus)
+async def cancel_migration(
+    collection: str = Query(None, description="Collection (default collection if omitted)")
+):
+    """Abandon a running migration; the collection keeps its current model"""
+    collection = _collection(collection)
+    if not embedding_migrator.cancel(collection):
+        raise HTTPException(status_code=409, detail=f"No cancellable migration for collection '{collection}'")
+    logger.info(f"Migration cancel requested for '{collection}'")
+    return _status(collection)
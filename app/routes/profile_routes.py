@@ -0,0 +1,43 @@
+"""Routes for captured request profiles"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response
+from app.services.profiler import PROFILE_HEADER, request_profiler
+
+router = APIRouter()
+
+def _require_token(x_profile: Optional[str] = Header(None, alias=PROFILE_HEADER)):
+    """Profiles expose code paths and timings; reading them needs PROFILE_TOKEN configured and sent in the header."""
+    if not request_profiler.token:
+        raise HTTPException(status_code=403, detail="Reading profiles is disabled; set PROFILE_TOKEN to enable it")
+    if not request_profiler.authorized(x_profile):
+        raise HTTPException(status_code=403, detail=f"Missing or invalid {PROFILE_HEADER} header")
+
+@router.get("/profiles", dependencies=[Depends(_require_token)])
+async def list_profiles():
+    """Most recent profiles first (metadata and per-component breakdown)"""
+    return {"profiles": request_profiler.list_profiles(), "keep": request_profiler.keep}
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(_require_token)])
+async def get_profile(
+    profile_id: str,
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+    limit: int = Query(40, ge=1, le=500, description="Functions in the text report")
+):
+    """Profile metadata plus a pstats text report"""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return {**profile, "report": request_profiler.report(profile_id, sort=sort, limit=limit)}
+
+@router.get("/profiles/{profile_id}/download", dependencies=[Depends(_require_token)])
+async def download_profile(profile_id: str):
+    """The raw profile (.prof), loadable with pstats or snakeviz"""
+    data = request_profiler.dump(profile_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'},
+    )
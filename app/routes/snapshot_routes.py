@@ -0,0 +1,66 @@
+"""Routes for exporting and importing collection snapshots"""
+import os
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from app.models.jira_schema import SnapshotInfo, SnapshotList
+from app.services.collection_manager import CollectionNotFound
+from app.services.snapshots import SnapshotError, snapshot_service
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+@router.get("/snapshots", response_model=SnapshotList)
+async def list_snapshots():
+    """Snapshot bundles in SNAPSHOT_DIR, newest first"""
+    return SnapshotList(snapshots=snapshot_service.list_snapshots())
+
+@router.post("/snapshots/export", response_model=SnapshotInfo, status_code=201)
+async def export_snapshot(
+    collection: str = Query(None, description="Collection to snapshot (default collection if omitted)"),
+    compress: bool = Query(False, description="Write a .tar.gz instead of a plain .tar")
+):
+    """
+    Write a versioned snapshot bundle to SNAPSHOT_DIR
+    - Index, payloads, aggregates and analytics, plus a manifest with the
+      embedding model, dimension, record count and checksums
+    """
+    try:
+        manifest = await run_in_threadpool(snapshot_service.export, collection, None, compress)
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (SnapshotError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SnapshotInfo(**manifest, name=os.path.basename(manifest["path"]), bytes=os.path.getsize(manifest["path"]))
+
+@router.get("/snapshots/{name}/download")
+async def download_snapshot(name: str):
+    """Download a bundle for copying to another replica"""
+    try:
+        path = snapshot_service.resolve(name)
+    except SnapshotError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return FileResponse(path, media_type="application/x-tar", filename=name)
+
+@router.post("/snapshots/{name}/import", response_model=SnapshotInfo)
+async def import_snapshot(
+    name: str,
+    collection: str = Query(None, description="Target collection (the snapshot's own if omitted)")
+):
+    """
+    Restore a bundle from SNAPSHOT_DIR into a collection
+    - Refused (409) if it was built with a different EMBEDDING_MODEL
+    - Files are replaced only after every checksum matches
+    """
+    try:
+        path = snapshot_service.resolve(name)
+    except SnapshotError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        result = await run_in_threadpool(snapshot_service.import_snapshot, path, collection)
+    except SnapshotError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SnapshotInfo(**result, name=name)
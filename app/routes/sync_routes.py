@@ -0,0 +1,40 @@
+"""Routes for incremental Jira sync"""
+from fastapi import APIRouter, HTTPException, Query
+from app.config import settings
+from app.models.jira_schema import JiraSyncStatus
+from app.services.collection_manager import collection_manager
+from app.services.jira_sync import jira_sync
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+def _collection(name: str) -> str:
+    try:
+        return collection_manager.validate_name(name or collection_manager.default_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sync/jira", response_model=JiraSyncStatus, status_code=202)
+async def start_jira_sync(
+    collection: str = Query(None, description="Target collection (default collection if omitted)")
+):
+    """
+    Pull issues changed since the stored watermark
+    - Runs in the background; poll GET /sync/jira for the result
+    - Only changed tickets are re-embedded and replaced in the index
+    """
+    collection = _collection(collection)
+    if not settings.JIRA_BASE_URL:
+        raise HTTPException(status_code=400, detail="JIRA_BASE_URL is not configured")
+
+    started = jira_sync.start(collection)
+    logger.info(f"Jira sync requested for '{collection}' (started={started})")
+    return JiraSyncStatus(**jira_sync.get_state(collection), started=started)
+
+@router.get("/sync/jira", response_model=JiraSyncStatus)
+async def get_jira_sync(
+    collection: str = Query(None, description="Collection (default collection if omitted)")
+):
+    """Watermark and outcome of the last Jira sync"""
+    return JiraSyncStatus(**jira_sync.get_state(_collection(collection)))
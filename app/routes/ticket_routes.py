@@ -0,0 +1,59 @@
+"""Routes for ticket lookup by id and similar-ticket search"""
+from fastapi import APIRouter, HTTPException, Query
+from app.config import settings
+from app.models.jira_schema import SimilarTicket, SimilarTicketsResponse, TicketRecord
+from app.services.collection_manager import collection_manager
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+def _collection(name: str) -> str:
+    try:
+        name = collection_manager.validate_name(name or collection_manager.default_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not collection_manager.exists(name):
+        raise HTTPException(status_code=404, detail=f"Collection '{name}' not found")
+    return name
+
+@router.get("/tickets/{ticket_id}", response_model=TicketRecord)
+def get_ticket(
+    ticket_id: str,
+    collection: str = Query(None, description="Collection (default collection if omitted)")
+):
+    """Fetch a stored ticket by ticket_id"""
+    collection = _collection(collection)
+    record = collection_manager.get(collection).get_record(ticket_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Ticket '{ticket_id}' not found in '{collection}'")
+    return TicketRecord(collection=collection, ticket_id=ticket_id, vector_id=record["id"], payload=record["payload"])
+
+@router.get("/tickets/{ticket_id}/similar", response_model=SimilarTicketsResponse)
+def get_similar_tickets(
+    ticket_id: str,
+    collection: str = Query(None, description="Collection (default collection if omitted)"),
+    top_k: int = Query(None, ge=1, le=100, description="Number of similar tickets (TOP_K if omitted)")
+):
+    """
+    Tickets similar to an existing one
+    - Searches with the ticket's stored vector, so no embedding is computed
+    - The ticket itself is excluded from the results
+    """
+    collection = _collection(collection)
+    results = collection_manager.get(collection).search_similar(
+        ticket_id,
+        limit=top_k or settings.TOP_K,
+        score_threshold=settings.SCORE_THRESHOLD
+    )
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"Ticket '{ticket_id}' not found in '{collection}'")
+    logger.info(f"Similar to {ticket_id} in '{collection}': {len(results)} results")
+    return SimilarTicketsResponse(
+        collection=collection,
+        ticket_id=ticket_id,
+        results=[
+            SimilarTicket(ticket_id=r["payload"].get("ticket_id"), score=r["score"], payload=r["payload"])
+            for r in results
+        ],
+    )
@@ -0,0 +1,49 @@
+"""Routes for precomputed ticket topics"""
+from fastapi import APIRouter, HTTPException, Query
+from app.models.jira_schema import TopicsResponse
+from app.services.collection_manager import collection_manager
+from app.services.topics import topic_clusterer
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+router = APIRouter()
+
+def _collection(name: str) -> str:
+    try:
+        return collection_manager.validate_name(name or collection_manager.default_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _response(collection: str, limit: int = 100, **extra) -> TopicsResponse:
+    result = topic_clusterer.load(collection) or {}
+    return TopicsResponse(
+        collection=collection,
+        running=topic_clusterer.is_running(collection),
+        updated_at=result.get("updated_at"),
+        tickets_total=result.get("tickets_total", 0),
+        num_topics=result.get("num_topics", 0),
+        duration_seconds=result.get("duration_seconds"),
+        topics=result.get("topics", [])[:limit],
+        **extra,
+    )
+
+@router.get("/topics", response_model=TopicsResponse)
+async def get_topics(
+    collection: str = Query(None, description="Collection (default collection if omitted)"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum topics to return (largest first)")
+):
+    """Topic clusters from the last clustering run"""
+    return _response(_collection(collection), limit=limit)
+
+@router.post("/topics/refresh", response_model=TopicsResponse, status_code=202)
+async def refresh_topics(
+    collection: str = Query(None, description="Collection (default collection if omitted)")
+):
+    """Recluster a collection in the background; poll GET /topics for the result"""
+    collection = _collection(collection)
+    if not collection_manager.exists(collection):
+        raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
+
+    started = topic_clusterer.start(collection)
+    logger.info(f"Topic clustering requested for '{collection}' (started={started})")
+    return _response(collection, started=started)
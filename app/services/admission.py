@@ -0,0 +1,248 @@
+"""Admission control: per-route limits, priority queues and load shedding"""
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from app.config import settings
+from app.utils.logger import setup_logger
+
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+# Model gate priorities (lower runs first)
+INTERACTIVE = 0
+BULK = 10
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; maps to an HTTP status with Retry-After."""
+
+    def __init__(self, route_class: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.route_class = route_class
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _RouteClass:
+    def __init__(self, name: str, priority: int, limit: int, max_queue: int):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.service_seconds = 0.0  # EWMA of time holding a slot
+        self.recent: Deque[Tuple[float, bool]] = deque()  # (time, rejected) over the rate window
+
+    def record(self, rejected: bool, window: float):
+        now = time.monotonic()
+        self.recent.append((now, rejected))
+        while self.recent and self.recent[0][0] < now - window:
+            self.recent.popleft()
+
+    def queued(self) -> int:
+        return sum(1 for f in self.waiting if not f.done())
+
+
+class AdmissionController:
+    """
+    Admits HTTP requests into a fixed number of shared compute slots.
+    - Each route class (query, metrics, ingest) has its own concurrency limit
+      and bounded wait queue
+    - When a slot frees, the waiting request with the best (lowest) priority
+      class goes first, so interactive queries overtake metrics and uploads
+    - A full queue is rejected immediately with 429; a request that waits
+      longer than ADMISSION_QUEUE_TIMEOUT is shed with 503. Both carry a
+      Retry-After estimated from queue depth and recent service time
+    Runs on the event loop; no locks are needed.
+    """
+
+    def __init__(self, capacity: int, classes: List[_RouteClass], queue_timeout: float, rate_window: float = 60.0):
+        self.capacity = capacity
+        self.queue_timeout = queue_timeout
+        self.rate_window = rate_window
+        self.classes: Dict[str, _RouteClass] = {c.name: c for c in classes}
+        self.in_flight = 0
+
+    def _can_run(self, route: _RouteClass) -> bool:
+        return self.in_flight < self.capacity and route.in_flight < route.limit
+
+    def _higher_priority_waiting(self, route: _RouteClass) -> bool:
+        return any(c.queued() and c.priority <= route.priority and c.in_flight < c.limit for c in self.classes.values())
+
+    def _retry_after(self, route: _RouteClass) -> int:
+        per_request = route.service_seconds or 1.0
+        return max(1, math.ceil(per_request * (route.queued() + 1) / max(1, route.limit)))
+
+    def _start(self, route: _RouteClass):
+        self.in_flight += 1
+        route.in_flight += 1
+        route.admitted += 1
+        route.record(False, self.rate_window)
+
+    def _reject(self, route: _RouteClass, status_code: int, reason: str) -> AdmissionRejected:
+        if status_code == 429:
+            route.rejected_queue_full += 1
+        else:
+            route.rejected_timeout += 1
+        route.record(True, self.rate_window)
+        logger.warning(f"Admission rejected {route.name} request ({status_code}): {reason}")
+        return AdmissionRejected(route.name, status_code, self._retry_after(route), reason)
+
+    def _dispatch(self):
+        """Hand free slots to waiters, best priority class first."""
+        while self.in_flight < self.capacity:
+            ready = [c for c in self.classes.values() if c.queued() and c.in_flight < c.limit]
+            if not ready:
+                return
+            route = min(ready, key=lambda c: c.priority)
+            while route.waiting:
+                waiter = route.waiting.popleft()
+                if not waiter.done():
+                    self._start(route)
+                    waiter.set_result(True)
+                    break
+
+    @asynccontextmanager
+    async def admit(self, route_class: str):
+        """Hold a slot for `route_class` for the duration of the block, or raise AdmissionRejected."""
+        route = self.classes[route_class]
+        if self._can_run(route) and not self._higher_priority_waiting(route):
+            self._start(route)
+        else:
+            if route.queued() >= route.max_queue:
+                raise self._reject(route, 429, f"{route.name} queue is full ({route.max_queue} waiting)")
+            waiter = asyncio.get_running_loop().create_future()
+            route.waiting.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(route, 503, f"waited more than {self.queue_timeout:g}s for a {route.name} slot")
+            except asyncio.CancelledError:
+                # Client went away; give the slot back if we were admitted in the meantime
+                if waiter.done() and not waiter.cancelled():
+                    self._finish(route, 0.0)
+                raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._finish(route, time.monotonic() - started)
+
+    def _finish(self, route: _RouteClass, elapsed: float):
+        self.in_flight -= 1
+        route.in_flight -= 1
+        route.service_seconds = elapsed if not route.service_seconds else 0.8 * route.service_seconds + 0.2 * elapsed
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        for route in self.classes.values():
+            window_total = len(route.recent)
+            window_rejected = sum(1 for _, rejected in route.recent if rejected)
+            classes[route.name] = {
+                "priority": route.priority,
+                "limit": route.limit,
+                "max_queue": route.max_queue,
+                "in_flight": route.in_flight,
+                "queue_depth": route.queued(),
+                "admitted_total": route.admitted,
+                "rejected_queue_full_total": route.rejected_queue_full,
+                "rejected_timeout_total": route.rejected_timeout,
+                "rejection_rate": round(window_rejected / window_total, 4) if window_total else 0.0,
+                "avg_service_seconds": round(route.service_seconds, 3),
+            }
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queue_timeout_seconds": self.queue_timeout,
+            "rate_window_seconds": self.rate_window,
+            "classes": classes,
+        }
+
+
+class PriorityGate:
+    """
+    Thread-side counterpart for the shared embedding model: callers hold a
+    slot around each forward pass, and when the model is busy the waiter
+    with the lowest priority number goes next. Ingest takes the gate once
+    per token-budget batch, so an interactive query waits for at most one
+    batch instead of a whole upload. An ingest worker pool has a gate of its
+    own, one slot per worker process.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._busy = 0
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    def acquire(self, priority: int):
+        """Block until a slot is free and no better-priority caller is waiting for it."""
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            while self._busy >= self.capacity or self._waiters[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._busy += 1
+            # The next waiter may also fit if capacity > 1
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._busy -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int) -> Iterator[None]:
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "busy": self._busy,
+                "waiting_interactive": sum(1 for p, _ in self._waiters if p < BULK),
+                "waiting_bulk": sum(1 for p, _ in self._waiters if p >= BULK),
+            }
+
+
+def route_class_for(method: str, path: str) -> Optional[str]:
+    """Admission class for a request, or None if it is not admission-controlled."""
+    if method == "POST" and path == "/api/ask":
+        return "query"
+    if method == "GET" and path == "/api/metrics":
+        return "metrics"
+    if method == "POST" and path == "/api/ingest":
+        return "ingest"
+    return None
+
+
+# Global instances
+admission = AdmissionController(
+    capacity=settings.ADMISSION_CONCURRENCY,
+    classes=[
+        _RouteClass("query", 0, settings.ADMISSION_QUERY_LIMIT, settings.ADMISSION_QUERY_QUEUE),
+        _RouteClass("metrics", 1, settings.ADMISSION_METRICS_LIMIT, settings.ADMISSION_METRICS_QUEUE),
+        _RouteClass("ingest", 2, settings.ADMISSION_INGEST_LIMIT, settings.ADMISSION_INGEST_QUEUE),
+    ],
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+)
+model_gate = PriorityGate(settings.MODEL_CONCURRENCY)
@@ -0,0 +1,216 @@
+"""Named collections with LRU residency under a memory budget"""
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from app.config import settings
+from app.services.vector_store import VectorStoreService, vector_store
+from app.services.sharded_store import ShardedVectorStore, get_shard_pool
+from app.utils.logger import setup_logger
+
+import os
+import re
+import threading
+
+logger = setup_logger(__name__)
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class CollectionNotFound(LookupError):
+    """Raised when reading a collection that was never created."""
+
+
+class CollectionManager:
+    """
+    Maps collection names to VectorStoreService instances.
+    - Each collection has its own index + payload files under COLLECTIONS_DIR/<name>/
+    - The default collection keeps the legacy FAISS_INDEX_PATH/FAISS_PAYLOADS_PATH
+      and always stays resident
+    - Other collections are loaded lazily and evicted least-recently-used first
+      once the resident set exceeds COLLECTION_MEMORY_BUDGET_MB
+    - Pinned collections (e.g. during ingest) are never evicted
+    - In sharded mode every collection (default included) is a ShardedVectorStore
+    """
+
+    def __init__(self, default_store: VectorStoreService, memory_budget_mb: int):
+        self.default_name = settings.DEFAULT_COLLECTION
+        self.sharded = settings.VECTOR_STORE_MODE == "sharded"
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self._lock = threading.RLock()
+        self._resident: "OrderedDict[str, VectorStoreService]" = OrderedDict()
+        self._resident[self.default_name] = (
+            ShardedVectorStore(self.default_name) if self.sharded else default_store
+        )
+        self._pins: Counter = Counter()
+        self._loading: Dict[str, threading.Lock] = {}  # per-name locks for loads done outside _lock
+
+    # ---------- Naming/paths ----------
+
+    def validate_name(self, name: str) -> str:
+        """Return the collection name or raise ValueError if it is not a safe identifier."""
+        if not name or not _NAME_RE.match(name):
+            raise ValueError(
+                f"Invalid collection name '{name}'. Use 1-64 letters, digits, '_' or '-'."
+            )
+        return name
+
+    def _paths(self, name: str) -> Tuple[str, str]:
+        collection_dir = os.path.join(settings.COLLECTIONS_DIR, name)
+        return (
+            os.path.join(collection_dir, "faiss.index"),
+            os.path.join(collection_dir, "faiss_payloads.json"),
+        )
+
+    def artifacts_dir(self, name: str) -> str:
+        """Directory for a collection's derived data (duplicates, topics, ...)."""
+        return os.path.join(settings.DATA_DIR, "analytics", self.validate_name(name))
+
+    # ---------- Access ----------
+
+    def _build_store(self, name: str):
+        if self.sharded:
+            return ShardedVectorStore(name)
+        index_path, payloads_path = self._paths(name)
+        return VectorStoreService(index_path=index_path, payloads_path=payloads_path, name=name)
+
+    def get(self, name: str = None, create: bool = False) -> VectorStoreService:
+        """
+        Return the store for a collection, loading it (and evicting cold ones) if needed.
+        Unknown collections raise CollectionNotFound unless `create` is set (ingest paths).
+        """
+        name = self.validate_name(name or self.default_name)
+        with self._lock:
+            store = self._touch(name)
+            if store is not None:
+                return store
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        # Load from disk holding only this name's lock, so lookups of other collections don't wait
+        with loading:
+            with self._lock:
+                store = self._touch(name)
+                if store is not None:
+                    return store
+            try:
+                if not create and not self.exists(name):
+                    raise CollectionNotFound(f"Collection '{name}' not found")
+                store = self._build_store(name)
+            finally:
+                with self._lock:
+                    if self._loading.get(name) is loading:
+                        del self._loading[name]
+            with self._lock:
+                resident = self._resident.get(name)
+                if resident is not None:  # loaded meanwhile under a newer per-name lock
+                    store.close()
+                    return self._touch(name)
+                self._resident[name] = store
+                logger.info(f"Loaded collection '{name}' ({store.memory_bytes()} bytes)")
+                return self._touch(name)
+
+    def _touch(self, name: str) -> Optional[VectorStoreService]:
+        """Mark a resident collection most recently used and enforce the budget. Caller holds _lock."""
+        store = self._resident.get(name)
+        if store is not None:
+            self._resident.move_to_end(name)
+            self._evict_to_budget(keep=name)
+        return store
+
+    @contextmanager
+    def pinned(self, name: str = None, create: bool = False) -> Iterator[VectorStoreService]:
+        """Hold a collection resident for the duration of a write."""
+        name = self.validate_name(name or self.default_name)
+        while True:
+            store = self.get(name, create=create)
+            with self._lock:
+                if self._resident.get(name) is store:  # not evicted since get() returned it
+                    self._pins[name] += 1
+                    break
+        try:
+            yield store
+        finally:
+            with self._lock:
+                self._pins[name] -= 1
+                if self._pins[name] <= 0:
+                    del self._pins[name]
+                self._evict_to_budget(keep=name)
+
+    def exists(self, name: str) -> bool:
+        """True if the collection is resident or has data on disk (on any shard in sharded mode)."""
+        name = self.validate_name(name)
+        if name in self._resident:
+            return True
+        if self.sharded:
+            return any(get_shard_pool().broadcast(name, "exists"))
+        return all(os.path.exists(p) for p in self._paths(name))
+
+    # ---------- Residency ----------
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(store.memory_bytes() for store in self._resident.values())
+
+    def _evict_to_budget(self, keep: str):
+        """Drop least-recently-used collections until the resident set fits the budget."""
+        total = sum(store.memory_bytes() for store in self._resident.values())
+        for name in list(self._resident.keys()):
+            if total <= self.memory_budget_bytes:
+                break
+            if name in (keep, self.default_name) or self._pins.get(name):
+                continue
+            store = self._resident.pop(name)
+            total -= store.memory_bytes()
+            store.close()
+            logger.info(f"Evicted collection '{name}' from memory (budget {self.memory_budget_bytes} bytes)")
+
+    def evict(self, name: str) -> bool:
+        """Explicitly drop a collection from memory; it reloads lazily on next access."""
+        with self._lock:
+            if name == self.default_name or self._pins.get(name) or name not in self._resident:
+                return False
+            self._resident.pop(name).close()
+            return True
+
+    # ---------- Introspection ----------
+
+    def collection_names(self) -> Set[str]:
+        """Names of the collections resident here or stored under this process's COLLECTIONS_DIR."""
+        with self._lock:
+            names = set(self._resident.keys())
+        if os.path.isdir(settings.COLLECTIONS_DIR):
+            for entry in os.listdir(settings.COLLECTIONS_DIR):
+                if _NAME_RE.match(entry) and os.path.isdir(os.path.join(settings.COLLECTIONS_DIR, entry)):
+                    names.add(entry)
+        return names
+
+    def list_collections(self) -> List[Dict[str, Any]]:
+        """All known collections (resident or on disk, on any shard in sharded mode) with residency info."""
+        names = self.collection_names()
+        if self.sharded:
+            # Collections only the shards have stored, e.g. created before this router started
+            for shard_names in get_shard_pool().broadcast(self.default_name, "collection_names"):
+                names.update(shard_names)
+        with self._lock:
+            collections = []
+            for name in sorted(names):
+                store = self._resident.get(name)
+                if store is not None:
+                    info = store.get_collection_info()
+                    info["resident"] = True
+                else:
+                    info = {"name": name, "resident": False}
+                info["pinned"] = bool(self._pins.get(name))
+                collections.append(info)
+            return collections
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "resident_collections": list(self._resident.keys()),
+                "resident_bytes": self.resident_bytes(),
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
+
+
+# Global instance
+collection_manager = CollectionManager(vector_store, settings.COLLECTION_MEMORY_BUDGET_MB)
@@ -1,14 +1,26 @@
 """Data ingestion service for parsing Jira exports"""
 import pandas as pd
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
+from app.services.payload_store import CompactPayloads
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 class DataIngestionService:
     """Handles parsing and preprocessing of Jira data files"""
+
+    # Fields folded into searchable_text, in order
+    #TEXT_FIELDS = ['summary', 'description', 'status', 'priority', 'project']
+    TEXT_FIELDS = ['summary', 'description', 'status', 'priority', 'project','issue_type', 'component', 'module', 'symptom_severity','assignee', 'reporter']
+
+    # Export columns the app reads; Parquet/Arrow files are read with only these projected
+    RECORD_FIELDS = ['ticket_id'] + TEXT_FIELDS + ['created_date', 'resolved_date', 'labels', 'updated']
+
+    # .parquet, Arrow IPC file (.arrow/.feather) and Arrow IPC stream (.arrows)
+    COLUMNAR_FORMATS = ('.parquet', '.arrow', '.feather', '.arrows')
+    SUPPORTED_FORMATS = ('.csv', '.json') + COLUMNAR_FORMATS
     
     @staticmethod
     def parse_csv(file_path: str) -> List[Dict[str, Any]]:
@@ -20,16 +32,8 @@ class DataIngestionService:
             # Normalize column names
             df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
             
-            # Convert to list of dictionaries
-            records = df.to_dict('records')
-            
-            # Clean and structure data
-            processed_records = []
-            for record in records:
-                processed = DataIngestionService._clean_record(record)
-                processed_records.append(processed)
-            
-            return processed_records
+            # Clean and structure data column-wise (same output as _clean_record per row)
+            return DataIngestionService.clean_frame(df)
         
         except Exception as e:
             logger.error(f"Error parsing CSV: {str(e)}")
@@ -63,14 +67,14 @@ class DataIngestionService:
         for key, value in record.items():
             if pd.isna(value) or value == '' or value == 'None':
                 record[key] = None
+        ticket_id = record.get('ticket_id')
+        if isinstance(ticket_id, float) and ticket_id.is_integer():
+            record['ticket_id'] = int(ticket_id)  # a CSV id column with blanks is read as float
         
         # Create searchable text representation
-        #text_fields = ['summary', 'description', 'status', 'priority', 'project']
-        text_fields = ['summary', 'description', 'status', 'priority', 'project','issue_type', 'component', 'module', 'symptom_severity','assignee', 'reporter']
-
         text_parts = []
         
-        for field in text_fields:
+        for field in DataIngestionService.TEXT_FIELDS:
             if field in record and record[field]:
                 text_parts.append(f"{field}: {record[field]}")
         
@@ -78,6 +82,168 @@ class DataIngestionService:
         
         return record
     
+    @staticmethod
+    def clean_frame(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Column-wise equivalent of running _clean_record on every row
+        - NaN, '' and 'None' cells become None
+        - An all-integral float ticket_id column (ids with blanks in a CSV) is read back as ints
+        - searchable_text parts are formatted per column over TEXT_FIELDS,
+          skipping falsy values exactly like the per-row path
+        """
+        missing = df.isna()
+        for column in df.columns[df.dtypes == object]:
+            missing[column] |= df[column].isin(('', 'None'))
+        cleaned = df.astype(object).where(~missing, None)
+        if 'ticket_id' in cleaned.columns and pd.api.types.is_float_dtype(df['ticket_id']):
+            cleaned['ticket_id'] = pd.Series(
+                [int(v) if v is not None and v.is_integer() else v for v in cleaned['ticket_id'].tolist()],
+                index=cleaned.index, dtype=object,
+            )
+
+        # Format each "field: value" part column-wise; one C-level join per row
+        parts = []
+        for field in DataIngestionService.TEXT_FIELDS:
+            if field not in cleaned.columns:
+                continue
+            column = cleaned[field]
+            parts.append((f"{field}: " + column.astype(str)).where(column.astype(bool), '').tolist())
+        if parts:
+            cleaned['searchable_text'] = [" | ".join(filter(None, row)) for row in zip(*parts)]
+        else:
+            cleaned['searchable_text'] = ''
+
+        # Zip column lists directly; DataFrame.to_dict('records') is slower on object columns
+        columns = list(cleaned.columns)
+        values = [cleaned[column].tolist() for column in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+    
+    @staticmethod
+    def is_columnar(file_path: str) -> bool:
+        return Path(file_path).suffix.lower() in DataIngestionService.COLUMNAR_FORMATS
+
+    @staticmethod
+    def open_columnar(file_path: str, batch_rows: int) -> Tuple[Optional[int], Iterator[Any]]:
+        """
+        Open a Parquet / Arrow IPC file or stream for batched reading.
+        Returns the row count (None for a stream, where it is unknown up front)
+        and an iterator of pyarrow RecordBatches of at most batch_rows rows,
+        holding only the RECORD_FIELDS columns present, under normalized names
+        (same normalization as CSV headers). Arrow files are memory-mapped, so
+        batches are zero-copy views of the file.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet/Arrow ingest needs the pyarrow package")
+
+        file_ext = Path(file_path).suffix.lower()
+        if file_ext == '.parquet':
+            parquet = pq.ParquetFile(file_path, memory_map=True)
+            names = parquet.schema_arrow.names
+        elif file_ext == '.arrows':
+            reader = pa.ipc.open_stream(pa.memory_map(file_path))
+            names = reader.schema.names
+        else:
+            reader = pa.ipc.open_file(pa.memory_map(file_path))
+            names = reader.schema.names
+
+        # Column projection: raw column index -> normalized name, first match wins
+        wanted = set(DataIngestionService.RECORD_FIELDS)
+        projection: Dict[int, str] = {}
+        for i, name in enumerate(names):
+            normalized = str(name).strip().lower().replace(' ', '_')
+            if normalized in wanted and normalized not in projection.values():
+                projection[i] = normalized
+        if not projection:
+            raise ValueError(f"No known columns in {Path(file_path).name} (expected some of {DataIngestionService.RECORD_FIELDS})")
+        indices, out_names = list(projection), list(projection.values())
+        logger.info(f"Reading {len(indices)} of {len(names)} columns from {file_path}")
+
+        def project(batch):
+            return pa.RecordBatch.from_arrays([batch.column(i) for i in indices], names=out_names)
+
+        def rebatch(batches):
+            for batch in batches:
+                for start in range(0, batch.num_rows, batch_rows):
+                    yield project(batch.slice(start, batch_rows))  # slices are zero-copy
+
+        if file_ext == '.parquet':
+            raw = parquet.iter_batches(batch_size=batch_rows, columns=[names[i] for i in indices])
+            return parquet.metadata.num_rows, (pa.RecordBatch.from_arrays(b.columns, names=out_names) for b in raw)
+        if file_ext == '.arrows':
+            return None, rebatch(reader)
+        total = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        return total, rebatch(reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    @staticmethod
+    def _clean_arrow_column(column):
+        """Arrow equivalent of _clean_record's missing-value rules; dates/timestamps become strings like a CSV export."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            missing = pc.is_in(column, value_set=pa.array(['', 'None'], type=column.type))
+            return pc.if_else(missing, pa.scalar(None, column.type), column)
+        if pa.types.is_floating(column.type):
+            return pc.if_else(pc.is_nan(column), pa.scalar(None, column.type), column)
+        if pa.types.is_timestamp(column.type):
+            seconds = column.cast(pa.timestamp('s', tz=column.type.tz), safe=False)
+            return pc.strftime(seconds, format='%Y-%m-%d %H:%M:%S')
+        if pa.types.is_date(column.type):
+            return pc.strftime(column, format='%Y-%m-%d')
+        return column
+
+    @staticmethod
+    def clean_arrow_batch(batch) -> Tuple[List[str], CompactPayloads]:
+        """
+        Column-wise _clean_record for one Arrow record batch, without per-row dicts
+        - searchable_text is assembled with Arrow string kernels over TEXT_FIELDS
+          (falsy values skipped, as in the per-row path)
+        - Returns the texts to embed and the batch's payloads, already column-encoded
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        cleaned = {name: DataIngestionService._clean_arrow_column(column)
+                   for name, column in zip(batch.schema.names, batch.columns)}
+
+        # Each present value becomes " | field: value"; joining them and dropping the
+        # leading separator gives the per-row " | ".join(...)
+        parts = []
+        for field in DataIngestionService.TEXT_FIELDS:
+            column = cleaned.get(field)
+            if column is None:
+                continue
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                part = pc.binary_join_element_wise(f" | {field}: ", column, "")
+            else:
+                part = pa.array([f" | {field}: {v}" if v else None for v in column.to_pylist()], type=pa.string())
+            parts.append(pc.fill_null(part, ""))
+        if parts:
+            texts = pc.utf8_slice_codeunits(pc.binary_join_element_wise(*parts, ""), 3).to_pylist()
+        else:
+            texts = [""] * batch.num_rows
+
+        columns = {name: column.to_pylist() for name, column in cleaned.items()}
+        if 'ticket_id' in cleaned and pa.types.is_floating(cleaned['ticket_id'].type):
+            columns['ticket_id'] = [int(v) if v is not None and v.is_integer() else v for v in columns['ticket_id']]
+        columns['searchable_text'] = texts
+        return texts, CompactPayloads.from_columns(columns)
+
+    @staticmethod
+    def parse_columnar(file_path: str, batch_rows: int = 65536) -> List[Dict[str, Any]]:
+        """Parse a Parquet/Arrow export into records (the ingest job streams batches instead)."""
+        _, batches = DataIngestionService.open_columnar(file_path, batch_rows)
+        records: List[Dict[str, Any]] = []
+        for batch in batches:
+            records.extend(DataIngestionService.clean_arrow_batch(batch)[1])
+        logger.info(f"Loaded {len(records)} records from {file_path}")
+        return records
+
     @staticmethod
     def load_data(file_path: str) -> List[Dict[str, Any]]:
         """Load data from file (auto-detect format)"""
@@ -87,5 +253,7 @@ class DataIngestionService:
             return DataIngestionService.parse_csv(file_path)
         elif file_ext == '.json':
             return DataIngestionService.parse_json(file_path)
+        elif file_ext in DataIngestionService.COLUMNAR_FORMATS:
+            return DataIngestionService.parse_columnar(file_path)
         else:
             raise ValueError(f"Unsupported file format: {file_ext}")
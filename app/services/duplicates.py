@@ -0,0 +1,262 @@
+"""Bulk near-duplicate ticket detection over a collection's vectors"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.collection_manager import collection_manager
+from app.utils.logger import setup_logger
+
+import hashlib
+import json
+import os
+import threading
+import time
+import faiss
+import numpy as np
+
+logger = setup_logger(__name__)
+
+
+def _text_hash(text: Optional[str]) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, x: str) -> str:
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: str, b: str):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class DuplicateDetector:
+    """
+    Self-similarity join over all vectors in a collection.
+    - Builds a search index over the stored vectors: exact IndexFlatIP for small
+      collections, IVF with an HNSW coarse quantizer (~DUPLICATES_IVF_LIST_SIZE
+      vectors per list) above DUPLICATES_ANN_MIN so runtime stays near-linear
+    - Queries it in blocks with range_search above DUPLICATE_THRESHOLD (cosine)
+    - Connected components of the pair graph become duplicate clusters
+    - Results persist per collection; refresh() only re-queries tickets that are
+      new or whose text changed since the last run, and starts over when the
+      collection's embedding model changed (e.g. a migration cutover)
+    - The served clusters (duplicates.json) are kept apart from the incremental
+      state, i.e. pairs and per-ticket text hashes (duplicates_state.json), and
+      held in memory until the file changes, so GET /duplicates parses nothing
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._pending: Dict[str, bool] = {}  # collection -> `full` of a run requested mid-run
+        self._runs_lock = threading.Lock()
+        self._cache: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+
+    # ---------- Persistence ----------
+
+    def _path(self, collection: str) -> str:
+        return os.path.join(collection_manager.artifacts_dir(collection), "duplicates.json")
+
+    def _state_path(self, collection: str) -> str:
+        return os.path.join(collection_manager.artifacts_dir(collection), "duplicates_state.json")
+
+    def load(self, collection: str) -> Optional[Dict[str, Any]]:
+        """The served result of the last refresh (clusters + run info); shared, do not mutate."""
+        path = self._path(collection)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._cache.pop(collection, None)
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(collection)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        self._cache[collection] = (key, result)
+        return result
+
+    def _load_state(self, collection: str) -> Optional[Dict[str, Any]]:
+        path = self._state_path(collection)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write(path: str, data: Dict[str, Any]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    def _save(self, collection: str, result: Dict[str, Any], state: Dict[str, Any]):
+        # State first: a crash in between leaves state that is newer than the served result, never older
+        self._write(self._state_path(collection), state)
+        self._write(self._path(collection), result)
+
+    # ---------- Join ----------
+
+    def _build_index(self, vectors: np.ndarray) -> faiss.Index:
+        n, d = vectors.shape
+        if n < settings.DUPLICATES_ANN_MIN:
+            index = faiss.IndexFlatIP(d)
+        else:
+            nlist = max(1, n // settings.DUPLICATES_IVF_LIST_SIZE)
+            quantizer = faiss.IndexHNSWFlat(d, 32, faiss.METRIC_INNER_PRODUCT)
+            index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(n, size=min(n, nlist * 39), replace=False)]
+            index.train(sample)
+            index.nprobe = settings.DUPLICATES_NPROBE
+        index.add(vectors)
+        return index
+
+    def find_pairs(
+        self,
+        vectors: np.ndarray,
+        query_rows: np.ndarray,
+        threshold: float,
+    ) -> List[Tuple[int, int, float]]:
+        """Row pairs (i, j, cosine) with i in query_rows, j != i and cosine >= threshold."""
+        if len(vectors) == 0 or len(query_rows) == 0:
+            return []
+        index = self._build_index(vectors)
+        pairs: List[Tuple[int, int, float]] = []
+        block = settings.DUPLICATES_BLOCK_SIZE
+        for start in range(0, len(query_rows), block):
+            rows = query_rows[start:start + block]
+            lims, scores, ids = index.range_search(vectors[rows], threshold)
+            for qi, row in enumerate(rows):
+                for j, score in zip(ids[lims[qi]:lims[qi + 1]], scores[lims[qi]:lims[qi + 1]]):
+                    if j != row:
+                        pairs.append((int(row), int(j), float(score)))
+        return pairs
+
+    # ---------- Refresh ----------
+
+    def refresh(self, collection: str, full: bool = False) -> Dict[str, Any]:
+        """Recompute duplicate clusters, incrementally unless `full` or the threshold or embedding model changed."""
+        lock = self._locks.setdefault(collection, threading.Lock())
+        with lock:
+            started = time.time()
+            threshold = settings.DUPLICATE_THRESHOLD
+            store = collection_manager.get(collection)
+            # Read before the vectors: a cutover in between leaves the old model in the state, so the next run is full
+            model = store.embedding_model
+            vectors, columns = store.get_vectors_with_columns(["ticket_id", "searchable_text"])
+            vectors = np.ascontiguousarray(vectors, dtype="float32")
+            ticket_ids = [str(tid or f"#{i}") for i, tid in enumerate(columns["ticket_id"])]
+            hashes = {tid: _text_hash(text) for tid, text in zip(ticket_ids, columns["searchable_text"])}
+            del columns
+
+            previous = None if full else self._load_state(collection)
+            if previous and (previous.get("threshold") != threshold or previous.get("embedding_model") != model):
+                previous = None  # pairs scored under other settings or vectors; unchanged text doesn't mean unchanged scores
+
+            if previous:
+                processed = previous.get("processed", {})
+                changed = {tid for tid, h in hashes.items() if processed.get(tid) != h}
+                # Keep pairs between tickets that still exist unchanged; re-query the rest
+                pairs = {
+                    (a, b): score for a, b, score in previous.get("pairs", [])
+                    if a in hashes and b in hashes and a not in changed and b not in changed
+                }
+                query_rows = np.array([i for i, tid in enumerate(ticket_ids) if tid in changed], dtype="int64")
+            else:
+                pairs = {}
+                query_rows = np.arange(len(ticket_ids), dtype="int64")
+
+            for i, j, score in self.find_pairs(vectors, query_rows, threshold):
+                a, b = sorted((ticket_ids[i], ticket_ids[j]))
+                pairs[(a, b)] = max(score, pairs.get((a, b), score))
+
+            result = {
+                "collection": collection,
+                "threshold": threshold,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "mode": "full" if not previous else "incremental",
+                "tickets_total": len(ticket_ids),
+                "tickets_queried": int(len(query_rows)),
+                "duration_seconds": round(time.time() - started, 2),
+                "clusters": self._clusters(pairs),
+            }
+            state = {
+                "threshold": threshold,
+                "embedding_model": model,
+                "pairs": [[a, b, round(score, 4)] for (a, b), score in pairs.items()],
+                "processed": hashes,
+            }
+            self._save(collection, result, state)
+            logger.info(
+                f"Duplicate refresh for '{collection}' ({result['mode']}): queried {len(query_rows)} tickets, "
+                f"{len(pairs)} pairs in {len(result['clusters'])} clusters"
+            )
+            return result
+
+    @staticmethod
+    def _clusters(pairs: Dict[Tuple[str, str], float]) -> List[Dict[str, Any]]:
+        uf = _UnionFind()
+        for a, b in pairs:
+            uf.union(a, b)
+        groups: Dict[str, List[str]] = {}
+        for ticket in uf.parent:
+            groups.setdefault(uf.find(ticket), []).append(ticket)
+        best: Dict[str, float] = {}
+        for (a, _), score in pairs.items():
+            root = uf.find(a)
+            best[root] = max(score, best.get(root, 0.0))
+
+        clusters = [
+            {"ticket_ids": sorted(members), "size": len(members), "max_score": round(best.get(root, 0.0), 4)}
+            for root, members in groups.items()
+        ]
+        clusters.sort(key=lambda c: (-c["size"], -c["max_score"]))
+        for i, cluster in enumerate(clusters):
+            cluster["cluster_id"] = i
+        return clusters
+
+    # ---------- Background ----------
+
+    def is_running(self, collection: str) -> bool:
+        return collection in self._threads
+
+    def start(self, collection: str, full: bool = False) -> bool:
+        """
+        Refresh in the background. If a run is already in progress, returns
+        False and queues one more run after it, so tickets committed mid-run
+        are not left out until the next trigger.
+        """
+        with self._runs_lock:
+            if collection in self._threads:
+                self._pending[collection] = self._pending.get(collection, False) or full
+                return False
+            thread = threading.Thread(target=self._run, args=(collection, full), daemon=True)
+            self._threads[collection] = thread
+        thread.start()
+        return True
+
+    def _run(self, collection: str, full: bool):
+        while True:
+            try:
+                self.refresh(collection, full=full)
+            except Exception as e:
+                logger.error(f"Duplicate refresh for '{collection}' failed: {str(e)}")
+            with self._runs_lock:
+                if collection not in self._pending:
+                    del self._threads[collection]
+                    return
+                full = self._pending.pop(collection)
+
+
+# Global instance
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,365 @@
+"""Shared embedding model server: one process owns the model, API workers call it over a Unix socket"""
+from collections import deque
+from multiprocessing.connection import Client, Listener
+from typing import Any, Deque, Dict, List, Optional
+from app.config import settings
+from app.services.admission import BULK, INTERACTIVE
+from app.utils.logger import setup_logger
+
+import argparse
+import fcntl
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+
+logger = setup_logger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ---------- Server side ----------
+
+class _Pending:
+    __slots__ = ("texts", "priority", "done", "result", "error")
+
+    def __init__(self, texts: List[str], priority: int):
+        self.texts = texts
+        self.priority = priority
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent small embed calls for one model into a single
+    forward pass. Calls arriving within EMBEDDING_BATCH_WAIT_MS of each
+    other (from any API worker) share a batch of up to
+    EMBEDDING_SERVER_MAX_BATCH texts; queries are taken ahead of passages.
+    """
+
+    def __init__(self, service, max_batch: int, wait_ms: float):
+        self.service = service
+        self.max_batch = max_batch
+        self.wait = wait_ms / 1000
+        self._queues: Dict[int, Deque[_Pending]] = {INTERACTIVE: deque(), BULK: deque()}
+        self._cond = threading.Condition()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        threading.Thread(target=self._run, name=f"embed-batcher-{service.model_name}", daemon=True).start()
+
+    def submit(self, texts: List[str], priority: int) -> np.ndarray:
+        """Embed already-prefixed texts; blocks until the batch holding them has run."""
+        pending = _Pending(texts, priority)
+        with self._cond:
+            self._queues[priority].append(pending)
+            self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result  # type: ignore[return-value]
+
+    def _queued_texts(self) -> int:
+        return sum(len(p.texts) for q in self._queues.values() for p in q)
+
+    def _take(self) -> List[_Pending]:
+        batch: List[_Pending] = []
+        size = 0
+        for priority in (INTERACTIVE, BULK):
+            q = self._queues[priority]
+            while q and (not batch or size + len(q[0].texts) <= self.max_batch):
+                pending = q.popleft()
+                batch.append(pending)
+                size += len(pending.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not any(self._queues.values()):
+                    self._cond.wait()
+                deadline = time.monotonic() + self.wait
+                while self._queued_texts() < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take()
+
+            texts = [t for pending in batch for t in pending.texts]
+            priority = min(pending.priority for pending in batch)
+            try:
+                vectors = self.service._encode_gated(texts, priority)
+                start = 0
+                for pending in batch:
+                    pending.result = vectors[start:start + len(pending.texts)]
+                    start += len(pending.texts)
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(texts)
+            for pending in batch:
+                pending.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class EmbeddingServer:
+    """Model registry + request dispatch for the embedding server process."""
+
+    def __init__(self):
+        from app.services.embeddings import get_embedding_service
+
+        self._get_service = get_embedding_service
+        self._batchers: Dict[str, EmbeddingBatcher] = {}
+        self._lock = threading.Lock()
+
+    def _batcher(self, model: str) -> EmbeddingBatcher:
+        batcher = self._batchers.get(model)
+        if batcher is None:
+            with self._lock:
+                batcher = self._batchers.get(model)
+                if batcher is None:
+                    batcher = self._batchers[model] = EmbeddingBatcher(
+                        self._get_service(model), settings.EMBEDDING_SERVER_MAX_BATCH, settings.EMBEDDING_BATCH_WAIT_MS
+                    )
+        return batcher
+
+    def embed(self, model: str, texts: List[str], is_query: bool = False, batch_size: int = 32) -> np.ndarray:
+        prefix = "query: " if is_query else "passage: "
+        prefixed = [prefix + t.strip() for t in texts]
+        priority = INTERACTIVE if is_query else BULK
+        if len(prefixed) > settings.EMBEDDING_SERVER_MAX_BATCH:
+            # Large calls (ingest chunks) run on their own, gated per batch like in-process calls
+            service = self._batcher(model).service
+            return np.concatenate([
+                service._encode_gated(prefixed[i:i + batch_size], priority)
+                for i in range(0, len(prefixed), batch_size)
+            ])
+        return self._batcher(model).submit(prefixed, priority)
+
+    def call(self, model: str, method: str, args: tuple, kwargs: dict) -> Any:
+        if method == "ping":
+            return True
+        if method == "stats":
+            return {name: batcher.stats() for name, batcher in self._batchers.items()}
+        if method == "embed":
+            return self.embed(model, *args, **kwargs)
+        service = self._batcher(model).service
+        if method == "info":
+            return {"model_name": service.model_name, "dimension": service.dimension}
+        if method == "embed_parallel":
+            return np.asarray(service.embed_batch_parallel(*args, **kwargs), dtype="float32")
+        if method == "token_lengths":
+            return service.token_lengths(*args, **kwargs)
+        raise ValueError(f"Unsupported embedding method: {method}")
+
+
+def _handle_connection(conn, server: EmbeddingServer):
+    """Serve (model, method, args, kwargs) requests on one connection."""
+    try:
+        while True:
+            try:
+                model, method, args, kwargs = conn.recv()
+            except EOFError:
+                return
+            try:
+                conn.send(("ok", server.call(model, method, args, kwargs)))
+            except Exception as e:
+                logger.error(f"Embedding call {method} for {model} failed: {e}")
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _authkey() -> Optional[bytes]:
+    return settings.EMBEDDING_AUTHKEY.encode("utf-8") or None
+
+
+def serve(address: str):
+    """
+    Run the embedding server on a Unix socket. The default model is loaded
+    before the socket opens, so a connecting worker never waits on a cold
+    model. One thread per client connection; small calls go through the
+    per-model batcher.
+    """
+    server = EmbeddingServer()
+    server._batcher(settings.EMBEDDING_MODEL)
+    if os.path.exists(address):
+        os.unlink(address)  # stale socket from a previous server
+    listener = Listener(address, family="AF_UNIX", backlog=64, authkey=_authkey())
+    os.chmod(address, 0o600)
+    logger.info(f"Embedding server listening on {address} ({settings.EMBEDDING_MODEL})")
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:
+            logger.warning(f"Rejected embedding connection: {e}")
+            continue
+        threading.Thread(target=_handle_connection, args=(conn, server), daemon=True).start()
+
+
+# ---------- Client side ----------
+
+class EmbeddingClient:
+    """Pooled connections from one API worker to the embedding server."""
+
+    def __init__(self, address: str, max_connections: int):
+        self.address = address
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def call(self, model: str, method: str, *args, **kwargs):
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = Client(self.address, family="AF_UNIX", authkey=_authkey())
+            try:
+                conn.send((model, method, args, kwargs))
+                status, result = conn.recv()
+            except Exception:
+                conn.close()
+                raise
+            self._idle.put(conn)
+        if status != "ok":
+            raise RuntimeError(f"Embedding server error: {result}")
+        return result
+
+    def ready(self) -> bool:
+        try:
+            return self.call("", "ping")
+        except (OSError, EOFError):
+            return False
+
+    def ensure_server(self):
+        """
+        Wait for the server, starting it first if EMBEDDING_SERVER_AUTOSTART
+        is set. A lock file next to the socket makes sure only one of the
+        API workers starting together spawns it.
+        """
+        if self.ready():
+            return
+        deadline = time.time() + settings.EMBEDDING_SERVER_START_TIMEOUT
+        if settings.EMBEDDING_SERVER_AUTOSTART:
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+            with open(self.address + ".lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    if not self.ready():
+                        self._spawn()
+                        self._wait(deadline)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        self._wait(deadline)
+
+    def _spawn(self):
+        logger.info(f"Starting embedding server on {self.address}")
+        subprocess.Popen(
+            [sys.executable, "-m", "app.services.embedding_server", "--listen", self.address],
+            env=dict(os.environ, EMBEDDING_MODE="local"),
+            cwd=_PROJECT_ROOT,
+            start_new_session=True,  # outlives the worker that happened to start it
+        )
+
+    def _wait(self, deadline: float):
+        while not self.ready():
+            if time.time() > deadline:
+                raise RuntimeError(f"Embedding server on {self.address} did not become ready")
+            time.sleep(0.2)
+
+
+_client: Optional[EmbeddingClient] = None
+_client_lock = threading.Lock()
+
+
+def get_embedding_client() -> EmbeddingClient:
+    """This worker's connection pool to the embedding server (the server is started if needed)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            client = EmbeddingClient(settings.EMBEDDING_SOCKET, settings.EMBEDDING_CONNECTIONS)
+            client.ensure_server()
+            _client = client
+        return _client
+
+
+class RemoteEmbeddingService:
+    """
+    Drop-in for EmbeddingService (EMBEDDING_MODE=remote) that forwards
+    calls to the shared embedding server, so API workers hold no model.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.client = get_embedding_client()
+        info = self.client.call(model_name or settings.EMBEDDING_MODEL, "info")
+        self.model_name = info["model_name"]
+        self.dimension = info["dimension"]
+        logger.info(f"Using embedding server for {self.model_name} ({self.dimension}d)")
+
+    def embed_text(self, text: str, is_query: bool = False) -> List[float]:
+        """Generate embedding for a single text (query or passage)."""
+        if not text or not text.strip():
+            logger.warning("Empty text passed to embed_text()")
+            return []
+        return self.client.call(self.model_name, "embed", [text], is_query=is_query)[0].tolist()
+
+    def embed_batch(self, texts: List[str], batch_size: int = 32, is_query: bool = False) -> List[List[float]]:
+        """Generate embeddings for a batch of texts (queries or passages)."""
+        if not texts:
+            return []
+        return self.client.call(self.model_name, "embed", texts, is_query=is_query, batch_size=batch_size).tolist()
+
+    def embed_batch_parallel(
+        self,
+        texts: List[str],
+        is_query: bool = False,
+        workers: Optional[int] = None,
+        token_budget: Optional[int] = None,
+    ) -> List[List[float]]:
+        """Ingest-oriented batch embedding, run by the server (EMBED_WORKERS applies there)."""
+        if not texts:
+            return []
+        return self.client.call(
+            self.model_name, "embed_parallel", texts, is_query=is_query, workers=workers, token_budget=token_budget
+        ).tolist()
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        return self.client.call(self.model_name, "token_lengths", texts)
+
+    def server_stats(self) -> Dict[str, Any]:
+        """Per-model batching counters of the embedding server."""
+        return self.client.call(self.model_name, "stats")
+
+    def shutdown_pool(self):
+        """Nothing to stop in the worker; the server owns models and ingest pools."""
+
+    def get_dimension(self) -> int:
+        """Return embedding vector dimension."""
+        return self.dimension
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the WorkWise embedding server")
+    parser.add_argument("--listen", default=settings.EMBEDDING_SOCKET, help="Unix socket path")
+    args = parser.parse_args()
+
+    settings.EMBEDDING_MODE = "local"  # this process is the one that loads models
+    serve(args.listen)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,60 @@
 """Embedding generation service using intfloat/e5-large-v2"""
-from sentence_transformers import SentenceTransformer
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+import multiprocessing
+import os
+import threading
 import numpy as np
 from app.config import settings
+from app.services.admission import PriorityGate, model_gate, INTERACTIVE, BULK
 from app.utils.logger import setup_logger
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+    from app.services.embedding_server import RemoteEmbeddingService
+
 logger = setup_logger(__name__)
 
+# ---------- Worker-process side of parallel ingest embedding ----------
+
+_worker_model: Optional["SentenceTransformer"] = None
+
+def _init_worker(model_name: str, threads: int):
+    """Load one model copy per worker process with a fixed share of the cores."""
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+
+def token_budget_batches(lengths: List[int], token_budget: int, max_batch: int) -> List[List[int]]:
+    """
+    Group text indices into length-sorted batches whose padded size
+    (batch size x longest text) stays within token_budget.
+    Short tickets end up in large batches, long ones in small batches.
+    """
+    order = np.argsort(lengths, kind="stable")
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for idx in order:
+        longest = lengths[idx]  # ascending order, so the newest text is the longest
+        if current and ((len(current) + 1) * longest > token_budget or len(current) >= max_batch):
+            batches.append(current)
+            current = []
+        current.append(int(idx))
+    if current:
+        batches.append(current)
+    return batches
+
 class EmbeddingService:
     """
     Generate embeddings for text using intfloat/e5-large-v2.
@@ -14,10 +62,16 @@ class EmbeddingService:
     for retrieval tasks.
     """
 
-    def __init__(self):
-        logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    def __init__(self, model_name: Optional[str] = None):
+        from sentence_transformers import SentenceTransformer  # torch is only imported where a model is loaded
+
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        logger.info(f"Loading embedding model: {self.model_name}")
+        self.model = SentenceTransformer(self.model_name)
         self.dimension = self.model.get_sentence_embedding_dimension()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        self._pool_gate: Optional[PriorityGate] = None
         logger.info(f"Embedding dimension: {self.dimension}")
 
     def embed_text(self, text: str, is_query: bool = False) -> List[float]:
@@ -29,11 +83,12 @@ class EmbeddingService:
         prefix = "query: " if is_query else "passage: "
         formatted_text = prefix + text.strip()
 
-        embedding = self.model.encode(
-            formatted_text,
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        )
+        with model_gate.slot(INTERACTIVE if is_query else BULK):
+            embedding = self.model.encode(
+                formatted_text,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
         return embedding.tolist()
 
     def embed_batch(
@@ -49,23 +104,162 @@ class EmbeddingService:
         prefix = "query: " if is_query else "passage: "
         prefixed_texts = [prefix + t.strip() for t in texts]
 
-        logger.info(
-            f"Embedding {len(prefixed_texts)} texts using {settings.EMBEDDING_MODEL} "
-            f"(is_query={is_query})"
+        logger.debug("Embedding %d texts using %s (is_query=%s)", len(prefixed_texts), self.model_name, is_query)
+
+        with model_gate.slot(INTERACTIVE if is_query else BULK):
+            embeddings = self.model.encode(
+                prefixed_texts,
+                batch_size=batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+        return embeddings.tolist()
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count per text (truncated at the model's max sequence length)."""
+        encoded = self.model.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self.model.max_seq_length,
         )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool_workers != workers:
+            self.shutdown_pool()
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            logger.info(f"Starting {workers} embedding workers ({threads} threads each)")
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, threads),
+            )
+            self._pool_workers = workers
+            self._pool_gate = PriorityGate(workers)
+        return self._pool
+
+    def shutdown_pool(self):
+        """Stop the ingest embedding workers (they are restarted lazily)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+            self._pool_workers = 0
+            self._pool_gate = None
+
+    def embed_batch_parallel(
+        self,
+        texts: List[str],
+        is_query: bool = False,
+        workers: Optional[int] = None,
+        token_budget: Optional[int] = None,
+    ) -> List[List[float]]:
+        """
+        Ingest-oriented batch embedding.
+        - Texts are grouped by token length into batches sized by a token
+          budget, so short tickets are not padded up to long ones
+        - With workers > 1, batches are spread over a pool of processes,
+          each holding its own model copy
+        - In process, every batch holds a model_gate slot while it is encoded,
+          so queries can cut in between batches
+        - Pool workers have their own model copies and take slots on the pool's
+          own gate (one per worker) instead, so the pool is sized by EMBED_WORKERS,
+          not by MODEL_CONCURRENCY
+        Output order matches input order.
+        """
+        if not texts:
+            return []
+
+        workers = settings.EMBED_WORKERS if workers is None else workers
+        token_budget = token_budget or settings.EMBED_TOKEN_BUDGET
 
-        embeddings = self.model.encode(
-            prefixed_texts,
-            batch_size=batch_size,
-            show_progress_bar=True,
-            convert_to_numpy=True,
-            normalize_embeddings=True,
+        prefix = "query: " if is_query else "passage: "
+        prefixed_texts = [prefix + t.strip() for t in texts]
+        lengths = self.token_lengths(prefixed_texts)
+        batches = token_budget_batches(lengths, token_budget, settings.EMBED_MAX_BATCH)
+
+        logger.info(
+            f"Embedding {len(prefixed_texts)} texts in {len(batches)} length-sorted batches "
+            f"(token_budget={token_budget}, workers={max(1, workers)})"
         )
+
+        batch_texts = [[prefixed_texts[i] for i in batch] for batch in batches]
+        # One gate acquisition per batch, so queries can cut in between batches
+        priority = INTERACTIVE if is_query else BULK
+        if workers > 1:
+            encoded = self._encode_pooled(batch_texts, workers, priority)
+        else:
+            encoded = (self._encode_gated(chunk, priority) for chunk in batch_texts)
+
+        embeddings = np.empty((len(prefixed_texts), self.dimension), dtype="float32")
+        for batch, vectors in zip(batches, encoded):
+            embeddings[batch] = vectors
         return embeddings.tolist()
 
+    def _encode_pooled(self, batch_texts: List[List[str]], workers: int, priority: int) -> List[np.ndarray]:
+        """Encode batches in the worker pool, each holding a pool gate slot until its worker is done."""
+        pool = self._get_pool(workers)
+        gate = self._pool_gate
+        futures = []
+        for texts in batch_texts:
+            gate.acquire(priority)
+            try:
+                future = pool.submit(_encode_in_worker, texts)
+            except BaseException:
+                gate.release()
+                raise
+            future.add_done_callback(lambda _: gate.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _encode_gated(self, texts: List[str], priority: int) -> np.ndarray:
+        with model_gate.slot(priority):
+            return self.model.encode(
+                texts,
+                batch_size=len(texts),
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+
     def get_dimension(self) -> int:
         """Return embedding vector dimension."""
         return self.dimension
 
+def _create_service(model_name: Optional[str] = None) -> Union[EmbeddingService, "RemoteEmbeddingService"]:
+    """
+    In-process model, or (EMBEDDING_MODE=remote) a client of the shared
+    embedding server, so several API workers share one model copy.
+    """
+    if settings.EMBEDDING_MODE == "remote":
+        from app.services.embedding_server import RemoteEmbeddingService
+        return RemoteEmbeddingService(model_name)
+    return EmbeddingService(model_name)
+
 # Global instance
-embedding_service = EmbeddingService()
+embedding_service = _create_service()
+
+# Other models, loaded on demand (collections migrated to a different model)
+_services: Dict[str, Union[EmbeddingService, "RemoteEmbeddingService"]] = {embedding_service.model_name: embedding_service}
+_services_lock = threading.Lock()
+
+def get_embedding_service(model_name: Optional[str] = None) -> Union[EmbeddingService, "RemoteEmbeddingService"]:
+    """The embedding service for a model, loading it once on first use (on the server in remote mode)."""
+    model_name = model_name or settings.EMBEDDING_MODEL
+    service = _services.get(model_name)  # loaded models are served without taking the lock
+    if service is None:
+        with _services_lock:
+            service = _services.get(model_name)
+            if service is None:
+                service = _services[model_name] = _create_service(model_name)
+    return service
+
+def release_embedding_service(model_name: str):
+    """Drop a non-default model once no collection uses it."""
+    with _services_lock:
+        if model_name != embedding_service.model_name:
+            service = _services.pop(model_name, None)
+            if service is not None:
+                service.shutdown_pool()
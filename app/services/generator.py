@@ -30,7 +30,7 @@ class GeneratorService:
         }
         
         try:
-            logger.info("Calling Hugging Face API...")
+            logger.debug("Calling Hugging Face API...")
             response = requests.post(
                 self.api_url,
                 headers=self.headers,
@@ -49,7 +49,7 @@ class GeneratorService:
             else:
                 generated_text = str(result)
             
-            logger.info("Generation successful")
+            logger.debug("Generation successful")
             return generated_text.strip()
         
         except requests.exceptions.RequestException as e:
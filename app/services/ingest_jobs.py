@@ -0,0 +1,255 @@
+"""Background ingest jobs with progress reporting and cancellation"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.collection_manager import collection_manager
+from app.services.data_ingestion import DataIngestionService
+from app.services.embeddings import get_embedding_service
+from app.services.post_commit import run_post_commit
+from app.services.profiler import request_profiler
+from app.utils.logger import setup_logger
+
+import os
+import threading
+import time
+import uuid
+import numpy as np
+
+logger = setup_logger(__name__)
+
+
+class IngestQueueFullError(Exception):
+    """Raised when too many ingest jobs are already waiting."""
+
+
+class IngestCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else None
+
+
+class IngestJob:
+    """State of one ingest: parse -> embed (chunked) -> index (staged) -> commit."""
+
+    def __init__(self, file_path: str, filename: str, collection: str, profile_id: Optional[str] = None):
+        self.job_id = uuid.uuid4().hex
+        self.file_path = file_path
+        self.filename = filename
+        self.collection = collection
+        self.profile_id = profile_id
+        self.status = "queued"  # queued | running | completed | failed | cancelled
+        self.stage: Optional[str] = None  # parsing | embedding | committing
+        self.records_total = 0
+        self.records_parsed = 0
+        self.records_embedded = 0
+        self.records_indexed = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.embed_started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def throughput(self) -> float:
+        """Records indexed per second since the job started running."""
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.records_indexed / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining time based on embedding rate (embedding dominates ingest time)."""
+        if self.finished or not self.embed_started_at or not self.records_total:
+            return None
+        elapsed = time.time() - self.embed_started_at
+        if self.records_embedded == 0 or elapsed <= 0:
+            return None
+        rate = self.records_embedded / elapsed
+        return (self.records_total - self.records_embedded) / rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        eta = self.eta_seconds()
+        return {
+            "job_id": self.job_id,
+            "collection": self.collection,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "records_total": self.records_total,
+            "records_parsed": self.records_parsed,
+            "records_embedded": self.records_embedded,
+            "records_indexed": self.records_indexed,
+            "throughput_records_per_sec": round(self.throughput(), 2),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "error": self.error,
+        }
+
+
+class IngestJobManager:
+    """
+    Runs ingest jobs on a bounded worker pool.
+    - At most INGEST_WORKERS jobs run at once; up to INGEST_MAX_QUEUED wait
+    - Each job stages a new index; searches hit the previous one until commit
+    - The last INGEST_JOB_HISTORY jobs are kept for status queries
+    """
+
+    def __init__(self, max_workers: int, max_queued: int, chunk_size: int, history: int):
+        self.max_queued = max_queued
+        self.chunk_size = chunk_size
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- Public API ----------
+
+    def submit(self, file_path: str, filename: str, collection: str, profile_id: Optional[str] = None) -> IngestJob:
+        """Queue an uploaded file for ingestion. The job owns (and deletes) file_path; with profile_id it runs under cProfile."""
+        with self._lock:
+            queued = sum(1 for j in self._jobs.values() if j.status == "queued")
+            if queued >= self.max_queued:
+                raise IngestQueueFullError(f"Ingest queue is full ({queued} jobs waiting)")
+            job = IngestJob(file_path, filename, collection, profile_id)
+            self._jobs[job.job_id] = job
+            self._trim_history()
+        self._executor.submit(self._run_profiled if profile_id else self._run, job)
+        logger.info(f"Queued ingest job {job.job_id} for {filename} (collection={collection})")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """Request cancellation; a running job stops at the next chunk boundary."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        logger.info(f"Cancellation requested for ingest job {job_id}")
+        return job
+
+    # ---------- Worker ----------
+
+    def _trim_history(self):
+        finished = [jid for jid, j in self._jobs.items() if j.finished]
+        for jid in finished[: max(0, len(self._jobs) - self.history)]:
+            del self._jobs[jid]
+
+    def _check_cancelled(self, job: IngestJob):
+        if job.cancel_event.is_set():
+            raise IngestCancelled()
+
+    def _run_profiled(self, job: IngestJob):
+        with request_profiler.capture(f"ingest job {job.job_id} ({job.filename})", "ingest", job.profile_id):
+            self._run(job)
+
+    def _run(self, job: IngestJob):
+        if job.cancel_event.is_set():
+            self._cleanup(job)
+            return
+
+        job.status = "running"
+        job.started_at = time.time()
+        builder = None
+        try:
+            job.stage = "parsing"
+            # Parallel mode needs enough texts per chunk to keep every worker busy
+            chunk_size = self.chunk_size * max(1, settings.EMBED_WORKERS)
+            streaming = DataIngestionService.is_columnar(job.file_path)
+            if streaming:
+                # Parquet/Arrow: record batches are read and cleaned column-wise while embedding
+                total, arrow_batches = DataIngestionService.open_columnar(job.file_path, settings.INGEST_ARROW_BATCH_ROWS)
+                job.records_total = total or 0
+                batches = (DataIngestionService.clean_arrow_batch(batch) for batch in arrow_batches)
+            else:
+                records = DataIngestionService.load_data(job.file_path)
+                job.records_parsed = job.records_total = len(records)
+                if not records:
+                    raise ValueError("No records found in file")
+                batches = (
+                    ([record.get('searchable_text', '') for record in chunk], chunk)
+                    for chunk in (records[start:start + chunk_size] for start in range(0, len(records), chunk_size))
+                )
+            self._check_cancelled(job)
+
+            with collection_manager.pinned(job.collection, create=True) as store:
+                job.stage = "embedding"
+                job.embed_started_at = time.time()
+                # Embed with the collection's model (it may have been migrated off EMBEDDING_MODEL)
+                embedder = get_embedding_service(store.embedding_model)
+                builder = store.begin_rebuild(embedder.get_dimension(), embedder.model_name)
+                for texts, payloads in batches:
+                    if streaming:
+                        job.records_parsed += len(texts)
+                        job.records_total = max(job.records_total, job.records_parsed)
+                    vectors = []
+                    for start in range(0, len(texts), chunk_size):
+                        self._check_cancelled(job)
+                        chunk = texts[start:start + chunk_size]
+                        # Token-budget batches, each taking the model gate on its own (see embed_batch_parallel)
+                        embeddings = embedder.embed_batch_parallel(chunk)
+                        vectors.append(np.asarray(embeddings, dtype="float32"))
+                        job.records_embedded += len(chunk)
+                    if vectors:
+                        job.records_indexed += builder.add(np.concatenate(vectors), payloads)
+                if not job.records_indexed:
+                    raise ValueError("No records found in file")
+
+                self._check_cancelled(job)
+                job.stage = "committing"
+                builder.commit()
+                builder = None
+
+            job.status = "completed"
+            logger.info(f"Ingest job {job.job_id} indexed {job.records_indexed} records into '{job.collection}'")
+            run_post_commit(job.collection)
+
+        except IngestCancelled:
+            job.status = "cancelled"
+            logger.info(f"Ingest job {job.job_id} cancelled after {job.records_indexed} records")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Ingest job {job.job_id} failed: {str(e)}")
+        finally:
+            if builder is not None:
+                try:
+                    builder.abort()
+                except Exception as e:
+                    logger.warning(f"Failed to abort staged index for job {job.job_id}: {e}")
+            job.finished_at = time.time()
+            self._cleanup(job)
+
+    def _cleanup(self, job: IngestJob):
+        if job.file_path and os.path.exists(job.file_path):
+            try:
+                os.unlink(job.file_path)
+            except Exception as e:
+                logger.warning(f"Failed to delete temporary file: {e}")
+
+
+# Global instance
+ingest_jobs = IngestJobManager(
+    max_workers=settings.INGEST_WORKERS,
+    max_queued=settings.INGEST_MAX_QUEUED,
+    chunk_size=settings.INGEST_CHUNK_SIZE,
+    history=settings.INGEST_JOB_HISTORY,
+)
@@ -0,0 +1,270 @@
+"""Incremental Jira sync: pull issues changed since a watermark into a collection"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.collection_manager import collection_manager
+from app.services.data_ingestion import DataIngestionService
+from app.services.embeddings import get_embedding_service
+from app.services.post_commit import run_post_commit
+from app.services.vector_store import EmbeddingModelChanged
+from app.utils.logger import setup_logger
+
+import json
+import math
+import os
+import random
+import threading
+import time
+import requests
+
+logger = setup_logger(__name__)
+
+# Only the fields _clean_record and the metrics need
+JIRA_FIELDS = [
+    "summary", "description", "status", "priority", "project", "issuetype",
+    "components", "assignee", "reporter", "created", "resolutiondate", "labels", "updated",
+]
+
+
+def _name(value: Any, attr: str = "name") -> Optional[str]:
+    """Jira returns objects like {"name": "Open"} for most select fields."""
+    if isinstance(value, dict):
+        return value.get(attr)
+    return value
+
+
+def _parse_jira_time(value: str) -> datetime:
+    """Parse Jira timestamps like 2024-05-01T10:15:30.000+0000."""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+
+
+class JiraSyncService:
+    """
+    Pulls issues updated since the stored watermark from a Jira-compatible REST API.
+    - The lower bound is sent as a relative JQL date ("-90m"), which Jira
+      resolves against its own clock; absolute JQL dates are read in the API
+      user's profile timezone and would shift by its UTC offset
+    - Pages are fetched in order of (updated, key), each re-querying from the
+      newest `updated` seen so far, so an issue updated mid-sync moves to a
+      later page instead of shifting a startAt offset past another issue
+    - Overlapping pages (minute-granular bounds, JIRA_SYNC_OVERLAP_MINUTES) are
+      deduplicated by issue key, keeping the newest version
+    - 429/503 responses back off (Retry-After when given, else exponential with jitter)
+    - Issues are flattened through DataIngestionService._clean_record and
+      upserted by ticket_id, so only changed tickets are re-embedded
+    - The watermark advances to the newest `updated` seen, per collection
+    """
+
+    def __init__(self):
+        self.base_url = settings.JIRA_BASE_URL.rstrip("/")
+        self.session = requests.Session()  # keep-alive connection reused across pages and syncs
+        if settings.JIRA_EMAIL and settings.JIRA_API_TOKEN:
+            self.session.auth = (settings.JIRA_EMAIL, settings.JIRA_API_TOKEN)
+        elif settings.JIRA_API_TOKEN:
+            self.session.headers["Authorization"] = f"Bearer {settings.JIRA_API_TOKEN}"
+        self.session.headers["Accept"] = "application/json"
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    # ---------- State ----------
+
+    def _state_path(self, collection: str) -> str:
+        return os.path.join(settings.DATA_DIR, "sync", f"{collection}.json")
+
+    def get_state(self, collection: str) -> Dict[str, Any]:
+        path = self._state_path(collection)
+        state: Dict[str, Any] = {"collection": collection, "watermark": None}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state.update(json.load(f))
+        state["running"] = self.is_running(collection)
+        return state
+
+    def _save_state(self, collection: str, state: Dict[str, Any]):
+        path = self._state_path(collection)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        state = {k: v for k, v in state.items() if k != "running"}
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    # ---------- HTTP ----------
+
+    def _get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET /rest/api/2/search with rate-limit aware retries."""
+        url = f"{self.base_url}/rest/api/2/search"
+        for attempt in range(settings.JIRA_SYNC_MAX_RETRIES + 1):
+            try:
+                response = self.session.get(url, params=params, timeout=30)
+            except requests.exceptions.ConnectionError as e:
+                if attempt == settings.JIRA_SYNC_MAX_RETRIES:
+                    raise
+                delay = min(60.0, 2 ** attempt) + random.random()
+                logger.warning(f"Jira connection error ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code in (429, 503) and attempt < settings.JIRA_SYNC_MAX_RETRIES:
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+                else:
+                    delay = min(60.0, 2 ** attempt) + random.random()
+                logger.warning(f"Jira rate limited (HTTP {response.status_code}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response.json()
+        raise RuntimeError("Jira request retries exhausted")
+
+    def _jql(self, since: Optional[datetime], now: Optional[datetime] = None) -> str:
+        """
+        Issues updated at or after `since`, oldest first. The bound is rounded
+        down to whole minutes before now, so it never excludes `since` itself.
+        """
+        clauses = []
+        if settings.JIRA_SYNC_JQL:
+            clauses.append(f"({settings.JIRA_SYNC_JQL})")
+        if since is not None:
+            now = now or datetime.now(timezone.utc)
+            minutes = max(1, math.ceil((now - since).total_seconds() / 60))
+            clauses.append(f'updated >= "-{minutes}m"')
+        jql = " AND ".join(clauses)
+        return f"{jql} ORDER BY updated ASC, key ASC" if jql else "ORDER BY updated ASC, key ASC"
+
+    def fetch_updated_since(self, watermark: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch all issues changed since the watermark (minus the overlap), one
+        version per key. Each page re-queries from the newest `updated` seen;
+        only when a whole page shares that timestamp does it page by offset.
+        """
+        page_size = settings.JIRA_SYNC_PAGE_SIZE
+        since = None
+        if watermark:
+            since = _parse_jira_time(watermark) - timedelta(minutes=settings.JIRA_SYNC_OVERLAP_MINUTES)
+        issues: Dict[str, Dict[str, Any]] = {}
+        start_at = 0
+        while True:
+            page = self._get({
+                "jql": self._jql(since), "fields": ",".join(JIRA_FIELDS),
+                "maxResults": page_size, "startAt": start_at,
+            }).get("issues", [])
+            for issue in page:
+                key = issue.get("key")
+                seen = issues.get(key)
+                if seen is None or self._updated(issue) >= self._updated(seen):
+                    issues[key] = issue
+            if len(page) < page_size:
+                break
+            newest = max(self._updated(issue) for issue in page)
+            if since is None or newest > since:
+                since, start_at = newest, 0
+            else:
+                start_at += len(page)
+        logger.info(f"Fetched {len(issues)} issues changed since {watermark or 'the beginning'}")
+        return list(issues.values())
+
+    @staticmethod
+    def _updated(issue: Dict[str, Any]) -> datetime:
+        value = (issue.get("fields") or {}).get("updated")
+        return _parse_jira_time(value) if value else datetime.min.replace(tzinfo=timezone.utc)
+
+    # ---------- Flattening ----------
+
+    @staticmethod
+    def flatten_issue(issue: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a Jira REST issue onto the flat export columns used by ingestion."""
+        fields = issue.get("fields") or {}
+        components = fields.get("components") or []
+        labels = fields.get("labels") or []
+        record = {
+            "ticket_id": issue.get("key"),
+            "summary": fields.get("summary"),
+            "description": fields.get("description"),
+            "status": _name(fields.get("status")),
+            "priority": _name(fields.get("priority")),
+            "project": _name(fields.get("project"), "key"),
+            "issue_type": _name(fields.get("issuetype")),
+            "component": ", ".join(c.get("name", "") for c in components) or None,
+            "assignee": _name(fields.get("assignee"), "displayName"),
+            "reporter": _name(fields.get("reporter"), "displayName"),
+            "created_date": fields.get("created"),
+            "resolved_date": fields.get("resolutiondate"),
+            "labels": ",".join(labels) or None,
+            "updated": fields.get("updated"),
+        }
+        return DataIngestionService._clean_record(record)
+
+    # ---------- Sync ----------
+
+    def _upsert(self, store, texts: List[str], records: List[Dict[str, Any]]) -> int:
+        embedder = get_embedding_service(store.embedding_model)
+        # Token-budget batches, each taking the model gate on its own, so a large
+        # fetch doesn't hold one BULK slot for its whole duration (as ingest does)
+        embeddings = embedder.embed_batch_parallel(texts)
+        return store.upsert_records(embeddings, records, model=embedder.model_name)
+
+    def sync(self, collection: str) -> Dict[str, Any]:
+        """Run one incremental sync for a collection and advance its watermark."""
+        if not self.base_url:
+            raise RuntimeError("JIRA_BASE_URL is not configured")
+
+        state = self.get_state(collection)
+        started = time.time()
+        issues = self.fetch_updated_since(state.get("watermark"))
+        records = [self.flatten_issue(issue) for issue in issues]
+        records = [r for r in records if r.get("ticket_id")]
+
+        count = 0
+        if records:
+            texts = [r.get("searchable_text", "") for r in records]
+            with collection_manager.pinned(collection, create=True) as store:
+                try:
+                    count = self._upsert(store, texts, records)
+                except EmbeddingModelChanged:
+                    # A migration cut over while we were embedding; redo with the new model
+                    count = self._upsert(store, texts, records)
+
+        updated = [r["updated"] for r in records if r.get("updated")]
+        if updated:
+            state["watermark"] = max(updated, key=_parse_jira_time)
+        state.update({
+            "last_run_at": datetime.now(timezone.utc).isoformat(),
+            "last_fetched": len(issues),
+            "last_upserted": count,
+            "last_duration_seconds": round(time.time() - started, 2),
+            "last_error": None,
+        })
+        self._save_state(collection, state)
+        logger.info(f"Jira sync for '{collection}' upserted {count} tickets (watermark {state['watermark']})")
+        if count:
+            run_post_commit(collection)
+        return state
+
+    def is_running(self, collection: str) -> bool:
+        thread = self._threads.get(collection)
+        return thread is not None and thread.is_alive()
+
+    def start(self, collection: str) -> bool:
+        """Run a sync in the background; returns False if one is already running."""
+        with self._lock:
+            if self.is_running(collection):
+                return False
+            thread = threading.Thread(target=self._run, args=(collection,), daemon=True, name=f"jira-sync-{collection}")
+            self._threads[collection] = thread
+            thread.start()
+            return True
+
+    def _run(self, collection: str):
+        try:
+            self.sync(collection)
+        except Exception as e:
+            logger.error(f"Jira sync for '{collection}' failed: {str(e)}")
+            state = self.get_state(collection)
+            state.update({"last_run_at": datetime.now(timezone.utc).isoformat(), "last_error": str(e)})
+            self._save_state(collection, state)
+
+
+# Global instance
+jira_sync = JiraSyncService()
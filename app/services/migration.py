@@ -0,0 +1,348 @@
+"""Background re-embedding of a collection with a new embedding model"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.collection_manager import collection_manager
+from app.services.embeddings import get_embedding_service, release_embedding_service
+from app.services.post_commit import run_post_commit
+from app.services.payload_store import payload_column, ticket_key
+from app.services.vector_store import VectorStoreService
+from app.utils.logger import setup_logger
+
+import json
+import os
+import random
+import shutil
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+ACTIVE_PHASES = ("loading_model", "embedding", "catching_up", "ready", "cutting_over")
+
+
+class Migration:
+    """Progress of one collection's migration (persisted to migration.json)"""
+
+    def __init__(self, collection: str, model: str, from_model: str, dual_serve: float, auto_cutover: bool):
+        self.collection = collection
+        self.model = model
+        self.from_model = from_model
+        self.dual_serve = dual_serve
+        self.auto_cutover = auto_cutover
+        self.phase = "loading_model"
+        self.records_total = 0
+        self.records_embedded = 0
+        self.records_caught_up = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.shadow: Optional[VectorStoreService] = None
+        self.synced_generation = 0  # live generation the shadow last caught up with
+        self.cancel_event = threading.Event()
+        self.cutover_event = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "collection": self.collection,
+            "phase": self.phase,
+            "running": self.phase in ACTIVE_PHASES,
+            "model": self.model,
+            "from_model": self.from_model,
+            "dual_serve": self.dual_serve,
+            "auto_cutover": self.auto_cutover,
+            "records_total": self.records_total,
+            "records_embedded": self.records_embedded,
+            "records_caught_up": self.records_caught_up,
+            "rate_per_second": round(self.records_embedded / elapsed, 2) if elapsed > 0 else 0.0,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "finished_at": datetime.fromtimestamp(self.finished_at, timezone.utc).isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+
+class MigrationCancelled(Exception):
+    pass
+
+
+class EmbeddingMigrator:
+    """
+    Moves a collection to a new embedding model without search downtime.
+    - Re-embeds the stored payloads' searchable_text with the new model into a
+      shadow store next to the collection, throttled to MIGRATION_MAX_RATE and
+      yielding the model gate to interactive queries
+    - Tickets written to the live collection meanwhile (ingest, Jira sync) are
+      caught up into the shadow from the store's write log, so nothing is lost
+      (a full payload diff only if the log can't cover the gap)
+    - Optionally dual-serves: once the shadow is complete, a `dual_serve`
+      fraction of queries is answered from it with the new model
+    - Cutover holds the collection's write lock for a final catch-up and then
+      publishes the shadow as the next generation; readers switch with a
+      single reference swap
+    Not available for sharded collections.
+    """
+
+    def __init__(self):
+        self._migrations: Dict[str, Migration] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+
+    # ---------- Persistence ----------
+
+    def _path(self, collection: str) -> str:
+        return os.path.join(collection_manager.artifacts_dir(collection), "migration.json")
+
+    def _save(self, migration: Migration):
+        path = self._path(migration.collection)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(migration.to_dict(), f)
+        os.replace(path + ".tmp", path)
+
+    def status(self, collection: str) -> Optional[Dict[str, Any]]:
+        """Current or last migration of a collection."""
+        migration = self._migrations.get(collection)
+        if migration is not None:
+            return migration.to_dict()
+        path = self._path(collection)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ---------- Control ----------
+
+    def is_running(self, collection: str) -> bool:
+        thread = self._threads.get(collection)
+        return thread is not None and thread.is_alive()
+
+    def start(self, collection: str, model: str, dual_serve: float = 0.0, auto_cutover: bool = True) -> Dict[str, Any]:
+        """Start migrating a collection to `model`; raises ValueError if it can't."""
+        if collection_manager.sharded:
+            raise ValueError("Embedding migration is not supported for sharded collections")
+        if not 0.0 <= dual_serve <= 1.0:
+            raise ValueError("dual_serve must be between 0 and 1")
+        if self.is_running(collection):
+            raise ValueError(f"A migration of '{collection}' is already running")
+        store = collection_manager.get(collection)
+        if store.embedding_model == model:
+            raise ValueError(f"Collection '{collection}' already uses {model}")
+        if not store.snapshot().count:
+            raise ValueError(f"Collection '{collection}' is empty; nothing to migrate")
+
+        migration = Migration(collection, model, store.embedding_model, dual_serve, auto_cutover)
+        self._migrations[collection] = migration
+        self._save(migration)
+        thread = threading.Thread(target=self._run, args=(migration,), daemon=True)
+        self._threads[collection] = thread
+        thread.start()
+        logger.info(f"Migrating '{collection}' from {migration.from_model} to {model}")
+        return migration.to_dict()
+
+    def cutover(self, collection: str) -> bool:
+        """Ask a migration waiting in the ready phase to cut over now."""
+        migration = self._migrations.get(collection)
+        if migration is None or migration.phase not in ACTIVE_PHASES:
+            return False
+        migration.cutover_event.set()
+        return True
+
+    def cancel(self, collection: str) -> bool:
+        """Abandon a running migration; the collection keeps its current model."""
+        migration = self._migrations.get(collection)
+        if migration is None or migration.phase not in ACTIVE_PHASES or migration.phase == "cutting_over":
+            return False
+        migration.cancel_event.set()
+        return True
+
+    def serving_store(self, collection: str) -> Optional[VectorStoreService]:
+        """The shadow store if this query is sampled for dual-serving, else None."""
+        migration = self._migrations.get(collection)
+        if migration is None or migration.phase != "ready" or migration.shadow is None:
+            return None
+        return migration.shadow if random.random() < migration.dual_serve else None
+
+    # ---------- Migration ----------
+
+    def _check_cancelled(self, migration: Migration):
+        if migration.cancel_event.is_set():
+            raise MigrationCancelled()
+
+    def _run(self, migration: Migration):
+        shadow_dir = None
+        outcome = "failed"
+        try:
+            with collection_manager.pinned(migration.collection) as store:
+                embedder = get_embedding_service(migration.model)
+
+                source = store.snapshot()
+                migration.synced_generation = source.number
+                migration.records_total = source.count
+                migration.phase = "embedding"
+                self._save(migration)
+
+                shadow_dir = os.path.join(os.path.dirname(store.index_path), "migration-shadow")
+                shutil.rmtree(shadow_dir, ignore_errors=True)
+                shadow = VectorStoreService(
+                    index_path=os.path.join(shadow_dir, "faiss.index"),
+                    payloads_path=os.path.join(shadow_dir, "faiss_payloads.json"),
+                    name=f"{migration.collection}-migration",
+                    storage=store.storage,
+                )
+                migrated = self._build_shadow(migration, source, shadow, embedder)
+
+                migration.phase = "catching_up"
+                self._save(migration)
+                self._catch_up(migration, store, shadow, embedder, migrated)
+                migration.shadow = shadow
+                migration.phase = "ready"
+                self._save(migration)
+
+                # Dual-serve / wait for a manual cutover, keeping the shadow current
+                deadline = None
+                if migration.auto_cutover:
+                    deadline = time.time() + (settings.MIGRATION_DUAL_SERVE_SECONDS if migration.dual_serve > 0 else 0)
+                while not migration.cutover_event.is_set() and (deadline is None or time.time() < deadline):
+                    self._check_cancelled(migration)
+                    migration.cutover_event.wait(settings.MIGRATION_CATCHUP_INTERVAL)
+                    self._catch_up(migration, store, shadow, embedder, migrated)
+                self._check_cancelled(migration)
+
+                migration.phase = "cutting_over"
+                self._save(migration)
+                with store._write_lock:
+                    # Writers wait for the final catch-up; searches keep using the old generation
+                    self._catch_up(migration, store, shadow, embedder, migrated)
+                    store._adopt_locked(shadow)
+                migration.shadow = None
+
+            outcome = "completed"
+            logger.info(f"Migration of '{migration.collection}' to {migration.model} completed")
+            self._release_unused(migration.from_model)
+            run_post_commit(migration.collection)
+
+        except MigrationCancelled:
+            outcome = "cancelled"
+            logger.info(f"Migration of '{migration.collection}' cancelled")
+        except Exception as e:
+            migration.error = str(e)
+            logger.error(f"Migration of '{migration.collection}' failed: {str(e)}")
+        finally:
+            migration.shadow = None
+            if outcome != "completed":
+                self._release_unused(migration.model)
+            if shadow_dir:
+                shutil.rmtree(shadow_dir, ignore_errors=True)
+            # Terminal phase only once cleanup is done, so "not running" means a new start is safe
+            migration.phase = outcome
+            migration.finished_at = time.time()
+            self._save(migration)
+
+    def _build_shadow(self, migration: Migration, source, shadow: VectorStoreService,
+                      embedder) -> Dict[str, Dict[str, Any]]:
+        """
+        Re-embed every live payload of a generation into a staged rebuild of the shadow
+        and publish it; returns the migrated payloads by ticket key.
+        """
+        payloads = source.live_payloads()
+        migration.synced_generation = source.number
+        migration.records_total = len(payloads)
+        migration.records_embedded = 0
+        builder = shadow.begin_rebuild(embedder.get_dimension(), migration.model)
+        try:
+            migrated: Dict[str, Dict[str, Any]] = {}
+            started = time.time()
+            batch_size = settings.MIGRATION_BATCH_SIZE
+            for start in range(0, len(payloads), batch_size):
+                self._check_cancelled(migration)
+                chunk = payloads[start:start + batch_size]
+                builder.add(embedder.embed_batch([p.get("searchable_text", "") for p in chunk]), chunk)
+                for p in chunk:
+                    if p.get("ticket_id") is not None:
+                        migrated[ticket_key(p["ticket_id"])] = p
+                migration.records_embedded += len(chunk)
+                if migration.records_embedded % (batch_size * 50) < batch_size:
+                    self._save(migration)
+                if settings.MIGRATION_MAX_RATE > 0:
+                    ahead = migration.records_embedded / settings.MIGRATION_MAX_RATE - (time.time() - started)
+                    if ahead > 0:
+                        migration.cancel_event.wait(ahead)
+            builder.commit()
+        except BaseException:
+            builder.abort()
+            raise
+        return migrated
+
+    def _catch_up(self, migration: Migration, store, shadow: VectorStoreService, embedder,
+                  migrated: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Bring the shadow in line with the live collection: re-embed new/changed tickets, drop removed ones.
+        Only the keys written since the last pass are looked at; nothing is read if the
+        live generation hasn't moved. Without the write log, payloads are diffed by key,
+        or the shadow is rebuilt if the collection holds rows without a ticket_id
+        (those can't be matched to their shadow rows).
+        """
+        live = store.snapshot()
+        if live.number == migration.synced_generation:
+            return 0
+        # Read after the snapshot: keys written in between are re-read next pass, never missed
+        touched = store.changes_since(migration.synced_generation)
+        if touched is None:
+            if any(key is None for key in payload_column(live.live_payloads(), "ticket_id")):
+                logger.warning(f"Write log of '{migration.collection}' unavailable and it has rows without a "
+                               f"ticket_id; re-embedding the shadow")
+                migrated.clear()
+                migrated.update(self._build_shadow(migration, live, shadow, embedder))
+                migration.records_caught_up += migration.records_total
+                return migration.records_total
+            changed, removed = self._diff_all(live, migrated)
+        else:
+            changed, removed = [], []
+            for key in touched:
+                idx = live.row_of(key)
+                if idx is not None:
+                    changed.append(live.payload(idx))
+                elif key in migrated:
+                    removed.append(key)
+
+        if removed:
+            shadow.delete_records(removed)
+            for key in removed:
+                del migrated[key]
+        if changed:
+            vectors = embedder.embed_batch([p.get("searchable_text", "") for p in changed])
+            shadow.upsert_records(vectors, changed)
+            migrated.update((ticket_key(p["ticket_id"]), p) for p in changed)
+        migration.synced_generation = live.number
+        migration.records_caught_up += len(changed) + len(removed)
+        return len(changed) + len(removed)
+
+    @staticmethod
+    def _diff_all(live, migrated: Dict[str, Dict[str, Any]]):
+        """
+        Changed payloads and removed keys by comparing every live payload (write log
+        unavailable); the caller rebuilds instead when there are rows without a key.
+        """
+        changed: List[Dict[str, Any]] = []
+        live_keys = set()
+        for p in live.live_payloads():
+            key = p.get("ticket_id")
+            if key is None:
+                continue
+            key = ticket_key(key)
+            live_keys.add(key)
+            previous = migrated.get(key)
+            if previous is not p and previous != p:
+                changed.append(p)
+        removed = [key for key in migrated if key not in live_keys]
+        return changed, removed
+
+    def _release_unused(self, model: str):
+        """Free a model's memory if no resident collection uses it any more."""
+        in_use = {c.get("embedding_model") for c in collection_manager.list_collections() if c.get("resident")}
+        if model not in in_use:
+            release_embedding_service(model)
+
+
+# Global instance
+embedding_migrator = EmbeddingMigrator()
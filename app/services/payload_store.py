@@ -0,0 +1,484 @@
+"""Compact, column-oriented in-memory payload storage for vector store generations"""
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import re
+import sys
+import numpy as np
+import pandas as pd
+
+# A string column is dictionary-encoded when values repeat on average, or there are few of them
+CATEGORY_MIN_DISTINCT = 255
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2})?$")
+_ROWS_PER_CHUNK = 4096
+
+
+def _code_dtype(count: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if count <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _offset_dtype(total: int):
+    return np.uint32 if total < 2 ** 32 else np.int64
+
+
+class _TextColumn:
+    """Mostly-unique strings as one UTF-8 buffer plus row offsets."""
+
+    def __init__(self, buffer: bytes, offsets: np.ndarray, nulls: Optional[np.ndarray]):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.nulls = nulls
+
+    @property
+    def size(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, i: int) -> Any:
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def values(self, start: int, stop: int) -> List[Any]:
+        offsets = self.offsets[start:stop + 1].tolist()
+        chunk = self.buffer[offsets[0]:offsets[-1]]
+        base = offsets[0]
+        out = [chunk[a - base:b - base].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+        if self.nulls is not None:
+            for i in np.flatnonzero(self.nulls[start:stop]):
+                out[i] = None
+        return out
+
+    def take(self, rows: np.ndarray) -> "_TextColumn":
+        if len(rows) == 0:
+            return _TextColumn(b"", np.zeros(1, dtype=np.uint32), None)
+        starts = self.offsets[rows].astype(np.int64)
+        ends = self.offsets[rows + 1].astype(np.int64)
+        # Copy runs of consecutive rows as single slices (deletes keep almost everything in order)
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        run_starts = np.concatenate([[0], breaks])
+        run_ends = np.concatenate([breaks, [len(rows)]])
+        buffer = b"".join(self.buffer[starts[a]:ends[b - 1]] for a, b in zip(run_starts.tolist(), run_ends.tolist()))
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=offsets[1:])
+        nulls = self.nulls[rows] if self.nulls is not None else None
+        return _TextColumn(buffer, offsets.astype(_offset_dtype(len(buffer))), nulls)
+
+    def concat(self, other: "_TextColumn") -> "_TextColumn":
+        buffer = self.buffer + other.buffer
+        offsets = np.concatenate([
+            self.offsets[:-1].astype(np.int64),
+            other.offsets.astype(np.int64) + len(self.buffer),
+        ]).astype(_offset_dtype(len(buffer)))
+        nulls = None
+        if self.nulls is not None or other.nulls is not None:
+            nulls = np.concatenate([
+                self.nulls if self.nulls is not None else np.zeros(len(self.offsets) - 1, dtype=bool),
+                other.nulls if other.nulls is not None else np.zeros(len(other.offsets) - 1, dtype=bool),
+            ])
+        return _TextColumn(buffer, offsets, nulls)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes + (self.nulls.nbytes if self.nulls is not None else 0)
+
+
+class _CategoryColumn:
+    """
+    Dictionary-encoded strings: one small int code per row (-1 = None) plus
+    the distinct values, themselves packed in a _TextColumn. Labels are
+    decoded per call rather than kept as Python strings, so no small objects
+    outlive the build and pin the allocator's arenas.
+    """
+
+    def __init__(self, codes: np.ndarray, labels: "_TextColumn"):
+        self.codes = codes
+        self.labels = labels
+
+    def get(self, i: int) -> Any:
+        code = self.codes[i]
+        return None if code < 0 else self.labels.get(int(code))
+
+    def values(self, start: int, stop: int) -> List[Any]:
+        uniques, inverse = np.unique(self.codes[start:stop], return_inverse=True)
+        lookup = np.array([None if code < 0 else self.labels.get(code) for code in uniques.tolist()], dtype=object)
+        return lookup[inverse.reshape(-1)].tolist()
+
+    def take(self, rows: np.ndarray) -> "_CategoryColumn":
+        return _CategoryColumn(self.codes[rows], self.labels)
+
+    def concat(self, other: "_CategoryColumn") -> "_CategoryColumn":
+        labels = self.labels.values(0, self.labels.size)
+        positions = {label: i for i, label in enumerate(labels)}
+        added = []
+        remap = np.empty(other.labels.size + 1, dtype=np.int64)
+        remap[-1] = -1
+        for i, label in enumerate(other.labels.values(0, other.labels.size)):
+            if label not in positions:
+                positions[label] = len(positions)
+                added.append(label)
+            remap[i] = positions[label]
+        dtype = _code_dtype(len(positions))
+        codes = np.concatenate([self.codes.astype(dtype), remap[other.codes].astype(dtype)])
+        return _CategoryColumn(codes, self.labels.concat(_encode_text(added)) if added else self.labels)
+
+    @property
+    def distinct(self) -> int:
+        return self.labels.size
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.labels.nbytes
+
+
+class _ArrayColumn:
+    """
+    Numbers and timestamps in a numpy array with a null mask.
+    `fmt` is None for int64/float64 values, or "datetime"/"date" for strings
+    stored as datetime64[s] and rendered back in the same layout.
+    """
+
+    def __init__(self, data: np.ndarray, nulls: Optional[np.ndarray], fmt: Optional[str] = None):
+        self.data = data
+        self.nulls = nulls
+        self.fmt = fmt
+
+    def _render(self, data: np.ndarray) -> List[Any]:
+        if self.fmt is None:
+            return data.tolist()
+        if self.fmt == "date":
+            return np.datetime_as_string(data.astype("datetime64[D]"), unit="D").tolist()
+        return [s.replace("T", " ") for s in np.datetime_as_string(data, unit="s").tolist()]
+
+    def get(self, i: int) -> Any:
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        value = self.data[i].item()
+        if self.fmt is None:
+            return value
+        if isinstance(value, datetime):  # datetime64 outside datetime's range comes back as an int
+            return value.date().isoformat() if self.fmt == "date" else value.isoformat(sep=" ")
+        return self._render(self.data[i:i + 1])[0]
+
+    def values(self, start: int, stop: int) -> List[Any]:
+        out = self._render(self.data[start:stop])
+        if self.nulls is not None:
+            for i in np.flatnonzero(self.nulls[start:stop]):
+                out[i] = None
+        return out
+
+    def take(self, rows: np.ndarray) -> "_ArrayColumn":
+        return _ArrayColumn(self.data[rows], self.nulls[rows] if self.nulls is not None else None, self.fmt)
+
+    def concat(self, other: "_ArrayColumn") -> "_ArrayColumn":
+        nulls = None
+        if self.nulls is not None or other.nulls is not None:
+            nulls = np.concatenate([
+                self.nulls if self.nulls is not None else np.zeros(len(self.data), dtype=bool),
+                other.nulls if other.nulls is not None else np.zeros(len(other.data), dtype=bool),
+            ])
+        return _ArrayColumn(np.concatenate([self.data, other.data]), nulls, self.fmt)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.nulls.nbytes if self.nulls is not None else 0)
+
+
+class _ObjectColumn:
+    """Fallback for mixed or nested values (lists, dicts, bools, mixed int/float)."""
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+
+    def get(self, i: int) -> Any:
+        return self.items[i]
+
+    def values(self, start: int, stop: int) -> List[Any]:
+        return self.items[start:stop]
+
+    def take(self, rows: np.ndarray) -> "_ObjectColumn":
+        return _ObjectColumn([self.items[i] for i in rows.tolist()])
+
+    def concat(self, other: "_ObjectColumn") -> "_ObjectColumn":
+        return _ObjectColumn(self.items + other.items)
+
+    @property
+    def nbytes(self) -> int:
+        return 8 * len(self.items) + sum(sys.getsizeof(v) for v in self.items if v is not None)
+
+
+_Column = Union[_CategoryColumn, _TextColumn, _ArrayColumn, _ObjectColumn]
+
+
+def _nulls(values: List[Any]) -> Optional[np.ndarray]:
+    mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    return mask if mask.any() else None
+
+
+def _encode_dates(values: List[Any], nulls: Optional[np.ndarray]) -> Optional[_ArrayColumn]:
+    """datetime64 column if every string is an exact "YYYY-MM-DD[ HH:MM:SS]" that round-trips."""
+    present = [v for v in values if v is not None]
+    lengths = set(map(len, present))
+    if len(lengths) != 1 or not all(_DATE_RE.match(v) for v in present):
+        return None
+    try:
+        data = np.array([v if v is not None else "1970-01-01" for v in values], dtype="datetime64[s]")
+    except ValueError:
+        return None
+    column = _ArrayColumn(data, nulls, "date" if lengths == {10} else "datetime")
+    if column.values(0, len(values)) != list(values):
+        return None
+    return column
+
+
+def _is_category(distinct: int, size: int) -> bool:
+    return distinct <= CATEGORY_MIN_DISTINCT or distinct * 2 <= size
+
+
+def _encode_category(values: List[Any]) -> _CategoryColumn:
+    codes, uniques = pd.factorize(np.array(values, dtype=object))
+    return _CategoryColumn(codes.astype(_code_dtype(len(uniques))), _encode_text(list(uniques)))
+
+
+def _encode_text(values: List[Any]) -> _TextColumn:
+    encoded = [v.encode("utf-8") if v is not None else b"" for v in values]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    buffer = b"".join(encoded)
+    return _TextColumn(buffer, offsets.astype(_offset_dtype(len(buffer))), _nulls(values))
+
+
+def _encode_numbers(values: List[Any], types: set) -> Optional[_ArrayColumn]:
+    if types == {int}:
+        try:
+            return _ArrayColumn(np.array([v if v is not None else 0 for v in values], dtype=np.int64), _nulls(values))
+        except OverflowError:
+            return None
+    if types == {float}:
+        return _ArrayColumn(np.array([v if v is not None else 0.0 for v in values], dtype=np.float64), _nulls(values))
+    return None
+
+
+def _encode(values: List[Any]) -> _Column:
+    """Pick the most compact column type that reproduces `values` exactly."""
+    types = set(map(type, values)) - {type(None)}
+    if types == {str}:
+        distinct = len(set(values))
+        if distinct <= CATEGORY_MIN_DISTINCT:
+            return _encode_category(values)
+        dates = _encode_dates(values, _nulls(values))
+        if dates is not None:
+            return dates
+        return _encode_category(values) if _is_category(distinct, len(values)) else _encode_text(values)
+    if not types:
+        return _CategoryColumn(np.full(len(values), -1, dtype=np.int8), _encode_text([]))
+    numbers = _encode_numbers(values, types)
+    return numbers if numbers is not None else _ObjectColumn(list(values))
+
+
+def _encode_like(column: _Column, values: List[Any]) -> Optional[_Column]:
+    """Encode `values` in the same layout as `column` so the two can be concatenated; None if they don't fit."""
+    types = set(map(type, values)) - {type(None)}
+    if isinstance(column, _ObjectColumn):
+        return _ObjectColumn(list(values))
+    if isinstance(column, (_CategoryColumn, _TextColumn)):
+        if not types <= {str}:
+            return None
+        return _encode_category(values) if isinstance(column, _CategoryColumn) else _encode_text(values)
+    if column.fmt is None:
+        numbers = _encode_numbers(values, types) if types else _ArrayColumn(
+            np.zeros(len(values), dtype=column.data.dtype), np.ones(len(values), dtype=bool))
+        return numbers if numbers is not None and numbers.data.dtype == column.data.dtype else None
+    if not types <= {str}:
+        return None
+    dates = _encode_dates(values, _nulls(values)) if types else _ArrayColumn(
+        np.zeros(len(values), dtype="datetime64[s]"), np.ones(len(values), dtype=bool), column.fmt)
+    return dates if dates is not None and dates.fmt == column.fmt else None
+
+
+def _concat_columns(a: _Column, b: _Column, len_a: int, len_b: int) -> _Column:
+    """
+    Append column b to a, keeping a's layout when b's values fit it (the
+    common case: a small upsert batch appended to a large column). A
+    dictionary-encoded column whose values turn out mostly unique is
+    re-encoded, so it does not grow into a pile of Python strings.
+    """
+    same_layout = type(a) is type(b) and (not isinstance(a, _ArrayColumn) or (
+        a.fmt == b.fmt and a.data.dtype == b.data.dtype))  # type: ignore[union-attr]
+    fits = b if same_layout else _encode_like(a, b.values(0, len_b))
+    if fits is None and len_a < len_b:
+        converted = _encode_like(b, a.values(0, len_a))
+        if converted is not None:
+            a, fits = converted, b
+    if fits is None:
+        return _encode(a.values(0, len_a) + b.values(0, len_b))
+    merged = a.concat(fits)  # type: ignore[arg-type]
+    if isinstance(merged, _CategoryColumn) and not _is_category(merged.distinct, len_a + len_b):
+        return _encode(merged.values(0, len_a + len_b))
+    return merged
+
+
+class CompactPayloads(Sequence):
+    """
+    Read-only, list-like view over payload dicts stored column by column.
+    - Low-cardinality strings (status, priority, project, assignee, ...) are
+      dictionary-encoded into int8/16/32 codes
+    - Numbers and "YYYY-MM-DD[ HH:MM:SS]" dates are numpy arrays
+    - Mostly-unique strings (summary, description, searchable_text) live in
+      one UTF-8 buffer per field with row offsets
+    - Each row's key order is kept as a shared "shape" id
+    Indexing builds a fresh dict for that row only, so search results cost
+    top-k dicts; iterating or slicing decodes in column chunks. Values round
+    trip exactly (a dict built from row i equals the dict that was stored).
+    """
+
+    def __init__(self, size: int, shapes: List[Tuple[str, ...]], shape_codes: np.ndarray, columns: Dict[str, _Column]):
+        self._size = size
+        self._shapes = shapes
+        self._shape_codes = shape_codes
+        self._columns = columns
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "CompactPayloads":
+        shape_ids: Dict[Tuple[str, ...], int] = {}
+        shape_codes = np.fromiter(
+            (shape_ids.setdefault(tuple(r), len(shape_ids)) for r in records), dtype=np.int64, count=len(records)
+        )
+        shapes = list(shape_ids)
+        keys: Dict[str, None] = {}
+        for shape in shapes:
+            keys.update(dict.fromkeys(shape))
+        columns = {key: _encode([r.get(key) for r in records]) for key in keys}
+        return cls(len(records), shapes, shape_codes.astype(_code_dtype(len(shapes))), columns)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Any]]) -> "CompactPayloads":
+        """Rows that all have the same keys, given column by column (no per-row dicts)."""
+        size = len(next(iter(columns.values()))) if columns else 0
+        columns_encoded = {key: _encode(values) for key, values in columns.items()}
+        return cls(size, [tuple(columns)], np.zeros(size, dtype=np.int8), columns_encoded)
+
+    @classmethod
+    def concat_all(cls, parts: List["CompactPayloads"]) -> "CompactPayloads":
+        """Concatenate many parts pairwise (log2(len(parts)) copies of the data, not len(parts))."""
+        parts = list(parts) or [cls.from_records([])]
+        while len(parts) > 1:
+            merged = [a.concat(b) for a, b in zip(parts[::2], parts[1::2])]
+            parts = merged + parts[len(merged) * 2:]
+        return parts[0]
+
+    # ---------- Sequence ----------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._size)
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            return self._rows(start, stop)
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("payload index out of range")
+        shape = self._shapes[self._shape_codes[i]]
+        return {key: self._columns[key].get(i) for key in shape}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for start in range(0, self._size, _ROWS_PER_CHUNK):
+            yield from self._rows(start, min(self._size, start + _ROWS_PER_CHUNK))
+
+    def _rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        if stop <= start:
+            return []
+        decoded = {key: column.values(start, stop) for key, column in self._columns.items()}
+        shape_codes = self._shape_codes[start:stop].tolist()
+        if len(self._shapes) == 1:
+            shape = self._shapes[0]
+            return [dict(zip(shape, row)) for row in zip(*(decoded[key] for key in shape))]
+        return [
+            {key: decoded[key][offset] for key in self._shapes[code]}
+            for offset, code in enumerate(shape_codes)
+        ]
+
+    # ---------- Columns ----------
+
+    def column(self, key: str) -> List[Any]:
+        """Every row's value for `key` (None where absent), without building dicts."""
+        column = self._columns.get(key)
+        if column is None:
+            return [None] * self._size
+        values = column.values(0, self._size)
+        if len(self._shapes) > 1:
+            missing = [code for code, shape in enumerate(self._shapes) if key not in shape]
+            for i in np.flatnonzero(np.isin(self._shape_codes, missing)):
+                values[i] = None
+        return values
+
+    # ---------- Derivation (generations are immutable; these return new objects) ----------
+
+    def take(self, rows: np.ndarray) -> "CompactPayloads":
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = {key: column.take(rows) for key, column in self._columns.items()}
+        return CompactPayloads(len(rows), self._shapes, self._shape_codes[rows], columns)
+
+    def extend(self, records: List[Dict[str, Any]]) -> "CompactPayloads":
+        return self.concat(CompactPayloads.from_records(list(records)))
+
+    def concat(self, other: "CompactPayloads") -> "CompactPayloads":
+        if not len(other):
+            return self
+        if not len(self):
+            return other
+        shape_ids = {shape: i for i, shape in enumerate(self._shapes)}
+        shapes = list(self._shapes)
+        remap = np.empty(len(other._shapes), dtype=np.int64)
+        for i, shape in enumerate(other._shapes):
+            if shape not in shape_ids:
+                shape_ids[shape] = len(shapes)
+                shapes.append(shape)
+            remap[i] = shape_ids[shape]
+        dtype = _code_dtype(len(shapes))
+        shape_codes = np.concatenate([self._shape_codes.astype(dtype), remap[other._shape_codes].astype(dtype)])
+
+        columns: Dict[str, _Column] = {}
+        for key in list(self._columns) + [k for k in other._columns if k not in self._columns]:
+            a = self._columns.get(key) or _encode([None] * len(self))
+            b = other._columns.get(key) or _encode([None] * len(other))
+            columns[key] = _concat_columns(a, b, len(self), len(other))
+        return CompactPayloads(len(self) + len(other), shapes, shape_codes, columns)
+
+    # ---------- Introspection ----------
+
+    @property
+    def nbytes(self) -> int:
+        """Resident size of the encoded columns (plus shared labels/shapes)."""
+        return self._shape_codes.nbytes + sum(column.nbytes for column in self._columns.values())
+
+    def layout(self) -> Dict[str, str]:
+        """Column -> encoding chosen for it."""
+        names = {_CategoryColumn: "category", _TextColumn: "text", _ObjectColumn: "object"}
+        return {
+            key: names.get(type(column)) or (column.fmt or str(column.data.dtype))  # type: ignore[union-attr]
+            for key, column in self._columns.items()
+        }
+
+
+def ticket_key(value: Any) -> str:
+    """
+    String form of a primary key for lookups. Integral floats lose their '.0',
+    since a CSV id column with blanks is read as float and the id 123 arrives as 123.0.
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def payload_column(payloads: Sequence, key: str) -> List[Any]:
+    """Values of one payload field for every row, for compact or plain-list payloads."""
+    if isinstance(payloads, CompactPayloads):
+        return payloads.column(key)
+    return [p.get(key) for p in payloads]
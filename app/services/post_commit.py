@@ -0,0 +1,27 @@
+"""Derived-data refreshes that run after new tickets are committed to a collection"""
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def run_post_commit(collection: str):
+    """Kick off background refreshes of a collection's derived data; never raises."""
+    if settings.DUPLICATES_AUTO_REFRESH:
+        try:
+            from app.services.duplicates import duplicate_detector
+            duplicate_detector.start(collection)
+        except Exception as e:
+            logger.warning(f"Duplicate refresh for '{collection}' could not start: {e}")
+    if settings.TOPICS_AUTO_REFRESH:
+        try:
+            from app.services.topics import topic_clusterer
+            topic_clusterer.start(collection)
+        except Exception as e:
+            logger.warning(f"Topic clustering for '{collection}' could not start: {e}")
+    if settings.STRUCTURED_QUERIES_ENABLED:
+        try:
+            from app.services.structured_query import structured_queries
+            structured_queries.start(collection)
+        except Exception as e:
+            logger.warning(f"Field index refresh for '{collection}' could not start: {e}")
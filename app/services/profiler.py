@@ -0,0 +1,241 @@
+"""On-demand cProfile capture of /ask and /ingest requests"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from app.config import settings
+from app.utils.logger import setup_logger
+
+import cProfile
+import functools
+import hmac
+import io
+import marshal
+import pstats
+import random
+import threading
+import time
+import uuid
+
+logger = setup_logger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+
+# Exclusive (self) time is attributed to the first bucket whose marker occurs in the file path
+_BUCKETS = [
+    ("tokenization", ("tokenizers", "tokenization_")),
+    ("torch", ("/torch/", "sentence_transformers", "/transformers/")),
+    ("faiss", ("/faiss/", "swigfaiss")),
+    ("pandas", ("/pandas/",)),
+    ("numpy", ("/numpy/",)),
+    ("json", ("/json/", "pydantic", "jsonable_encoder")),
+    ("http", ("/requests/", "/urllib3/", "/httpx/", "/ssl.py", "/socket.py")),
+    ("retriever", ("app/services/retriever",)),
+    ("generator", ("app/services/generator",)),
+    ("vector_store", ("app/services/vector_store", "app/services/sharded_store")),
+    ("embeddings", ("app/services/embeddings", "app/services/embedding_server")),
+    ("app", ("/app/",)),
+]
+
+
+def _bucket(filename: str, funcname: str) -> str:
+    path = filename.replace("\\", "/")
+    if path == "~":  # built-ins: classify by name (e.g. <method 'search' of 'faiss...' objects>)
+        path = funcname
+    for name, markers in _BUCKETS:
+        if any(marker in path for marker in markers):
+            return name
+    return "other"
+
+
+class ProfileSession:
+    """Profiles collected for one request (or background job) across the threads that served it"""
+
+    def __init__(self, label: str, trigger: str, profile_id: Optional[str] = None):
+        self.profile_id = profile_id or uuid.uuid4().hex[:12]
+        self.label = label
+        self.trigger = trigger
+        self.started_at = time.time()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.profiled_ms = 0.0
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add(self, profile: cProfile.Profile, elapsed_ms: float):
+        with self._lock:
+            self._profiles.append(profile)
+            self.profiled_ms += elapsed_ms
+
+    def stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            if not self._profiles:
+                return None
+            merged = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                merged.add(profile)
+            return merged
+
+
+_current: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+class RequestProfiler:
+    """
+    Opt-in profiling for the ask and ingest paths.
+    - A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is
+      picked by PROFILE_SAMPLE_RATE (only with a token, which reading profiles
+      requires); the middleware opens a session and
+      handlers wrapped with @profiled run under cProfile in their worker thread
+    - An ingest request that is profiled also profiles the background job it
+      queues; the job's profile is stored under the request's X-Profile-Id
+    - The last PROFILE_KEEP profiles stay in memory with a per-component
+      breakdown (tokenization, torch, faiss, pandas, json, ...) and can be
+      downloaded as .prof files for pstats/snakeviz
+    Time outside the profiled handler (admission wait, request parsing,
+    response serialization) is reported as unprofiled_ms.
+    """
+
+    def __init__(self, keep: int, sample_rate: float, token: str):
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self.token = token
+        if sample_rate > 0 and not token:
+            # Profiles can only be read with the token, so sampling without one is pure overhead
+            logger.warning("PROFILE_SAMPLE_RATE is set but PROFILE_TOKEN is not; request sampling is disabled")
+            self.sample_rate = 0.0
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- Triggering ----------
+
+    def authorized(self, header_value: Optional[str]) -> bool:
+        """True if the header carries the profiling token (never when no token is configured)."""
+        return bool(self.token) and bool(header_value) and hmac.compare_digest(header_value, self.token)
+
+    def trigger_for(self, header_value: Optional[str]) -> Optional[str]:
+        if self.authorized(header_value):
+            return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def current(self) -> Optional[ProfileSession]:
+        return _current.get()
+
+    # ---------- Capture ----------
+
+    @contextmanager
+    def session(self, label: str, trigger: str, profile_id: Optional[str] = None) -> Iterator[ProfileSession]:
+        """Collect profiles from @profiled code running in this context; stored on exit if any were taken."""
+        session = ProfileSession(label, trigger, profile_id)
+        token = _current.set(session)
+        try:
+            yield session
+        finally:
+            _current.reset(token)
+            session.duration_ms = (time.time() - session.started_at) * 1000
+            self._store(session)
+
+    @contextmanager
+    def capture(self, label: str, trigger: str, profile_id: Optional[str] = None) -> Iterator[ProfileSession]:
+        """Session that also profiles the current thread (background jobs)."""
+        with self.session(label, trigger, profile_id) as session:
+            with self._profiling(session):
+                yield session
+
+    @contextmanager
+    def _profiling(self, session: ProfileSession):
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            session.add(profile, (time.perf_counter() - started) * 1000)
+
+    def profiled(self, func: Callable) -> Callable:
+        """Run a (sync) handler under cProfile when its request is being profiled."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            session = _current.get()
+            if session is None:
+                return func(*args, **kwargs)
+            with self._profiling(session):
+                return func(*args, **kwargs)
+        return wrapper
+
+    # ---------- Storage/Reports ----------
+
+    def _store(self, session: ProfileSession):
+        stats = session.stats()
+        if stats is None:
+            return
+        breakdown: Dict[str, float] = {}
+        for (filename, _, funcname), (_, _, tottime, _, _) in stats.stats.items():  # type: ignore[attr-defined]
+            bucket = _bucket(filename, funcname)
+            breakdown[bucket] = breakdown.get(bucket, 0.0) + tottime * 1000
+        entry = {
+            "profile_id": session.profile_id,
+            "label": session.label,
+            "trigger": session.trigger,
+            "created_at": datetime.fromtimestamp(session.started_at, timezone.utc).isoformat(),
+            "duration_ms": round(session.duration_ms or 0.0, 2),
+            "profiled_ms": round(session.profiled_ms, 2),
+            "unprofiled_ms": round(max(0.0, (session.duration_ms or 0.0) - session.profiled_ms), 2),
+            "status_code": session.status_code,
+            "breakdown_ms": {k: round(v, 2) for k, v in sorted(breakdown.items(), key=lambda kv: -kv[1])},
+            "_stats": marshal.dumps(stats.stats),  # type: ignore[attr-defined]
+        }
+        with self._lock:
+            self._profiles[session.profile_id] = entry
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        logger.info(f"Stored profile {session.profile_id} for {session.label} ({entry['duration_ms']} ms, {session.trigger})")
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(reversed(self._profiles.values()))
+        return [{k: v for k, v in e.items() if k != "_stats"} for e in entries]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        return {k: v for k, v in entry.items() if k != "_stats"} if entry else None
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        """pstats text report (top `limit` functions by `sort`)."""
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        if entry is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(_StatsSource(entry["_stats"]), stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def dump(self, profile_id: str) -> Optional[bytes]:
+        """The profile in pstats' on-disk format (what Profile.dump_stats writes)."""
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        return entry["_stats"] if entry else None
+
+
+class _StatsSource:
+    """Lets pstats.Stats load a marshalled stats dict from memory."""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+# Global instance
+request_profiler = RequestProfiler(
+    keep=settings.PROFILE_KEEP,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    token=settings.PROFILE_TOKEN,
+)
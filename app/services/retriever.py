@@ -1,10 +1,13 @@
 """Retrieval service for semantic search"""
 from typing import List, Dict, Any
-from app.services.embeddings import embedding_service
-from app.services.vector_store import vector_store
+from app.services.embeddings import embedding_service, get_embedding_service
+from app.services.vector_store import vector_store, EmbeddingModelChanged
+from app.services.collection_manager import collection_manager
+from app.services.migration import embedding_migrator
 from app.config import settings
 from app.utils.logger import setup_logger
 
+import logging
 import numpy as np
 
 logger = setup_logger(__name__)
@@ -15,25 +18,39 @@ class RetrieverService:
     def __init__(self):
         self.embedding_service = embedding_service
         self.vector_store = vector_store
+        self.collections = collection_manager
+
+    def _search(self, queries: List[str], top_k: int, collection: str) -> List[List[Dict[str, Any]]]:
+        """
+        Embed with the model of the store being searched and search it.
+        - During a migration's dual-serve phase a sample of queries goes to the shadow index
+        - If a cutover lands between embedding and search, embed again with the new model
+        """
+        for attempt in range(2):
+            store = self.collections.get(collection)
+            store = embedding_migrator.serving_store(store.name) or store
+            embedder = get_embedding_service(store.embedding_model)
+            query_embeddings = embedder.embed_batch(queries, is_query=True)
+            try:
+                return store.search_batch(
+                    query_vectors=query_embeddings,
+                    limit=top_k,
+                    score_threshold=settings.SCORE_THRESHOLD,
+                    model=embedder.model_name
+                )
+            except EmbeddingModelChanged:
+                if attempt:
+                    raise
+                logger.info("[RETRIEVER] Collection '%s' switched models mid-query; re-embedding", store.name)
     
-    def retrieve(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
-        """Retrieve relevant documents for a query"""
-        logger.debug(f"top_k: {top_k}")
-        logger.debug(f"User Query: {query}")
+    def retrieve(self, query: str, top_k: int = None, collection: str = None) -> List[Dict[str, Any]]:
+        """Retrieve relevant documents for a query from a named collection (default if omitted)"""
         if top_k is None:
             top_k = settings.TOP_K
         
-        # Generate query embedding
-        logger.info(f"[RETRIEVER] Retrieving documents for query: {query}")
-        query_embedding = self.embedding_service.embed_text(query,is_query=True)
-        #logger.debug(f"Embedded query: {query_embedding}")
-        
-        #FAISS
-        results = self.vector_store.search(
-            query_vector=query_embedding,
-            limit=top_k,
-            score_threshold=settings.SCORE_THRESHOLD
-        )
+        # Generate query embedding and search (FAISS)
+        logger.debug("[RETRIEVER] Retrieving top %d documents for query: %s", top_k, query)
+        results = self._search([query], top_k, collection)[0]
 
         '''
         try:
@@ -59,14 +76,22 @@ class RetrieverService:
         #     score_threshold=settings.SCORE_THRESHOLD
         # ) 
         
-        logger.info(f"[RETRIEVER] Retrieved {len(results)} documents")
-
-        if results:
-            logger.debug("[RETRIEVER] Raw FAISS top-5 scores: " +
-                 ", ".join(f"{r['score']:.4f}" for r in results[:5]))
+        if results and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[RETRIEVER] Retrieved %d documents; top-5 scores: %s",
+                         len(results), ", ".join(f"{r['score']:.4f}" for r in results[:5]))
 
         return results
-    
+
+    def retrieve_batch(self, queries: List[str], top_k: int = None, collection: str = None) -> List[List[Dict[str, Any]]]:
+        """Retrieve for several queries at once: one embedding batch and one index search"""
+        if top_k is None:
+            top_k = settings.TOP_K
+        if not queries:
+            return []
+
+        logger.debug("[RETRIEVER] Retrieving documents for %d queries", len(queries))
+        return self._search(queries, top_k, collection)
+
     def format_context(self, results: List[Dict[str, Any]]) -> str:
         """Format retrieved documents into context string"""
         context_parts = []
@@ -0,0 +1,492 @@
+"""Sharded Faiss vector store with scatter-gather search across shard processes"""
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+from typing import List, Dict, Any, Optional, Tuple, Union
+from app.config import settings
+from app.services.payload_store import ticket_key
+from app.utils.logger import setup_logger
+
+import argparse
+import atexit
+import heapq
+import numpy as np
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+
+logger = setup_logger(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Store methods a shard will execute on behalf of a client
+SHARD_METHODS = {
+    "create_collection",
+    "upsert_vectors",
+    "upsert_records",
+    "delete_records",
+    "search",
+    "search_batch",
+    "get_record",
+    "get_vector",
+    "get_collection_info",
+    "get_all_payloads",
+    "get_payloads_sample",
+    "get_vectors_with_columns",
+    "stage_begin",
+    "stage_add",
+    "stage_commit",
+    "stage_abort",
+}
+
+
+def shard_for(key: str, shard_count: int) -> int:
+    """Deterministic shard for a routing key (stable across processes and restarts)."""
+    return zlib.crc32(key.encode("utf-8")) % shard_count
+
+
+def _parse_address(address: str) -> Address:
+    """'host:port' -> TCP tuple, anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return (host, int(port))
+    return address
+
+
+# ---------- Shard server ----------
+
+def _handle_connection(conn, manager):
+    """Serve (collection, method, args, kwargs) requests on one connection."""
+    try:
+        while True:
+            try:
+                collection, method, args, kwargs = conn.recv()
+            except EOFError:
+                return
+            try:
+                if method == "evict":
+                    result = manager.evict(collection)
+                elif method == "exists":
+                    result = manager.exists(collection)
+                elif method == "collection_names":
+                    result = manager.collection_names()
+                elif method in SHARD_METHODS:
+                    # The router decides whether a collection exists; a shard may hold none of its records yet
+                    store = manager.get(collection, create=True)
+                    result = getattr(store, method)(*args, **kwargs)
+                else:
+                    raise ValueError(f"Unsupported shard method: {method}")
+                conn.send(("ok", result))
+            except Exception as e:
+                logger.error(f"Shard call {method} on '{collection}' failed: {e}")
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def serve_shard(address: Address, authkey: bytes):
+    """
+    Run a shard server. The shard owns a CollectionManager over its own
+    DATA_DIR, so each collection is stored per shard exactly like a
+    single-process deployment. One thread per client connection; Faiss
+    releases the GIL during search so concurrent queries run in parallel.
+    """
+    from app.services.collection_manager import collection_manager
+
+    listener = Listener(address, authkey=authkey)
+    logger.info(f"Shard listening on {address} (data dir {settings.DATA_DIR})")
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:
+            logger.warning(f"Rejected shard connection: {e}")
+            continue
+        threading.Thread(target=_handle_connection, args=(conn, collection_manager), daemon=True).start()
+
+
+# ---------- Client side ----------
+
+class ShardClient:
+    """Pooled RPC connections to a single shard."""
+
+    def __init__(self, address: Address, authkey: bytes, max_connections: int):
+        self.address = address
+        self.authkey = authkey
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def call(self, collection: str, method: str, *args, **kwargs):
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = Client(self.address, authkey=self.authkey)
+            try:
+                conn.send((collection, method, args, kwargs))
+                status, result = conn.recv()
+            except Exception:
+                conn.close()
+                raise
+            self._idle.put(conn)
+        if status != "ok":
+            raise RuntimeError(f"Shard {self.address} error: {result}")
+        return result
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ShardPool:
+    """
+    The set of shards backing all sharded collections.
+    - Local mode: spawns SHARD_COUNT shard processes on Unix sockets,
+      each with DATA_DIR=<DATA_DIR>/shards/shard-<i>
+    - Remote mode: connects to SHARD_ADDRESSES (host:port list) started with
+      `python -m app.services.sharded_store --listen host:port`
+    """
+
+    def __init__(self, shard_count: int, addresses: Optional[List[str]] = None):
+        self._processes: List[subprocess.Popen] = []
+        if addresses:
+            if not settings.SHARD_AUTHKEY:
+                raise RuntimeError("SHARD_AUTHKEY must be set to use remote shards")
+            authkey = settings.SHARD_AUTHKEY.encode("utf-8")
+            parsed = [_parse_address(a) for a in addresses]
+        else:
+            authkey = os.urandom(16).hex().encode("utf-8")
+            parsed = self._spawn_local(shard_count, authkey)
+
+        self.clients = [ShardClient(a, authkey, settings.SHARD_CONNECTIONS) for a in parsed]
+        self.shard_count = len(self.clients)
+        self.executor = ThreadPoolExecutor(max_workers=self.shard_count, thread_name_prefix="shard")
+        self._wait_ready()
+        logger.info(f"Shard pool ready with {self.shard_count} shards")
+
+    def _spawn_local(self, shard_count: int, authkey: bytes) -> List[str]:
+        socket_dir = tempfile.mkdtemp(prefix="workwise-shards-")
+        addresses = []
+        for i in range(shard_count):
+            address = os.path.join(socket_dir, f"shard-{i}.sock")
+            env = dict(
+                os.environ,
+                DATA_DIR=os.path.join(settings.DATA_DIR, "shards", f"shard-{i}"),
+                VECTOR_STORE_MODE="single",
+                SHARD_AUTHKEY=authkey.decode("utf-8"),
+            )
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "app.services.sharded_store", "--listen", address],
+                env=env,
+                cwd=_PROJECT_ROOT,
+            )
+            self._processes.append(proc)
+            addresses.append(address)
+        atexit.register(self.shutdown)
+        return addresses
+
+    def _wait_ready(self, timeout: float = 60.0):
+        deadline = time.time() + timeout
+        for client in self.clients:
+            while True:
+                try:
+                    client.call(settings.DEFAULT_COLLECTION, "get_collection_info")
+                    break
+                except (OSError, EOFError):
+                    if time.time() > deadline:
+                        raise RuntimeError(f"Shard {client.address} did not become ready")
+                    time.sleep(0.1)
+
+    def scatter(self, calls: Dict[int, Tuple[str, str, tuple, dict]]) -> Dict[int, Any]:
+        """Run {shard: (collection, method, args, kwargs)} in parallel and gather results."""
+        futures = {
+            shard: self.executor.submit(self.clients[shard].call, collection, method, *args, **kwargs)
+            for shard, (collection, method, args, kwargs) in calls.items()
+        }
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def broadcast(self, collection: str, method: str, *args, **kwargs) -> List[Any]:
+        results = self.scatter({i: (collection, method, args, kwargs) for i in range(self.shard_count)})
+        return [results[i] for i in range(self.shard_count)]
+
+    def shutdown(self):
+        for client in self.clients:
+            client.close()
+        for proc in self._processes:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in self._processes:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self._processes = []
+
+
+_pool: Optional[ShardPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_shard_pool() -> ShardPool:
+    """Lazily start (or connect to) the shard pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            addresses = [a.strip() for a in settings.SHARD_ADDRESSES.split(",") if a.strip()]
+            _pool = ShardPool(settings.SHARD_COUNT, addresses or None)
+        return _pool
+
+
+def _route(vectors, payloads, shard_count: int) -> Dict[int, Tuple[List, List]]:
+    """Group vectors/payloads by the shard that owns each ticket_id."""
+    buckets: Dict[int, Tuple[List, List]] = {}
+    for vector, payload in zip(vectors, payloads):
+        key = payload.get("ticket_id")
+        if key is None:  # keyless records spread by text; 0 is a valid id
+            key = payload.get("searchable_text", "")
+        key = ticket_key(key)
+        bucket = buckets.setdefault(shard_for(key, shard_count), ([], []))
+        bucket[0].append(vector)
+        bucket[1].append(payload)
+    return buckets
+
+
+class ShardedIndexBuilder:
+    """Stages a rebuild on every shard; each shard swaps in its new index on commit."""
+
+    def __init__(self, store: "ShardedVectorStore", vector_size: int, model: Optional[str] = None):
+        self.store = store
+        self.build_id = uuid.uuid4().hex
+        self.store.pool.broadcast(store.name, "stage_begin", self.build_id, vector_size, model)
+
+    def add(self, vectors: List[List[float]], payloads: List[Dict[str, Any]]) -> int:
+        buckets = _route(vectors, payloads, self.store.pool.shard_count)
+        results = self.store.pool.scatter({
+            shard: (self.store.name, "stage_add", (self.build_id, vecs, pays), {})
+            for shard, (vecs, pays) in buckets.items()
+        })
+        return sum(results.values())
+
+    def commit(self) -> int:
+        return sum(self.store.pool.broadcast(self.store.name, "stage_commit", self.build_id))
+
+    def abort(self):
+        self.store.pool.broadcast(self.store.name, "stage_abort", self.build_id)
+
+
+class ShardedVectorStore:
+    """
+    VectorStoreService-compatible facade over a ShardPool.
+    - Upserts are routed to shards by crc32(ticket_id)
+    - Searches run on all shards in parallel; top-k is merged by score
+    - Result IDs are global: local_id * shard_count + shard
+    """
+
+    def __init__(self, name: str, pool: Optional[ShardPool] = None):
+        self.name = name
+        self._pool = pool
+
+    @property
+    def pool(self) -> ShardPool:
+        if self._pool is None:
+            self._pool = get_shard_pool()
+        return self._pool
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self.pool.clients[0].call(self.name, "get_collection_info").get("dimension")
+
+    @property
+    def embedding_model(self) -> str:
+        return self.pool.clients[0].call(self.name, "get_collection_info").get("embedding_model") or settings.EMBEDDING_MODEL
+
+    # ---------- Collection lifecycle ----------
+
+    def create_collection(self, vector_size: int):
+        """(Re)create the collection on every shard. WARNING: This clears existing data."""
+        self.pool.broadcast(self.name, "create_collection", vector_size)
+        logger.info(f"Created sharded collection '{self.name}': dim={vector_size}, shards={self.pool.shard_count}")
+
+    def begin_rebuild(self, vector_size: int, model: Optional[str] = None) -> ShardedIndexBuilder:
+        """Stage a replacement index on every shard; current data stays searchable until commit."""
+        return ShardedIndexBuilder(self, vector_size, model)
+
+    # ---------- Upsert/Search ----------
+
+    def upsert_vectors(
+        self,
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]]
+    ) -> int:
+        """Route each vector to its shard by ticket_id and insert in parallel."""
+        buckets = _route(vectors, payloads, self.pool.shard_count)
+        results = self.pool.scatter({
+            shard: (self.name, "upsert_vectors", (vecs, pays), {})
+            for shard, (vecs, pays) in buckets.items()
+        })
+        count = sum(results.values())
+        logger.info(f"Upserted {count} vectors across {len(buckets)} shards")
+        return count
+
+    def upsert_records(
+        self,
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]],
+        key: str = "ticket_id",
+        model: Optional[str] = None
+    ) -> int:
+        """Insert or replace by ticket_id; a ticket always routes to the shard that holds it."""
+        buckets = _route(vectors, payloads, self.pool.shard_count)
+        results = self.pool.scatter({
+            shard: (self.name, "upsert_records", (vecs, pays), {"key": key, "model": model})
+            for shard, (vecs, pays) in buckets.items()
+        })
+        return sum(results.values())
+
+    def delete_records(self, keys: List[str], key: str = "ticket_id") -> int:
+        """Delete by ticket_id on the shards that own the keys."""
+        buckets: Dict[int, List[str]] = {}
+        for k in keys:
+            buckets.setdefault(shard_for(ticket_key(k), self.pool.shard_count), []).append(k)
+        results = self.pool.scatter({
+            shard: (self.name, "delete_records", (shard_keys,), {"key": key})
+            for shard, shard_keys in buckets.items()
+        })
+        return sum(results.values())
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        score_threshold: float = 0.0,
+        model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Search every shard for its local top-k and merge the global top-k by score."""
+        per_shard = self.pool.broadcast(self.name, "search", query_vector, limit, score_threshold, model)
+        candidates = []
+        for shard, results in enumerate(per_shard):
+            for r in results:
+                r["id"] = r["id"] * self.pool.shard_count + shard
+                candidates.append(r)
+        return heapq.nlargest(limit, candidates, key=lambda r: r["score"])
+
+    def search_batch(
+        self,
+        query_vectors: List[List[float]],
+        limit: int = 5,
+        score_threshold: float = 0.0,
+        model: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Scatter the whole batch to every shard once and merge top-k per query."""
+        per_shard = self.pool.broadcast(self.name, "search_batch", query_vectors, limit, score_threshold, model)
+        merged = []
+        for q in range(len(query_vectors)):
+            candidates = []
+            for shard, batch in enumerate(per_shard):
+                for r in batch[q]:
+                    r["id"] = r["id"] * self.pool.shard_count + shard
+                    candidates.append(r)
+            merged.append(heapq.nlargest(limit, candidates, key=lambda r: r["score"]))
+        return merged
+
+    def _owner(self, ticket_id: str) -> ShardClient:
+        return self.pool.clients[shard_for(ticket_key(ticket_id), self.pool.shard_count)]
+
+    def get_record(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a ticket from the shard that owns it (global id, like search results)."""
+        shard = shard_for(ticket_key(ticket_id), self.pool.shard_count)
+        record = self._owner(ticket_id).call(self.name, "get_record", ticket_id)
+        if record is not None:
+            record["id"] = record["id"] * self.pool.shard_count + shard
+        return record
+
+    def get_vector(self, ticket_id: str) -> Optional[List[float]]:
+        return self._owner(ticket_id).call(self.name, "get_vector", ticket_id)
+
+    def search_similar(
+        self,
+        ticket_id: str,
+        limit: int = 5,
+        score_threshold: float = 0.0
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Take the ticket's vector from its owning shard, then search every shard with it."""
+        vector = self.get_vector(ticket_id)
+        if vector is None:
+            return None
+        results = self.search_batch([vector], limit + 1, score_threshold)[0]
+        return [r for r in results if ticket_key(r["payload"].get("ticket_id")) != ticket_key(ticket_id)][:limit]
+
+    # ---------- Introspection/Access ----------
+
+    def get_collection_info(self) -> Dict[str, Any]:
+        infos = self.pool.broadcast(self.name, "get_collection_info")
+        count = sum(info.get("vectors_count", 0) for info in infos)
+        return {
+            "name": self.name,
+            "vectors_count": count,
+            "memory_bytes": sum(info.get("memory_bytes", 0) for info in infos),
+            "shards": [info.get("vectors_count", 0) for info in infos],
+            "status": "ready"
+        }
+
+    def memory_bytes(self) -> int:
+        """
+        Vectors live in the shard processes, which each enforce their own
+        COLLECTION_MEMORY_BUDGET_MB, so nothing counts against this process.
+        """
+        return 0
+
+    def get_all_payloads(self) -> List[Dict[str, Any]]:
+        payloads: List[Dict[str, Any]] = []
+        for shard_payloads in self.pool.broadcast(self.name, "get_all_payloads"):
+            payloads.extend(shard_payloads)
+        return payloads
+
+    def get_vectors_with_columns(self, fields: List[str]):
+        """Concatenate every shard's vectors and payload columns (shard order, aligned rows)."""
+        parts = self.pool.broadcast(self.name, "get_vectors_with_columns", fields)
+        columns: Dict[str, List[Any]] = {field: [] for field in fields}
+        for _, shard_columns in parts:
+            for field in fields:
+                columns[field].extend(shard_columns[field])
+        non_empty = [vectors for vectors, _ in parts if len(vectors)]
+        if not non_empty:
+            return np.zeros((0, 0), dtype="float32"), columns
+        return np.concatenate(non_empty), columns
+
+    def get_payloads_sample(self, limit: int = 100) -> List[Dict[str, Any]]:
+        per_shard = max(1, -(-limit // self.pool.shard_count))
+        payloads: List[Dict[str, Any]] = []
+        for shard_payloads in self.pool.broadcast(self.name, "get_payloads_sample", per_shard):
+            payloads.extend(shard_payloads)
+        return payloads[:limit]
+
+    def close(self):
+        """Release this collection's memory on every shard."""
+        try:
+            self.pool.broadcast(self.name, "evict")
+        except Exception as e:
+            logger.warning(f"Failed to evict sharded collection '{self.name}': {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a WorkWise vector shard")
+    parser.add_argument("--listen", required=True, help="host:port or Unix socket path")
+    args = parser.parse_args()
+
+    if not settings.SHARD_AUTHKEY:
+        raise SystemExit("SHARD_AUTHKEY must be set")
+    serve_shard(_parse_address(args.listen), settings.SHARD_AUTHKEY.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Versioned, portable snapshot bundles of a collection for replica bootstrap"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.collection_manager import collection_manager
+from app.services.embeddings import get_embedding_service
+from app.utils.logger import setup_logger
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import uuid
+
+logger = setup_logger(__name__)
+
+SNAPSHOT_FORMAT = "workwise-snapshot"
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+# Written next to a restored index so restarts don't re-import the same snapshot
+RESTORED_MARKER = "snapshot_manifest.json"
+
+# Field value counts stored in aggregates.json
+AGGREGATE_FIELDS = ["status", "priority", "project", "issue_type", "component", "assignee"]
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is malformed, corrupt or incompatible with this deployment."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _aggregates(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "record_count": len(payloads),
+        "fields": {
+            field: dict(Counter(str(p.get(field)) for p in payloads if p.get(field) is not None).most_common())
+            for field in AGGREGATE_FIELDS
+        },
+    }
+
+
+class SnapshotService:
+    """
+    Exports and imports a collection as a single tar bundle:
+    - manifest.json: format version, embedding model, dimension, storage mode,
+      record count and a sha256 + size for every file in the bundle
+    - faiss.index, faiss_payloads.json (+ faiss_vectors.f32 for compact storage)
+    - aggregates.json (field value counts) and analytics/* (duplicates, topics)
+    Imports verify the model and checksums before atomically replacing the
+    collection's files. A bundle may be a .tar/.tar.gz file or an unpacked
+    directory (e.g. a mounted volume).
+    """
+
+    def __init__(self, snapshot_dir: str):
+        self.snapshot_dir = snapshot_dir
+
+    def _check_mode(self):
+        if collection_manager.sharded:
+            raise SnapshotError("Snapshots cover a single-process store; snapshot each shard's DATA_DIR instead")
+
+    # ---------- Export ----------
+
+    def export(self, collection: Optional[str] = None, path: Optional[str] = None, compress: bool = False) -> Dict[str, Any]:
+        """Write a snapshot bundle of a collection and return its manifest (with `path`)."""
+        self._check_mode()
+        name = collection_manager.validate_name(collection or collection_manager.default_name)
+        created = datetime.now(timezone.utc)
+        if path is None:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            suffix = ".tar.gz" if compress else ".tar"
+            path = os.path.join(self.snapshot_dir, f"{name}-{created.strftime('%Y%m%dT%H%M%SZ')}{suffix}")
+
+        staging = tempfile.mkdtemp(prefix=".snapshot-", dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with collection_manager.pinned(name) as store:
+                # Hold the write lock so index, payloads and vectors come from the same generation
+                with store._write_lock:
+                    store._compact_locked()  # the files then hold every record; no write-ahead log to carry
+                    if store.index is None or not os.path.exists(store.index_path):
+                        raise SnapshotError(f"Collection '{name}' has no index to snapshot")
+                    shutil.copyfile(store.index_path, os.path.join(staging, "faiss.index"))
+                    shutil.copyfile(store.payloads_path, os.path.join(staging, "faiss_payloads.json"))
+                    if store.full_vectors is not None:
+                        shutil.copyfile(store.vectors_path, os.path.join(staging, "faiss_vectors.f32"))
+                    dimension, storage, model = store.dimension, store.storage, store.embedding_model
+                    record_count = int(store.index.ntotal)  # type: ignore
+                    payloads = list(store.payloads)
+
+            with open(os.path.join(staging, "aggregates.json"), "w", encoding="utf-8") as f:
+                json.dump(_aggregates(payloads), f)
+            artifacts = collection_manager.artifacts_dir(name)
+            if os.path.isdir(artifacts):
+                shutil.copytree(artifacts, os.path.join(staging, "analytics"))
+
+            files = {}
+            for root, _, filenames in os.walk(staging):
+                for filename in sorted(filenames):
+                    full = os.path.join(root, filename)
+                    rel = os.path.relpath(full, staging).replace(os.sep, "/")
+                    files[rel] = {"sha256": _sha256(full), "bytes": os.path.getsize(full)}
+
+            manifest = {
+                "format": SNAPSHOT_FORMAT,
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "snapshot_id": uuid.uuid4().hex,
+                "created_at": created.isoformat(),
+                "collection": name,
+                "embedding_model": model,
+                "dimension": dimension,
+                "storage": storage,
+                "record_count": record_count,
+                "files": files,
+            }
+            with open(os.path.join(staging, MANIFEST_NAME), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+            mode = "w:gz" if path.endswith((".tar.gz", ".tgz")) else "w"
+            with tarfile.open(path + ".tmp", mode) as tar:
+                tar.add(os.path.join(staging, MANIFEST_NAME), arcname=MANIFEST_NAME)
+                for rel in files:
+                    tar.add(os.path.join(staging, rel), arcname=rel)
+            os.replace(path + ".tmp", path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        logger.info(f"Exported snapshot of '{name}' ({record_count} records) to {path}")
+        return {**manifest, "path": path}
+
+    # ---------- Inspection ----------
+
+    def read_manifest(self, source: str) -> Dict[str, Any]:
+        """Manifest of a bundle file or unpacked bundle directory."""
+        if os.path.isdir(source):
+            manifest_path = os.path.join(source, MANIFEST_NAME)
+            if not os.path.exists(manifest_path):
+                raise SnapshotError(f"No {MANIFEST_NAME} in {source}")
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        else:
+            try:
+                with tarfile.open(source, "r:*") as tar:
+                    member = tar.extractfile(MANIFEST_NAME)
+                    manifest = json.load(member)  # type: ignore[arg-type]
+            except (tarfile.TarError, KeyError) as e:
+                raise SnapshotError(f"{source} is not a snapshot bundle: {e}")
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise SnapshotError(f"{source} is not a {SNAPSHOT_FORMAT} bundle")
+        return manifest
+
+    def check_compatible(self, manifest: Dict[str, Any]):
+        """Raise SnapshotError unless this deployment can serve the snapshot's vectors."""
+        version = manifest.get("format_version", 0)
+        if version > SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(f"Snapshot format v{version} is newer than supported v{SNAPSHOT_FORMAT_VERSION}")
+        if manifest.get("embedding_model") != settings.EMBEDDING_MODEL:
+            raise SnapshotError(
+                f"Snapshot was built with embedding model '{manifest.get('embedding_model')}' "
+                f"but EMBEDDING_MODEL is '{settings.EMBEDDING_MODEL}'"
+            )
+        storage = settings.VECTOR_STORAGE.lower()
+        if manifest.get("storage") != storage:
+            raise SnapshotError(
+                f"Snapshot index uses VECTOR_STORAGE '{manifest.get('storage')}' but this deployment uses '{storage}'"
+            )
+        dimension = get_embedding_service().get_dimension()
+        if manifest.get("dimension") != dimension:
+            raise SnapshotError(
+                f"Snapshot vectors have dimension {manifest.get('dimension')} "
+                f"but {settings.EMBEDDING_MODEL} produces {dimension}"
+            )
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """Manifests of the bundles in SNAPSHOT_DIR, newest first."""
+        snapshots = []
+        if not os.path.isdir(self.snapshot_dir):
+            return snapshots
+        for entry in os.listdir(self.snapshot_dir):
+            path = os.path.join(self.snapshot_dir, entry)
+            if entry.startswith(".") or entry.endswith(".tmp"):
+                continue
+            try:
+                manifest = self.read_manifest(path)
+            except (SnapshotError, OSError, ValueError):
+                continue
+            manifest.pop("files", None)
+            snapshots.append({**manifest, "name": entry, "bytes": os.path.getsize(path)})
+        snapshots.sort(key=lambda s: s.get("created_at", ""), reverse=True)
+        return snapshots
+
+    def resolve(self, name: str) -> str:
+        """Path of a bundle in SNAPSHOT_DIR by file name (no path components)."""
+        if not name or os.path.basename(name) != name or name.startswith("."):
+            raise SnapshotError(f"Invalid snapshot name '{name}'")
+        path = os.path.join(self.snapshot_dir, name)
+        if not os.path.exists(path):
+            raise SnapshotError(f"Snapshot '{name}' not found")
+        return path
+
+    # ---------- Import ----------
+
+    def import_snapshot(self, source: str, collection: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Verify and restore a bundle into a collection (the manifest's collection if omitted).
+        The collection's files are replaced only after every checksum matches.
+        """
+        self._check_mode()
+        manifest = self.read_manifest(source)
+        self.check_compatible(manifest)
+        name = collection_manager.validate_name(collection or manifest["collection"])
+        files = manifest.get("files", {})
+        for required in ("faiss.index", "faiss_payloads.json"):
+            if required not in files:
+                raise SnapshotError(f"Snapshot is missing {required}")
+
+        with collection_manager.pinned(name, create=True) as store:
+            target_dir = os.path.dirname(store.index_path)
+            os.makedirs(target_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=".snapshot-", dir=target_dir)
+            try:
+                self._materialize(source, files, staging)
+                for rel, meta in files.items():
+                    full = os.path.join(staging, rel)
+                    if os.path.getsize(full) != meta["bytes"] or _sha256(full) != meta["sha256"]:
+                        raise SnapshotError(f"Checksum mismatch for {rel}")
+
+                with store._write_lock:
+                    os.replace(os.path.join(staging, "faiss.index"), store.index_path)
+                    os.replace(os.path.join(staging, "faiss_payloads.json"), store.payloads_path)
+                    if "faiss_vectors.f32" in files:
+                        os.replace(os.path.join(staging, "faiss_vectors.f32"), store.vectors_path)
+                    elif os.path.exists(store.vectors_path):
+                        os.unlink(store.vectors_path)
+                    for derived in (store.ids_path, store.meta_path, store.delta_path):
+                        if os.path.exists(derived):
+                            os.unlink(derived)  # rebuilt on reload (the model matches EMBEDDING_MODEL)
+                    with open(os.path.join(target_dir, RESTORED_MARKER), "w", encoding="utf-8") as f:
+                        json.dump({k: v for k, v in manifest.items() if k != "files"}, f, indent=2)
+                store.reload()
+
+                # Derived data travels with the vectors it was computed from
+                artifacts = collection_manager.artifacts_dir(name)
+                shutil.rmtree(artifacts, ignore_errors=True)
+                if os.path.isdir(os.path.join(staging, "analytics")):
+                    shutil.copytree(os.path.join(staging, "analytics"), artifacts)
+                if "aggregates.json" in files:
+                    os.makedirs(artifacts, exist_ok=True)
+                    shutil.copyfile(os.path.join(staging, "aggregates.json"), os.path.join(artifacts, "aggregates.json"))
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+            count = store.get_collection_info()["vectors_count"]
+
+        if count != manifest.get("record_count"):
+            logger.warning(f"Snapshot declared {manifest.get('record_count')} records but {count} were loaded")
+        logger.info(f"Imported snapshot {manifest['snapshot_id']} into '{name}' ({count} records)")
+        return {**{k: v for k, v in manifest.items() if k != "files"}, "collection": name, "loaded_records": count}
+
+    @staticmethod
+    def _materialize(source: str, files: Dict[str, Any], staging: str):
+        """Copy/extract exactly the manifest's files into staging (no other tar members)."""
+        for rel in files:
+            if rel.startswith("/") or ".." in rel.split("/"):
+                raise SnapshotError(f"Unsafe path in snapshot: {rel}")
+        if os.path.isdir(source):
+            for rel in files:
+                dest = os.path.join(staging, rel)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copyfile(os.path.join(source, rel), dest)
+            return
+        with tarfile.open(source, "r:*") as tar:
+            for rel in files:
+                member = tar.getmember(rel)
+                if not member.isfile():
+                    raise SnapshotError(f"Snapshot entry {rel} is not a regular file")
+                dest = os.path.join(staging, rel)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                with tar.extractfile(member) as src, open(dest, "wb") as out:  # type: ignore[union-attr]
+                    shutil.copyfileobj(src, out, 1 << 20)
+
+    # ---------- Boot ----------
+
+    def restore_on_boot(self):
+        """
+        Restore SNAPSHOT_BOOT_PATH into SNAPSHOT_BOOT_COLLECTION at startup.
+        Skipped when that snapshot was already restored; raises SnapshotError
+        (failing startup) if it is incompatible or corrupt.
+        """
+        source = settings.SNAPSHOT_BOOT_PATH
+        if not source:
+            return None
+        if not os.path.exists(source):
+            raise SnapshotError(f"SNAPSHOT_BOOT_PATH {source} does not exist")
+        manifest = self.read_manifest(source)
+        self.check_compatible(manifest)
+        name = settings.SNAPSHOT_BOOT_COLLECTION or manifest["collection"]
+
+        store = collection_manager.get(name, create=True)
+        marker = os.path.join(os.path.dirname(store.index_path), RESTORED_MARKER)
+        if os.path.exists(marker):
+            with open(marker, "r", encoding="utf-8") as f:
+                if json.load(f).get("snapshot_id") == manifest["snapshot_id"]:
+                    logger.info(f"Snapshot {manifest['snapshot_id']} already restored into '{name}'")
+                    return None
+        return self.import_snapshot(source, name)
+
+
+# Global instance
+snapshot_service = SnapshotService(settings.SNAPSHOT_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, import or inspect WorkWise snapshot bundles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write a snapshot bundle of a collection")
+    export.add_argument("--collection", default=None)
+    export.add_argument("--out", default=None, help="Bundle path (.tar or .tar.gz); defaults to SNAPSHOT_DIR")
+    restore = sub.add_parser("import", help="Restore a bundle file or directory into a collection")
+    restore.add_argument("source")
+    restore.add_argument("--collection", default=None)
+    inspect = sub.add_parser("inspect", help="Print a bundle's manifest")
+    inspect.add_argument("source")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        result = snapshot_service.export(args.collection, args.out)
+    elif args.command == "import":
+        result = snapshot_service.import_snapshot(args.source, args.collection)
+    else:
+        result = snapshot_service.read_manifest(args.source)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,524 @@
+"""Structured-query fast path: counting, distribution and trend questions answered from a field index"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.collection_manager import collection_manager
+from app.services.payload_store import payload_column
+from app.utils.logger import setup_logger
+from app.utils.response_builder import extract_chart_intent
+
+import re
+import threading
+import time
+import weakref
+import numpy as np
+import pandas as pd
+
+logger = setup_logger(__name__)
+
+# Indexed categorical fields and the words that name them in a question (for "by <field>")
+FIELD_ALIASES = {
+    "status": ("status", "statuses", "state", "states"),
+    "priority": ("priority", "priorities"),
+    "project": ("project", "projects"),
+    "issue_type": ("issue type", "issue types", "type", "types"),
+    "component": ("component", "components"),
+    "module": ("module", "modules"),
+    "symptom_severity": ("severity", "severities"),
+    "assignee": ("assignee", "assignees"),
+    "reporter": ("reporter", "reporters"),
+}
+# Fields whose values are recognized anywhere in a question; people only via "assigned to"/"reported by"
+VALUE_FIELDS = ("priority", "issue_type", "status", "project", "component", "module", "symptom_severity")
+CLOSED_STATUSES = {"closed", "done", "resolved"}  # same split as /api/metrics
+
+_STATE_WORDS = {
+    "open": "open", "unresolved": "open", "active": "open", "outstanding": "open", "pending": "open",
+    "closed": "closed", "resolved": "closed", "done": "closed", "completed": "closed", "fixed": "closed",
+}
+_COUNT_RE = re.compile(r"\bhow many\b|\bnumber of\b|\bcount\b|\btotal\b")
+_TREND_RE = re.compile(r"\b(?:per|by|each|every) (day|week|month)\b|\b(daily|weekly|monthly)\b")
+_GROUP_RE = re.compile(r"\b(?:by|per|for each|each|across)\s+(%s)\b" % "|".join(
+    a for aliases in FIELD_ALIASES.values() for a in aliases))
+_PERSON_RE = re.compile(r"\b(assigned to|reported by|raised by|filed by)\s+([a-z0-9][a-z0-9._@-]*)")
+_DATE_VERBS = r"(?:(created|opened|raised|filed|reported|resolved|closed|fixed)\s+)?"
+_TIME_PATTERNS = [
+    ("last", re.compile(_DATE_VERBS + r"(?:(?:in|during|over|within)\s+)?(?:the\s+)?(last|past)\s+(\d+\s+)?(day|week|month|year)s?\b")),
+    ("this", re.compile(_DATE_VERBS + r"this\s+(week|month|year)\b")),
+    ("year", re.compile(_DATE_VERBS + r"(?:in|during)\s+(20\d\d)\b")),
+    ("since", re.compile(_DATE_VERBS + r"since\s+(\d{4}-\d{2}(?:-\d{2})?)\b")),
+]
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_OPEN_ENDED_RE = re.compile(r"^\s*(why|explain|describe|summari[sz]e)\b|\bwhat (causes|caused)\b|\bhow (do|can|to|should)\b")
+
+# Words a structured question may contain besides values, fields and intent; anything else
+# (e.g. "mention memory leaks") is a free-text condition the field index can't answer
+_FILLER = set("""
+a about across all an and any are as at be been by can currently do does each every exist exists
+for from get give got has have how in into is it its many me much now number of on or our out over
+per please right show still tell that the there these they this those time to total count we were
+what which with overall so far
+ticket tickets issue issues item items jira backlog
+created opened raised filed reported
+trend trends distribution breakdown split mix over time timeline compare comparison proportion
+percentage share month months monthly week weeks weekly day days daily year years
+""".split())
+_GROUP_WORDS = {w for aliases in FIELD_ALIASES.values() for a in aliases for w in a.split()}
+
+_MAX_CHART_POINTS = 60
+
+
+def _norm(value: str) -> str:
+    """Lowercased token form used both for indexed values and question text."""
+    return " ".join(_TOKEN_RE.findall(value.lower()))
+
+
+def _tickets(count: int) -> str:
+    return "ticket" if count == 1 else "tickets"
+
+
+def _plural(phrase: str) -> str:
+    if phrase.endswith("y") and not phrase.endswith(("ay", "ey", "oy", "uy")):
+        return phrase[:-1] + "ies"
+    return phrase + ("es" if phrase.endswith(("s", "x", "ch", "sh")) else "s")
+
+
+class FieldIndex:
+    """
+    Dictionary-encoded columns over one generation's payloads.
+    - Each categorical field is an int32 code array (-1 = missing) with its
+      labels and a lowercase value -> code lookup
+    - created/resolved dates are datetime64[D] arrays (NaT = missing)
+    Filters combine as boolean masks, so a count or group-by over a million
+    tickets is a few vectorized passes.
+    """
+
+    def __init__(self, payloads: List[Dict[str, Any]]):
+        self.size = len(payloads)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.labels: Dict[str, List[str]] = {}
+        self.lookup: Dict[str, Dict[str, int]] = {}
+        for field in FIELD_ALIASES:
+            self._encode(field, payload_column(payloads, field))
+
+        status_norm = [_norm(v) for v in self.labels["status"]]
+        closed_codes = [code for code, v in enumerate(status_norm) if v in CLOSED_STATUSES]
+        self.closed = np.isin(self.codes["status"], closed_codes)
+        self.has_status = self.codes["status"] >= 0
+        self.dates = {
+            "created": self._dates([a or b for a, b in zip(payload_column(payloads, "created_date"), payload_column(payloads, "created"))]),
+            "resolved": self._dates([a or b for a, b in zip(payload_column(payloads, "resolved_date"), payload_column(payloads, "resolved"))]),
+        }
+        self.ticket_ids = payload_column(payloads, "ticket_id")
+
+    def _encode(self, field: str, raw: List[Any]):
+        # Factorize the raw values, then normalize only the (few) distinct ones
+        raw_codes, uniques = pd.factorize(pd.Series(raw, dtype=object))
+        remap = np.full(len(uniques) + 1, -1, dtype=np.int32)  # last slot: missing (-1)
+        labels: List[str] = []
+        lookup: Dict[str, int] = {}
+        by_key: Dict[str, int] = {}
+        for i, value in enumerate(uniques):
+            label = str(value).strip()
+            if label.lower() in ("", "none", "nan", "nat"):
+                continue
+            key = label.lower()
+            if key not in by_key:  # first spelling seen is the display label
+                by_key[key] = len(labels)
+                labels.append(label)
+                norm = _norm(label)
+                if norm:
+                    lookup.setdefault(norm, by_key[key])
+                    lookup.setdefault(_plural(norm), by_key[key])
+            remap[i] = by_key[key]
+        self.codes[field] = remap[raw_codes]
+        self.labels[field] = labels
+        self.lookup[field] = lookup
+
+    @staticmethod
+    def _dates(raw: List[Any]) -> np.ndarray:
+        if not raw:
+            return np.array([], dtype="datetime64[D]")
+        parsed = pd.to_datetime(pd.Series(raw, dtype=object), errors="coerce", utc=True)
+        return parsed.dt.tz_localize(None).to_numpy().astype("datetime64[D]")
+
+    def memory_bytes(self) -> int:
+        arrays = list(self.codes.values()) + list(self.dates.values()) + [self.closed, self.has_status]
+        return int(sum(a.nbytes for a in arrays)) + 8 * len(self.ticket_ids)
+
+
+class StructuredQuery:
+    """A question parsed into filters plus what to compute (count, distribution or trend)."""
+
+    def __init__(self):
+        self.kind: Optional[str] = None
+        self.filters: Dict[str, List[int]] = {}
+        self.unassigned = False
+        self.state: Optional[str] = None
+        self.date_field = "created"
+        self.date_range: Optional[Tuple[date, Optional[date]]] = None
+        self.date_phrase = ""
+        self.group_by: Optional[str] = None
+        self.interval = "month"
+        self.chart_type: Optional[str] = None
+
+
+class StructuredQueryRouter:
+    """
+    Answers aggregation questions ("how many open critical bugs in BILLING?",
+    "tickets by priority", "monthly trend of Blocker issues") directly from a
+    per-collection FieldIndex instead of retrieving TOP_K tickets and calling
+    the LLM.
+    - The index is built from the collection's current generation and rebuilt
+      when a new generation is published (sharded collections: after each
+      post-commit); post-commit also warms it in the background
+    - A question is routed here only if it has a count/distribution/trend
+      intent and every remaining word is a field value, field name or filler;
+      open-ended or free-text questions fall back to RAG
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+
+    # ---------- Index ----------
+
+    def _source(self, store) -> Tuple[Any, Any]:
+        """(generation or None, payloads) for a store."""
+        if hasattr(store, "snapshot"):
+            generation = store.snapshot()
+            return generation, generation.live_payloads()
+        return None, store.get_all_payloads()
+
+    def _is_current(self, entry: Optional[Dict[str, Any]], collection: str, generation) -> bool:
+        if entry is None or entry["version"] != self._versions.get(collection, 0):
+            return False
+        if generation is None:
+            return entry["generation"] is None
+        return entry["generation"] is not None and entry["generation"]() is generation
+
+    def get_index(self, collection: str) -> FieldIndex:
+        """The collection's field index, (re)built if its generation changed."""
+        store = collection_manager.get(collection)
+        generation = store.snapshot() if hasattr(store, "snapshot") else None
+        entry = self._entries.get(collection)
+        if self._is_current(entry, collection, generation):
+            return entry["index"]
+
+        lock = self._locks.setdefault(collection, threading.Lock())
+        with lock:
+            entry = self._entries.get(collection)
+            generation, payloads = self._source(store)
+            if self._is_current(entry, collection, generation):
+                return entry["index"]
+            started = time.time()
+            version = self._versions.get(collection, 0)
+            index = FieldIndex(payloads)
+            ref = None
+            if generation is not None:
+                # Drop the entry once its generation is gone (new publish or eviction)
+                ref = weakref.ref(generation, lambda _, c=collection: self._drop(c, index))
+            self._entries[collection] = {"index": index, "generation": ref, "version": version}
+            logger.info(f"Built field index for '{collection}': {index.size} tickets, "
+                        f"{index.memory_bytes()} bytes in {time.time() - started:.2f}s")
+            return index
+
+    def _drop(self, collection: str, index: FieldIndex):
+        entry = self._entries.get(collection)
+        if entry is not None and entry["index"] is index:
+            self._entries.pop(collection, None)
+
+    def invalidate(self, collection: str):
+        """Force a rebuild on next use (sharded stores have no generation to compare)."""
+        self._versions[collection] = self._versions.get(collection, 0) + 1
+
+    # ---------- Parsing ----------
+
+    def parse(self, question: str, index: FieldIndex, today: Optional[date] = None) -> Optional[StructuredQuery]:
+        """
+        Parse a question against the index vocabulary; None if it isn't a structured question.
+        Relative dates ("this month") count from `today` (UTC date by default).
+        """
+        text = (question or "").lower()
+        if not text.strip() or _OPEN_ENDED_RE.search(text):
+            return None
+        query = StructuredQuery()
+
+        # People and dates first; their words are removed before value matching
+        for verb, name in _PERSON_RE.findall(text):
+            field = "assignee" if verb == "assigned to" else "reporter"
+            code = index.lookup[field].get(_norm(name))
+            if code is None:
+                return None
+            query.filters.setdefault(field, []).append(code)
+        text = _PERSON_RE.sub(" ", text)
+        if re.search(r"\bunassigned\b", text):
+            query.unassigned = True
+            text = re.sub(r"\bunassigned\b", " ", text)
+        text = self._parse_dates(text, query, today or datetime.now(timezone.utc).date())
+
+        # Field values, state words and field names, longest phrase first
+        tokens = _TOKEN_RE.findall(text)
+        leftover: List[str] = []
+        named_fields: List[str] = []
+        i = 0
+        while i < len(tokens):
+            matched = 0
+            for n in range(min(4, len(tokens) - i), 0, -1):
+                phrase = " ".join(tokens[i:i + n])
+                if n == 1 and phrase in _STATE_WORDS:
+                    query.state = _STATE_WORDS[phrase]
+                    matched = 1
+                    break
+                field = next((f for f in VALUE_FIELDS if phrase in index.lookup[f]), None)
+                if field is not None:
+                    code = index.lookup[field][phrase]
+                    if code not in query.filters.get(field, []):
+                        query.filters.setdefault(field, []).append(code)
+                    matched = n
+                    break
+                alias = next((f for f, aliases in FIELD_ALIASES.items() if phrase in aliases), None)
+                if alias is not None:
+                    named_fields.append(alias)
+                    matched = n
+                    break
+            if matched:
+                i += matched
+            else:
+                leftover.append(tokens[i])
+                i += 1
+        residual = " ".join(leftover)
+
+        unknown = [w for w in leftover if w not in _FILLER and w not in _GROUP_WORDS and not w.isdigit() and len(w) > 2]
+        if unknown:
+            return None
+
+        # Intent: trend > distribution > count
+        query.chart_type = extract_chart_intent(residual)
+        trend = _TREND_RE.search(residual)
+        group = _GROUP_RE.search(text)
+        if query.chart_type == "line" or trend:
+            query.kind = "trend"
+            interval = next((g for g in (trend.groups() if trend else ()) if g), "month")
+            query.interval = {"daily": "day", "weekly": "week", "monthly": "month"}.get(interval, interval)
+            query.chart_type = "line"
+        elif group or query.chart_type in ("bar", "pie"):
+            query.kind = "distribution"
+            if group:
+                alias = group.group(1)
+                query.group_by = next(f for f, aliases in FIELD_ALIASES.items() if alias in aliases)
+            else:
+                # "status distribution": the named field that isn't also a filter; status by default
+                candidates = [f for f in named_fields if f not in query.filters] or ["status"]
+                query.group_by = candidates[0]
+            query.chart_type = query.chart_type if query.chart_type in ("bar", "pie") else "bar"
+        elif _COUNT_RE.search(residual):
+            query.kind = "count"
+            query.chart_type = None
+        else:
+            return None
+        return query
+
+    def _parse_dates(self, text: str, query: StructuredQuery, today: date) -> str:
+        for kind, pattern in _TIME_PATTERNS:
+            match = pattern.search(text)
+            if not match:
+                continue
+            verb = match.group(1)
+            if kind == "last" and match.group(2) == "last" and not match.group(3) and match.group(4) != "day":
+                # "last month" is the previous calendar month (likewise week and year), not a rolling window
+                unit = match.group(4)
+                if unit == "week":
+                    end = today - timedelta(days=today.weekday() + 1)
+                    start = end - timedelta(days=6)
+                    query.date_phrase = f"in the week of {start.isoformat()}"
+                elif unit == "month":
+                    end = today.replace(day=1) - timedelta(days=1)
+                    start = end.replace(day=1)
+                    query.date_phrase = f"in {start.strftime('%B %Y')}"
+                else:
+                    start, end = date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+                    query.date_phrase = f"in {today.year - 1}"
+                query.date_range = (start, end)
+            elif kind == "last":
+                # "past month", "last 3 weeks": a rolling window, worded in days so it reads as one
+                days = {"day": 1, "week": 7, "month": 30, "year": 365}[match.group(4)] * int(match.group(3) or 1)
+                query.date_range = (today - timedelta(days=days), None)
+                query.date_phrase = "in the last day" if days == 1 else f"in the last {days} days"
+            elif kind == "this":
+                unit = match.group(2)
+                if unit == "week":
+                    start = today - timedelta(days=today.weekday())
+                elif unit == "month":
+                    start = today.replace(day=1)
+                else:
+                    start = today.replace(month=1, day=1)
+                query.date_range = (start, None)
+                query.date_phrase = f"this {unit}"
+            elif kind == "year":
+                year = int(match.group(2))
+                query.date_range = (date(year, 1, 1), date(year, 12, 31))
+                query.date_phrase = f"in {year}"
+            else:
+                value = match.group(2)
+                try:
+                    start = datetime.strptime(value if len(value) == 10 else value + "-01", "%Y-%m-%d").date()
+                except ValueError:
+                    continue
+                query.date_range = (start, None)
+                query.date_phrase = f"since {value}"
+            if verb in ("resolved", "closed", "fixed"):
+                query.date_field = "resolved"
+            text = text[:match.start()] + " " + text[match.end():]
+            break
+        return text
+
+    # ---------- Evaluation ----------
+
+    def _mask(self, query: StructuredQuery, index: FieldIndex) -> np.ndarray:
+        mask = np.ones(index.size, dtype=bool)
+        for field, codes in query.filters.items():
+            mask &= np.isin(index.codes[field], codes)
+        if query.unassigned:
+            mask &= index.codes["assignee"] < 0
+        if query.state == "open":
+            mask &= index.has_status & ~index.closed
+        elif query.state == "closed":
+            mask &= index.closed
+        if query.date_range is not None:
+            dates = index.dates[query.date_field]
+            start, end = query.date_range
+            mask &= dates >= np.datetime64(start)
+            if end is not None:
+                mask &= dates <= np.datetime64(end)
+        return mask
+
+    def _describe(self, query: StructuredQuery, index: FieldIndex, count: int) -> str:
+        def values(field: str) -> str:
+            return "/".join(index.labels[field][c] for c in query.filters.get(field, []))
+
+        words = []
+        if query.state:
+            words.append(query.state)
+        for field in ("priority", "symptom_severity"):
+            if field in query.filters:
+                words.append(values(field))
+        words.append(f"{values('issue_type')} {_tickets(count)}" if "issue_type" in query.filters else _tickets(count))
+        if "status" in query.filters:
+            words.append(f"with status {values('status')}")
+        for field, phrase in (("project", "in project"), ("component", "in component"), ("module", "in module"),
+                              ("assignee", "assigned to"), ("reporter", "reported by")):
+            if field in query.filters:
+                words.append(f"{phrase} {values(field)}")
+        if query.unassigned:
+            words.append("that are unassigned")
+        if query.date_phrase:
+            words.append(f"{query.date_field} {query.date_phrase}")
+        return " ".join(words)
+
+    def _recent_ids(self, mask: np.ndarray, index: FieldIndex, limit: int = 3) -> List[str]:
+        rows = np.flatnonzero(mask)
+        created = index.dates["created"][rows]
+        dated = rows[~np.isnat(created)]
+        if len(dated):
+            rows = dated[np.argsort(index.dates["created"][dated], kind="stable")[::-1]]
+        return [str(index.ticket_ids[i]) for i in rows[:limit] if index.ticket_ids[i] is not None]
+
+    def _distribution(self, query: StructuredQuery, index: FieldIndex, mask: np.ndarray) -> List[Dict[str, Any]]:
+        codes = index.codes[query.group_by][mask]
+        counts = np.bincount(codes + 1, minlength=len(index.labels[query.group_by]) + 1)
+        labels = ["Unknown"] + index.labels[query.group_by]
+        points = [{"label": labels[i], "value": int(c)} for i, c in enumerate(counts) if c]
+        points.sort(key=lambda p: -p["value"])
+        if len(points) > _MAX_CHART_POINTS:
+            other = sum(p["value"] for p in points[_MAX_CHART_POINTS - 1:])
+            points = points[:_MAX_CHART_POINTS - 1] + [{"label": "Other", "value": other}]
+        return points
+
+    def _trend(self, query: StructuredQuery, index: FieldIndex, mask: np.ndarray) -> List[Dict[str, Any]]:
+        dates = index.dates[query.date_field][mask]
+        dates = dates[~np.isnat(dates)]
+        if query.interval == "week":
+            # datetime64[W] counts weeks from 1970-01-01, a Thursday; shift to ISO (Monday) weeks
+            # and label each bucket with its Monday
+            shift = np.timedelta64(3, "D")
+            buckets = (dates + shift).astype("datetime64[W]").astype("datetime64[D]") - shift
+        else:
+            buckets = dates.astype("datetime64[D]" if query.interval == "day" else "datetime64[M]")
+        buckets, counts = np.unique(buckets, return_counts=True)
+        points = [{"label": str(b), "value": int(c)} for b, c in zip(buckets, counts)]
+        return points[-_MAX_CHART_POINTS:]
+
+    def evaluate(self, query: StructuredQuery, index: FieldIndex, collection: str) -> Dict[str, Any]:
+        mask = self._mask(query, index)
+        matched = int(mask.sum())
+        description = self._describe(query, index, matched)
+        share = f"{100.0 * matched / index.size:.1f}%" if index.size else "0%"
+        sources = self._recent_ids(mask, index)
+
+        if query.kind == "count":
+            answer = (f"There {'is' if matched == 1 else 'are'} {matched:,} {description} ({share} of the "
+                      f"{index.size:,} {_tickets(index.size)} in collection '{collection}').")
+            return {"answer": answer, "sources": sources}
+
+        if query.kind == "distribution":
+            points = self._distribution(query, index, mask)
+            field = FIELD_ALIASES[query.group_by][0]
+            top = ", ".join(f"{p['label']} {p['value']:,} ({100.0 * p['value'] / matched:.1f}%)"
+                            for p in points[:5]) if matched else "none"
+            answer = f"{matched:,} {description} by {field}: {top}."
+            if len(points) > 5:
+                answer += f" ({len(points) - 5} more in the chart.)"
+            return {"answer": answer, "chart_type": query.chart_type, "chart_data": points, "sources": sources}
+
+        points = self._trend(query, index, mask)
+        if not points:
+            answer = f"No {self._describe(query, index, 0)} with a {query.date_field} date to chart."
+        else:
+            peak = max(points, key=lambda p: p["value"])
+            answer = (f"{matched:,} {description} in total, bucketed per {query.interval} by {query.date_field} "
+                      f"date from {points[0]['label']} to {points[-1]['label']}: peak of {peak['value']:,} in "
+                      f"{peak['label']}, {points[-1]['value']:,} in {points[-1]['label']}.")
+        return {"answer": answer, "chart_type": "line", "chart_data": points, "sources": sources}
+
+    def answer(self, question: str, collection: str) -> Optional[Dict[str, Any]]:
+        """build_query_response() kwargs for a structured question, or None to fall back to RAG."""
+        if not settings.STRUCTURED_QUERIES_ENABLED:
+            return None
+        index = self.get_index(collection)
+        if index.size == 0:
+            return None
+        query = self.parse(question, index)
+        if query is None:
+            return None
+        logger.debug("Structured %s query on '%s': filters=%s state=%s group_by=%s",
+                     query.kind, collection, query.filters, query.state, query.group_by)
+        return self.evaluate(query, index, collection)
+
+    # ---------- Background ----------
+
+    def is_running(self, collection: str) -> bool:
+        thread = self._threads.get(collection)
+        return thread is not None and thread.is_alive()
+
+    def start(self, collection: str) -> bool:
+        """Invalidate and rebuild the index in the background; False if a build is already running."""
+        self.invalidate(collection)
+        if self.is_running(collection):
+            return False
+        thread = threading.Thread(target=self._run, args=(collection,), daemon=True)
+        self._threads[collection] = thread
+        thread.start()
+        return True
+
+    def _run(self, collection: str):
+        try:
+            self.get_index(collection)
+        except Exception as e:
+            logger.error(f"Field index build for '{collection}' failed: {str(e)}")
+
+
+# Global instance
+structured_queries = StructuredQueryRouter()
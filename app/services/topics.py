@@ -0,0 +1,268 @@
+"""Offline topic clustering of a collection's tickets (Faiss k-means)"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.collection_manager import collection_manager
+from app.utils.logger import setup_logger
+
+import json
+import math
+import os
+import re
+import threading
+import time
+import faiss
+import numpy as np
+import pandas as pd
+
+logger = setup_logger(__name__)
+
+# Phrases that mark a corpus-wide question retrieval of TOP_K tickets can't answer
+BROAD_QUESTION_PATTERNS = [
+    r"\b(most|more) (common|frequent|recurring)\b",
+    r"\bmain (issues|problems|themes|topics|areas)\b",
+    r"\btop (issues|problems|themes|topics|categories)\b",
+    r"\b(common|recurring|frequent|biggest|major) (issues|problems|themes|complaints|pain points)\b",
+    r"\bwhat (are|were) (people|users|customers|teams) (reporting|complaining about)\b",
+    r"\b(themes|topics|categories) (in|across|of) (the )?(tickets|backlog|issues)\b",
+    r"\boverview of (all |the )?(tickets|issues|backlog)\b",
+]
+_BROAD_RE = re.compile("|".join(BROAD_QUESTION_PATTERNS), re.IGNORECASE)
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9_-]{2,}")
+_STOPWORDS = {
+    "the", "and", "for", "with", "not", "when", "from", "that", "this", "are", "was", "after",
+    "into", "on", "in", "of", "to", "is", "be", "can", "cannot", "does", "doesn", "fails", "should",
+    "while", "issue", "error", "update", "updated", "ticket", "new", "add", "use", "using",
+}
+
+
+def is_broad_question(query: str) -> bool:
+    """True for corpus-wide questions ("what are the most common problems ...")."""
+    return bool(_BROAD_RE.search(query or ""))
+
+
+class TopicClusterer:
+    """
+    Groups a collection's tickets into topics with spherical Faiss k-means.
+    - Runs offline after ingest/sync (see app.services.post_commit)
+    - Persists per-topic size, keywords, field breakdowns and the tickets
+      closest to each centroid (topics.json, held in memory until the file
+      changes); per-ticket assignments go to topic_assignments.json, which
+      the request path never reads
+    - format_context() renders the topics as compact generator context for
+      broad questions, in place of TOP_K ad-hoc retrieval
+    """
+
+    # Payload fields clustering summarizes; nothing else is read from the store
+    FIELDS = ["ticket_id", "summary", "created_date", "project", "priority", "status", "component"]
+
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._pending: set = set()  # collections with a run requested mid-run
+        self._runs_lock = threading.Lock()
+        self._cache: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+
+    # ---------- Persistence ----------
+
+    def _path(self, collection: str) -> str:
+        return os.path.join(collection_manager.artifacts_dir(collection), "topics.json")
+
+    def _assignments_path(self, collection: str) -> str:
+        return os.path.join(collection_manager.artifacts_dir(collection), "topic_assignments.json")
+
+    def load(self, collection: str) -> Optional[Dict[str, Any]]:
+        """The topics of the last clustering run; shared, do not mutate."""
+        path = self._path(collection)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._cache.pop(collection, None)
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(collection)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        result.pop("assignments", None)  # topics.json written before assignments had their own file
+        self._cache[collection] = (key, result)
+        return result
+
+    def load_assignments(self, collection: str) -> Dict[str, int]:
+        """ticket_id -> topic_id of the last clustering run."""
+        path = self._assignments_path(collection)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write(path: str, data: Dict[str, Any]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    def _save(self, collection: str, result: Dict[str, Any], assignments: Dict[str, int]):
+        self._write(self._assignments_path(collection), assignments)
+        self._write(self._path(collection), result)
+
+    # ---------- Clustering ----------
+
+    def refresh(self, collection: str) -> Optional[Dict[str, Any]]:
+        """Recluster a collection and persist the topics; None if it has too few tickets."""
+        lock = self._locks.setdefault(collection, threading.Lock())
+        with lock:
+            started = time.time()
+            store = collection_manager.get(collection)
+            vectors, columns = store.get_vectors_with_columns(self.FIELDS)
+            vectors = np.ascontiguousarray(vectors, dtype="float32")
+            n, d = vectors.shape if vectors.ndim == 2 else (0, 0)
+            k = min(settings.TOPIC_CLUSTERS, n // 2)
+            if k < 2:
+                logger.info(f"Skipping topic clustering for '{collection}': {n} tickets")
+                return None
+
+            kmeans = faiss.Kmeans(d, k, niter=settings.TOPIC_KMEANS_ITERATIONS, spherical=True, seed=1234)
+            kmeans.train(vectors)
+            similarity, assignment = kmeans.index.search(vectors, 1)
+            similarity, assignment = similarity[:, 0], assignment[:, 0]
+
+            topics = self._summarize(columns, assignment, similarity, k)
+            result = {
+                "collection": collection,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "tickets_total": n,
+                "num_topics": len(topics),
+                "duration_seconds": round(time.time() - started, 2),
+                "topics": topics,
+            }
+            assignments = {
+                str(tid or f"#{i}"): int(c) for i, (tid, c) in enumerate(zip(columns["ticket_id"], assignment))
+            }
+            self._save(collection, result, assignments)
+            logger.info(f"Clustered {n} tickets in '{collection}' into {len(topics)} topics "
+                        f"in {result['duration_seconds']}s")
+            return result
+
+    @staticmethod
+    def _keywords(summaries: List[str], corpus_counts: Counter, corpus_total: int, top: int) -> List[str]:
+        """Words over-represented in a topic's summaries relative to the whole corpus."""
+        counts = Counter(w for s in summaries for w in set(_WORD_RE.findall(s.lower())) if w not in _STOPWORDS)
+        total = max(1, len(summaries))
+        scored = [
+            (c * math.log((c / total) / (corpus_counts[w] / corpus_total) + 1.0), w)
+            for w, c in counts.items() if c >= 2
+        ]
+        return [w for _, w in sorted(scored, reverse=True)[:top]]
+
+    def _summarize(self, columns: Dict[str, List[Any]], assignment: np.ndarray,
+                   similarity: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        summaries = [str(s or "") for s in columns["summary"]]
+        corpus_counts = Counter(
+            w for s in summaries for w in set(_WORD_RE.findall(s.lower())) if w not in _STOPWORDS
+        )
+        created = pd.to_datetime(pd.Series(columns["created_date"]), errors="coerce", utc=True)
+        recent_cutoff = pd.Timestamp(datetime.now(timezone.utc) - timedelta(days=settings.TOPIC_RECENT_DAYS))
+        recent = (created >= recent_cutoff).to_numpy()
+
+        topics = []
+        for topic_id in range(k):
+            members = np.flatnonzero(assignment == topic_id)
+            if len(members) == 0:
+                continue
+            closest = members[np.argsort(-similarity[members])[:settings.TOPIC_REPRESENTATIVES]]
+            breakdown = {
+                field: dict(Counter(columns[field][i] or "Unknown" for i in members).most_common(3))
+                for field in ("project", "priority", "status", "component")
+            }
+            topics.append({
+                "size": int(len(members)),
+                "recent_count": int(recent[members].sum()),
+                "keywords": self._keywords([summaries[i] for i in members], corpus_counts, len(summaries), 5),
+                "breakdown": breakdown,
+                "representatives": [
+                    {
+                        "ticket_id": columns["ticket_id"][i],
+                        "summary": columns["summary"][i],
+                        "similarity": round(float(similarity[i]), 4),
+                    }
+                    for i in closest
+                ],
+            })
+
+        topics.sort(key=lambda t: -t["size"])
+        for i, topic in enumerate(topics):
+            topic["topic_id"] = i
+        return topics
+
+    # ---------- Generator context ----------
+
+    def format_context(self, collection: str, limit: int = None) -> Optional[str]:
+        """Compact text rendering of the largest topics, or None if none are stored."""
+        result = self.load(collection)
+        if not result or not result.get("topics"):
+            return None
+        limit = limit or settings.TOPIC_CONTEXT_LIMIT
+        total = result["tickets_total"]
+        lines = [
+            f"Topic overview of {total} tickets (clustered {result['updated_at'][:10]}; "
+            f"'recent' = created in the last {settings.TOPIC_RECENT_DAYS} days):",
+            "",
+        ]
+        for topic in result["topics"][:limit]:
+            share = 100.0 * topic["size"] / total if total else 0.0
+            lines.append(f"[Topic {topic['topic_id'] + 1}] {topic['size']} tickets ({share:.1f}%), "
+                         f"{topic['recent_count']} recent")
+            if topic["keywords"]:
+                lines.append(f"Keywords: {', '.join(topic['keywords'])}")
+            for field, counts in topic["breakdown"].items():
+                lines.append(f"{field.capitalize()}: " + ", ".join(f"{k} ({v})" for k, v in counts.items()))
+            for rep in topic["representatives"]:
+                lines.append(f"- {rep['ticket_id']}: {rep['summary']}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def representative_ids(self, collection: str, limit: int = None) -> List[str]:
+        result = self.load(collection) or {}
+        limit = limit or settings.TOPIC_CONTEXT_LIMIT
+        return [t["representatives"][0]["ticket_id"] for t in result.get("topics", [])[:limit] if t["representatives"]]
+
+    # ---------- Background ----------
+
+    def is_running(self, collection: str) -> bool:
+        return collection in self._threads
+
+    def start(self, collection: str) -> bool:
+        """
+        Recluster in the background. If a run is already in progress, returns
+        False and queues one more run after it, so tickets committed mid-run
+        are clustered without waiting for the next trigger.
+        """
+        with self._runs_lock:
+            if collection in self._threads:
+                self._pending.add(collection)
+                return False
+            thread = threading.Thread(target=self._run, args=(collection,), daemon=True)
+            self._threads[collection] = thread
+        thread.start()
+        return True
+
+    def _run(self, collection: str):
+        while True:
+            try:
+                self.refresh(collection)
+            except Exception as e:
+                logger.error(f"Topic clustering for '{collection}' failed: {str(e)}")
+            with self._runs_lock:
+                if collection not in self._pending:
+                    del self._threads[collection]
+                    return
+                self._pending.discard(collection)
+
+
+# Global instance
+topic_clusterer = TopicClusterer()
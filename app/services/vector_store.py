@@ -1,67 +1,696 @@
 """Faiss vector store service (replaces Qdrant)"""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, FrozenSet, Iterable, Iterator, Optional, Sequence, Set, Tuple, Union
 from app.config import settings
+from app.services.payload_store import CompactPayloads, payload_column, ticket_key
 from app.utils.logger import setup_logger
 
 import os
+import base64
+import itertools
 import json
+import threading
+import uuid
+import weakref
 import faiss
 import numpy as np
 
 logger = setup_logger(__name__)
 
+# Python dict/str overhead relative to the JSON encoding of a payload (COMPACT_PAYLOADS=false)
+PAYLOAD_MEMORY_FACTOR = 4
+
+
+# First-pass index per VECTOR_STORAGE mode; everything but float32 is rescored
+# against full-precision vectors kept on disk
+STORAGE_MODES = ("float32", "float16", "int8", "pca")
+# Modes whose index must be trained on a sample before vectors can be added
+TRAINED_MODES = ("int8", "pca")
+# Generations of touched keys kept for changes_since()
+WRITE_LOG_SIZE = 1024
+# faiss_ids.json layout; bumped when key normalization changes (v2: ticket_key, v3: repeated keys)
+IDS_FORMAT_VERSION = 3
+
+
+class EmbeddingModelChanged(RuntimeError):
+    """The collection switched embedding models between embedding a query and searching it."""
+
 
 def _normalize(vectors: np.ndarray) -> np.ndarray:
     """L2-normalize vectors so inner product equals cosine similarity."""
     norms = np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
     return vectors / norms
 
+def new_index(vector_size: int, storage: str) -> faiss.Index:
+    """
+    Build an empty first-pass index for a storage mode.
+    - float32: exact IndexFlatIP (4 bytes/dim)
+    - float16: scalar-quantized fp16 (2 bytes/dim)
+    - int8: scalar-quantized 8-bit, trained min/max per dim (1 byte/dim)
+    - pca: PCA down to PCA_DIM dims + flat L2 (L2 on unit vectors ranks like cosine)
+    """
+    if storage == "float32":
+        return faiss.IndexFlatIP(vector_size)  # inner product
+    if storage == "float16":
+        return faiss.IndexScalarQuantizer(vector_size, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    if storage == "int8":
+        return faiss.IndexScalarQuantizer(vector_size, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    if storage == "pca":
+        reduced = min(settings.PCA_DIM, vector_size)
+        return faiss.IndexPreTransform(faiss.PCAMatrix(vector_size, reduced), faiss.IndexFlatL2(reduced))
+    raise ValueError(f"Unknown VECTOR_STORAGE '{storage}'. Use one of {STORAGE_MODES}")
+
+def train_size(vector_size: int, storage: str) -> int:
+    """
+    Vectors a trained storage mode waits for before training its index: at
+    least QUANTIZER_TRAIN_SIZE, and never fewer than PCA outputs dimensions.
+    Until then the vectors are served exactly from a flat index.
+    """
+    if storage == "pca":
+        return max(settings.QUANTIZER_TRAIN_SIZE, min(settings.PCA_DIM, vector_size))
+    return settings.QUANTIZER_TRAIN_SIZE
+
+def train_index(vectors: np.ndarray, storage: str) -> faiss.Index:
+    """A first-pass index for `storage` trained on `vectors`, with them added."""
+    index = new_index(vectors.shape[1], storage)
+    index.train(vectors)  # type: ignore
+    index.add(vectors)  # type: ignore
+    return index
+
+def _as_cosine(index: faiss.Index, scores: np.ndarray) -> np.ndarray:
+    """Map first-pass scores to cosine (L2 indexes return squared distances of unit vectors)."""
+    if index.metric_type == faiss.METRIC_L2:
+        return 1.0 - scores / 2.0
+    return scores
+
+class IndexBuilder:
+    """
+    Stages the next index for a store off to the side.
+    Searches keep using the store's current index until commit() swaps it in.
+    """
+
+    def __init__(self, store: "VectorStoreService", vector_size: int, model: Optional[str] = None):
+        self.store = store
+        self.dimension = vector_size
+        self.model = model or store.embedding_model
+        self.index: Optional[faiss.Index] = new_index(vector_size, store.storage)
+        self.payloads: List[Dict[str, Any]] = []
+        self._payload_parts: List[CompactPayloads] = []  # column batches (columnar ingest), in order before self.payloads
+        # Quantizers/PCA need a training sample before vectors can be added
+        self._pending: List[np.ndarray] = []
+        self._pending_count = 0
+        self.vectors_path: Optional[str] = None
+        self._vectors_file = None
+        if store.keeps_full_vectors:
+            os.makedirs(os.path.dirname(store.vectors_path), exist_ok=True)
+            self.vectors_path = f"{store.vectors_path}.{uuid.uuid4().hex}.staging"
+            self._vectors_file = open(self.vectors_path, "wb")
+
+    def add(self, vectors: List[List[float]], payloads: Union[List[Dict[str, Any]], CompactPayloads]) -> int:
+        """Add vectors with metadata (dicts, or an already column-encoded batch) to the staged index."""
+        if self.index is None:
+            raise RuntimeError("Index build was aborted")
+        arr = _normalize(np.array(vectors, dtype="float32"))
+        if self._vectors_file is not None:
+            self._vectors_file.write(arr.tobytes())
+        if self.index.is_trained:  # type: ignore
+            self.index.add(arr)  # type: ignore
+        else:
+            self._pending.append(arr)
+            self._pending_count += len(arr)
+            if self._pending_count >= train_size(self.dimension, self.store.storage):
+                self._train_and_flush()
+        if isinstance(payloads, CompactPayloads):
+            if self.payloads:
+                self._payload_parts.append(CompactPayloads.from_records(self.payloads))
+                self.payloads = []
+            self._payload_parts.append(payloads)
+        else:
+            self.payloads.extend(payloads)
+        return len(vectors)
+
+    def _train_and_flush(self):
+        if not self._pending:
+            return
+        sample = np.concatenate(self._pending)
+        if len(sample) >= train_size(self.dimension, self.store.storage):
+            self.index = train_index(sample, self.store.storage)
+        else:
+            # Too small a sample to train on (PCA fails outright below PCA_DIM);
+            # upserts train the compact index once the collection is large enough
+            self.index = faiss.IndexFlatIP(self.dimension)
+            self.index.add(sample)
+            logger.warning(
+                f"Only {len(sample)} vectors for {self.store.storage} storage in '{self.store.name}'; "
+                f"serving them from an exact flat index until {train_size(self.dimension, self.store.storage)} exist"
+            )
+        self._pending, self._pending_count = [], 0
+
+    def commit(self) -> int:
+        """Publish the staged index + payloads as the store's current data."""
+        if self.index is None:
+            raise RuntimeError("Index build was aborted")
+        self._train_and_flush()
+        if self._vectors_file is not None:
+            self._vectors_file.close()
+            self._vectors_file = None
+        count = int(self.index.ntotal)  # type: ignore
+        payloads = self.payloads
+        if self._payload_parts:
+            parts = self._payload_parts + ([CompactPayloads.from_records(payloads)] if payloads else [])
+            payloads = CompactPayloads.concat_all(parts)
+        self.store._publish(self.index, payloads, self.dimension, self.vectors_path, model=self.model)
+        self.index = None
+        return count
+
+    def abort(self):
+        """Discard the staged index; the store is left untouched."""
+        self.index = None
+        self.payloads = []
+        self._payload_parts = []
+        self._pending = []
+        if self._vectors_file is not None:
+            self._vectors_file.close()
+            self._vectors_file = None
+        if self.vectors_path and os.path.exists(self.vectors_path):
+            os.unlink(self.vectors_path)
+
+def build_key_rows(payloads: List[Dict[str, Any]], key: str = "ticket_id") -> Tuple[Dict[str, int], Dict[str, Tuple[int, ...]]]:
+    """
+    Primary key -> vector id (payload position), where a repeated key maps to its
+    latest entry, plus every position of each key that is stored more than once.
+    """
+    ids: Dict[str, int] = {}
+    dupes: Dict[str, List[int]] = {}
+    for i, v in enumerate(payload_column(payloads, key)):
+        if v is None:
+            continue
+        k = ticket_key(v)
+        if k in ids:
+            dupes.setdefault(k, [ids[k]]).append(i)
+        ids[k] = i
+    return ids, {k: tuple(rows) for k, rows in dupes.items()}
+
+def build_id_map(payloads: List[Dict[str, Any]], key: str = "ticket_id") -> Dict[str, int]:
+    """Primary key -> vector id (payload position); a repeated key maps to its latest entry."""
+    return build_key_rows(payloads, key)[0]
+
+class IndexGeneration:
+    """
+    One published state of a store, in two parts:
+    - base: index + aligned payloads (+ full vectors) as last saved, the
+      ticket_id -> vector id map (`ids`, with `dupes` for keys stored more than
+      once) and the embedding model the vectors were produced with. Payloads
+      are a CompactPayloads view unless COMPACT_PAYLOADS is off.
+    - delta: what incremental writes changed since: appended rows (`tail_vectors`,
+      `tail_payloads`), removed rows (`dead`) and the live rows of every key a
+      write touched (`overlay`). Folded into a new base once it outgrows
+      DELTA_MAX_ROWS (see VectorStoreService._compact_locked).
+    Row ids number the base rows first, then the tail; removed rows keep their
+    id until compaction. Consecutive generations share their base, so a write
+    costs O(delta) rather than O(collection).
+    Never mutated after publication; writers build the next generation instead.
+    """
+
+    __slots__ = (
+        "number", "index", "payloads", "dimension", "full_vectors", "payloads_nbytes", "ids", "dupes", "model",
+        "base_id", "tail_vectors", "tail_payloads", "dead", "overlay", "tail_live", "search_params", "__weakref__",
+    )
+
+    def __init__(
+        self,
+        number: int,
+        index: Optional[faiss.Index] = None,
+        payloads: Optional[List[Dict[str, Any]]] = None,
+        dimension: Optional[int] = None,
+        full_vectors: Optional[np.ndarray] = None,
+        payloads_nbytes: int = 0,
+        ids: Optional[Dict[str, int]] = None,
+        dupes: Optional[Dict[str, Tuple[int, ...]]] = None,
+        model: Optional[str] = None,
+        base_id: Optional[str] = None,
+        tail_vectors: Optional[np.ndarray] = None,
+        tail_payloads: Tuple[Dict[str, Any], ...] = (),
+        dead: FrozenSet[int] = frozenset(),
+        overlay: Optional[Dict[str, Tuple[int, ...]]] = None,
+    ):
+        self.number = number
+        self.index = index
+        self.payloads = payloads if payloads is not None else []
+        self.dimension = dimension
+        self.full_vectors = full_vectors
+        self.payloads_nbytes = payloads_nbytes
+        if ids is None:
+            ids, dupes = build_key_rows(self.payloads)
+        self.ids = ids
+        self.dupes = dupes or {}
+        self.model = model or settings.EMBEDDING_MODEL
+        self.base_id = base_id or uuid.uuid4().hex  # ties write-ahead log entries to the base they apply to
+        self.tail_vectors = tail_vectors if tail_vectors is not None else np.zeros((0, dimension or 0), dtype="float32")
+        self.tail_payloads = tail_payloads
+        self.dead = dead
+        self.overlay = overlay or {}
+
+        base_rows = len(self.payloads)
+        keep = np.ones(len(tail_payloads), dtype=bool)
+        keep[np.array([r - base_rows for r in dead if r >= base_rows], dtype="int64")] = False
+        self.tail_live = np.flatnonzero(keep)
+        self.search_params = None
+        dead_base = np.array(sorted(r for r in dead if r < base_rows), dtype="int64")
+        if len(dead_base):
+            # Removed base rows are skipped inside the Faiss search; the params only
+            # reference their selectors, so they are kept alive alongside
+            batch = faiss.IDSelectorBatch(dead_base)
+            excluded = faiss.IDSelectorNot(batch)
+            self.search_params = (faiss.SearchParameters(sel=excluded), excluded, batch)
+
+    @property
+    def base_rows(self) -> int:
+        return len(self.payloads)
+
+    @property
+    def size(self) -> int:
+        """Row ids in use, removed rows included."""
+        return self.base_rows + len(self.tail_payloads)
+
+    @property
+    def count(self) -> int:
+        """Live records."""
+        return self.size - len(self.dead)
+
+    @property
+    def delta_rows(self) -> int:
+        return len(self.tail_payloads) + len(self.dead)
+
+    def rows_of(self, key: str) -> Tuple[int, ...]:
+        """Live rows stored under a ticket_id key, oldest first."""
+        rows = self.overlay.get(key)
+        if rows is None:
+            rows = self.dupes.get(key) or ((self.ids[key],) if key in self.ids else ())
+        return rows
+
+    def row_of(self, key: str) -> Optional[int]:
+        """The latest live row stored under a ticket_id key."""
+        rows = self.rows_of(key)
+        return rows[-1] if rows else None
+
+    def payload(self, row: int) -> Dict[str, Any]:
+        if row < self.base_rows:
+            return self.payloads[row]
+        return self.tail_payloads[row - self.base_rows]
+
+    def vector(self, row: int) -> np.ndarray:
+        """A row's normalized vector: full precision when kept, otherwise decoded from the index."""
+        if row >= self.base_rows:
+            return self.tail_vectors[row - self.base_rows]
+        if self.full_vectors is not None:
+            return np.asarray(self.full_vectors[row], dtype="float32")
+        return self.index.reconstruct(row)  # type: ignore
+
+    def live_rows(self) -> Iterator[int]:
+        return (row for row in range(self.size) if row not in self.dead)
+
+    def _live_base_rows(self) -> np.ndarray:
+        keep = np.ones(self.base_rows, dtype=bool)
+        keep[np.array([r for r in self.dead if r < self.base_rows], dtype="int64")] = False
+        return np.flatnonzero(keep)
+
+    def live_payloads(self) -> Sequence[Dict[str, Any]]:
+        """Payloads of the live rows in row order; the base payloads themselves while there is no delta."""
+        if not self.delta_rows:
+            return self.payloads
+        tail = [self.tail_payloads[i] for i in self.tail_live]
+        rows = self._live_base_rows()
+        if isinstance(self.payloads, CompactPayloads):
+            base = self.payloads.take(rows) if len(rows) < self.base_rows else self.payloads
+            return base.extend(tail)
+        return [self.payloads[i] for i in rows] + tail
+
+    def live_vectors(self) -> np.ndarray:
+        """Normalized vectors of the live rows, aligned with live_payloads()."""
+        if self.full_vectors is not None:
+            vectors = np.asarray(self.full_vectors, dtype="float32")
+        elif self.index is not None and self.index.ntotal:  # type: ignore
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)  # type: ignore
+        else:
+            vectors = np.zeros((0, self.dimension or 0), dtype="float32")
+        if not self.delta_rows:
+            return vectors
+        if len(self.dead):
+            vectors = vectors[self._live_base_rows()]
+        return np.concatenate([vectors, self.tail_vectors[self.tail_live]])
+
 class VectorStoreService:
     """
     Manages a Faiss index + sidecar payload store.
     - Index: Faiss IndexFlatIP (cosine via normalization)
     - Payloads: JSON list aligned to vector IDs
+    - Primary keys: ticket_id -> vector id map persisted to faiss_ids.json, for
+      fetching a ticket or searching with its stored vector without re-embedding
+    - Embedding model: recorded per collection in faiss_meta.json (collections
+      without one use EMBEDDING_MODEL); changed only by a migration cutover
     - Persistence: saves/loads index + payloads from disk
+    - Payloads: held column-encoded in memory (see app.services.payload_store);
+      dicts are built only for the rows a caller reads, e.g. top-k results
+    - Rebuilds: begin_rebuild() stages a new index that replaces the current one on commit
+    - Compact storage: with VECTOR_STORAGE float16/int8/pca the index holds reduced
+      vectors for the first pass, and the top RESCORE_FACTOR x limit candidates are
+      rescored against full-precision vectors memory-mapped from faiss_vectors.f32;
+      int8/pca collections are served from an exact flat index until they hold
+      train_size() vectors, then trained once
+    - Concurrency: readers grab the current IndexGeneration once and search it
+      without locks; writers (serialized by _write_lock) publish the next
+      generation with a single reference swap. An old generation is freed when
+      the last in-flight search drops it.
+    - Incremental writes: upserts and deletes share the current base index and
+      only add to a small delta (exact-searched tail rows + removed row ids),
+      appended to faiss_delta.jsonl instead of rewriting the base files; past
+      DELTA_MAX_ROWS the delta is compacted into a new base. Rebuilds, cutovers
+      and reloads publish a new base directly.
+    - Write log: the keys each incremental write touched, for the last
+      WRITE_LOG_SIZE generations, so followers (e.g. a migration's catch-up)
+      can re-read only what changed; see changes_since()
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        payloads_path: Optional[str] = None,
+        name: str = settings.DEFAULT_COLLECTION,
+        storage: Optional[str] = None,
+    ):
 
-        print("FAISS_INDEX_PATH:", settings.FAISS_INDEX_PATH)
-        print("Working directory:", os.getcwd())
+        logger.debug("Opening collection '%s' at %s", name, index_path or settings.FAISS_INDEX_PATH)
 
-        self.index: Optional[faiss.Index] = None
-        self.dimension: Optional[int] = None
-        self.payloads: List[Dict[str, Any]] = []
-        self.index_path = settings.FAISS_INDEX_PATH
-        self.payloads_path = settings.FAISS_PAYLOADS_PATH
+        self.name = name
+        self.index_path = index_path or settings.FAISS_INDEX_PATH
+        self.payloads_path = payloads_path or settings.FAISS_PAYLOADS_PATH
+        self.vectors_path = os.path.join(os.path.dirname(self.index_path), "faiss_vectors.f32")
+        self.ids_path = os.path.join(os.path.dirname(self.index_path), "faiss_ids.json")
+        self.meta_path = os.path.join(os.path.dirname(self.index_path), "faiss_meta.json")
+        self.delta_path = os.path.join(os.path.dirname(self.index_path), "faiss_delta.jsonl")
+        self.storage = (storage or settings.VECTOR_STORAGE).lower()
+        if self.storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown VECTOR_STORAGE '{self.storage}'. Use one of {STORAGE_MODES}")
+        self._write_lock = threading.Lock()
+        self._staged: Dict[str, IndexBuilder] = {}
+        self._generation_count = 0
+        self._live_generations: "weakref.WeakSet[IndexGeneration]" = weakref.WeakSet()
+        self._current = self._new_generation()
 
         self._load_if_exists()
+        self._write_log = (self._current.number, ())  # (complete since, ((generation, keys), ...))
+
+    # ---------- Generations ----------
+
+    def _new_generation(self, **state) -> IndexGeneration:
+        payloads = state.get("payloads")
+        if settings.COMPACT_PAYLOADS and payloads is not None and not isinstance(payloads, CompactPayloads):
+            state["payloads"] = CompactPayloads.from_records(payloads)
+        elif not settings.COMPACT_PAYLOADS and isinstance(payloads, CompactPayloads):
+            state["payloads"] = list(payloads)
+        self._generation_count += 1
+        generation = IndexGeneration(self._generation_count, **state)
+        self._live_generations.add(generation)
+        return generation
+
+    def changes_since(self, number: int) -> Optional[Set[str]]:
+        """
+        Keys (str ticket_id) written or removed by the generations published after
+        generation `number`; None if the log can't tell (trimmed, or a rebuild,
+        reload or cutover replaced the whole collection since).
+        """
+        floor, entries = self._write_log  # replaced, never mutated, so this pair is consistent
+        if number < floor:
+            return None
+        touched: Set[str] = set()
+        for generation, keys in entries:
+            if generation > number:
+                touched.update(keys)
+        return touched
+
+    def _log_write(self, generation: IndexGeneration, keys: Optional[Iterable[str]]):
+        """Record the keys a published generation touched; None restarts the log at it."""
+        if keys is None:
+            self._write_log = (generation.number, ())
+            return
+        floor, entries = self._write_log
+        entries = entries + ((generation.number, frozenset(keys)),)
+        if len(entries) > WRITE_LOG_SIZE:
+            floor, entries = entries[-WRITE_LOG_SIZE - 1][0], entries[-WRITE_LOG_SIZE:]
+        self._write_log = (floor, entries)
+
+    def snapshot(self) -> IndexGeneration:
+        """The current generation; hold on to it to read a consistent view across calls."""
+        return self._current
+
+    # Read-only views of the current generation (index and full_vectors: its base,
+    # without the rows written since the last compaction)
+    @property
+    def index(self) -> Optional[faiss.Index]:
+        return self._current.index
+
+    @property
+    def payloads(self) -> Sequence[Dict[str, Any]]:
+        return self._current.live_payloads()
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._current.dimension
+
+    @property
+    def full_vectors(self) -> Optional[np.ndarray]:
+        return self._current.full_vectors
+
+    @property
+    def embedding_model(self) -> str:
+        """Model that queries and new records for this collection must be embedded with."""
+        return self._current.model
 
     # ---------- Persistence ----------
 
+    def _read(self) -> Optional[IndexGeneration]:
+        """The generation saved on disk with its write-ahead log replayed; None if there is none. Raises if unreadable."""
+        if not (os.path.exists(self.index_path) and os.path.exists(self.payloads_path)):
+            return None
+        index = faiss.read_index(self.index_path)
+        dimension = index.d  # type: ignore[attr-defined]
+        with open(self.payloads_path, "r", encoding="utf-8") as f:
+            payloads = json.load(f)
+        key_rows = self._load_ids(payloads)
+        meta: Dict[str, Any] = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        generation = self._new_generation(
+            index=index,
+            payloads=payloads,
+            dimension=dimension,
+            full_vectors=self._open_full_vectors(index, dimension),
+            payloads_nbytes=os.path.getsize(self.payloads_path),
+            ids=key_rows[0] if key_rows else None,
+            dupes=key_rows[1] if key_rows else None,
+            model=meta.get("embedding_model"),
+            base_id=meta.get("base_id"),
+        )
+        if key_rows is None:
+            self._save_ids(generation)
+        if meta.get("base_id") is None:
+            self._save_meta(generation)  # written by an older version; log entries need a base to refer to
+        return self._replay(generation)
+
     def _load_if_exists(self):
-        """Load index + payloads if the files exist."""
-        if os.path.exists(self.index_path) and os.path.exists(self.payloads_path):
-            try:
-                self.index = faiss.read_index(self.index_path)
-                self.dimension = self.index.d  # type: ignore[attr-defined]
-                with open(self.payloads_path, "r", encoding="utf-8") as f:
-                    self.payloads = json.load(f)
-                logger.info(
-                    f"Loaded Faiss index ({self.dimension}d) with {self.index.ntotal} vectors"  # type: ignore
+        """Load index + payloads if the files exist; an unreadable store starts empty."""
+        try:
+            generation = self._read()
+        except Exception as e:
+            logger.error(f"Failed to load Faiss store; starting fresh. Error: {e}")
+            return
+        if generation is not None:
+            self._current = generation
+            logger.info(
+                f"Loaded Faiss index ({generation.dimension}d, {generation.model}) with {generation.count} vectors"
+                f"{' + full-precision rescoring' if generation.full_vectors is not None else ''}"
+            )
+
+    def _load_ids(self, payloads: List[Dict[str, Any]]) -> Optional[Tuple[Dict[str, int], Dict[str, Tuple[int, ...]]]]:
+        """
+        Read the persisted id map if it still matches the payloads (same count,
+        and a spread of sampled entries point at the right rows); None means rebuild.
+        """
+        if not os.path.exists(self.ids_path):
+            return None
+        try:
+            with open(self.ids_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            ids = data["ids"]
+            if data.get("version") != IDS_FORMAT_VERSION or data.get("count") != len(payloads):
+                return None
+            items = list(ids.items())
+            step = max(1, len(items) // 64)
+            for key, idx in items[::step]:
+                if ticket_key(payloads[idx].get("ticket_id")) != key:
+                    return None
+            return ids, {key: tuple(rows) for key, rows in data.get("dupes", {}).items()}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable {self.ids_path}: {e}")
+            return None
+
+    def _save_ids(self, generation: IndexGeneration):
+        with open(self.ids_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": IDS_FORMAT_VERSION, "key": "ticket_id", "count": generation.base_rows,
+                       "ids": generation.ids, "dupes": generation.dupes}, f)
+        os.replace(self.ids_path + ".tmp", self.ids_path)
+
+    def _save_meta(self, generation: IndexGeneration):
+        with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"embedding_model": generation.model, "dimension": generation.dimension,
+                       "base_id": generation.base_id}, f)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    def reload(self):
+        """
+        Re-read index + payloads from disk (after files were replaced, e.g. a snapshot import).
+        If they can't be read the error is raised and the previous generation keeps serving.
+        """
+        with self._write_lock:
+            generation = self._read()
+            self._current = generation if generation is not None else self._new_generation()
+            self._log_write(self._current, None)
+
+    @property
+    def keeps_full_vectors(self) -> bool:
+        """Compact storage modes keep float32 vectors on disk for rescoring."""
+        return self.storage != "float32"
+
+    def _open_full_vectors(self, index: Optional[faiss.Index], dimension: Optional[int]) -> Optional[np.ndarray]:
+        """Memory-map the full-precision vectors if they match the index."""
+        if index is None or index.ntotal == 0 or not os.path.exists(self.vectors_path):  # type: ignore
+            return None
+        expected = int(index.ntotal) * int(dimension) * 4  # type: ignore
+        if os.path.getsize(self.vectors_path) != expected:
+            logger.warning(f"{self.vectors_path} does not match the index; rescoring disabled")
+            return None
+        return np.memmap(
+            self.vectors_path, dtype="float32", mode="r",
+            shape=(int(index.ntotal), int(dimension)),  # type: ignore
+        )
+
+    def _save(self, generation: IndexGeneration):
+        """
+        Persist a generation's base to disk (write-then-rename so files are never
+        half-written); the write-ahead log of the previous base is dropped.
+        """
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        if generation.index is not None:
+            faiss.write_index(generation.index, self.index_path + ".tmp")
+            os.replace(self.index_path + ".tmp", self.index_path)
+        with open(self.payloads_path + ".tmp", "w", encoding="utf-8") as f:
+            # Same bytes as json.dump(list), streamed so compact payloads are decoded a chunk at a time
+            f.write("[")
+            for i, payload in enumerate(generation.payloads):
+                f.write(", " if i else "")
+                f.write(json.dumps(payload, ensure_ascii=False))
+            f.write("]")
+        os.replace(self.payloads_path + ".tmp", self.payloads_path)
+        generation.payloads_nbytes = os.path.getsize(self.payloads_path)
+        self._save_ids(generation)
+        self._save_meta(generation)
+        if os.path.exists(self.delta_path):
+            os.unlink(self.delta_path)
+
+    def _append_delta(self, current: IndexGeneration, stale: List[int], arr: np.ndarray, payloads: List[Dict[str, Any]]):
+        """
+        Record one incremental write in the write-ahead log (faiss_delta.jsonl), so
+        it survives a restart without rewriting the base files. An entry names the
+        base and row count it applies to; _replay() skips entries that don't match.
+        """
+        entry = {
+            "base": current.base_id,
+            "size": current.size,
+            "stale": [int(row) for row in stale],
+            "vectors": base64.b64encode(arr.tobytes()).decode("ascii"),
+            "payloads": list(payloads),
+        }
+        os.makedirs(os.path.dirname(self.delta_path), exist_ok=True)
+        with open(self.delta_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _replay(self, generation: IndexGeneration) -> IndexGeneration:
+        """Re-apply the write-ahead log entries recorded against this generation's base."""
+        if not os.path.exists(self.delta_path):
+            return generation
+        with open(self.delta_path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring {self.delta_path} from line {number} on (partially written)")
+                    break
+                if entry.get("base") != generation.base_id or entry.get("size") != generation.size:
+                    continue
+                arr = np.frombuffer(base64.b64decode(entry["vectors"]), dtype="float32")
+                generation, _ = self._with_delta(
+                    generation, entry["stale"], arr.reshape(-1, generation.dimension), entry["payloads"]
                 )
-            except Exception as e:
-                logger.error(f"Failed to load Faiss store; starting fresh. Error: {e}")
-                self.index = None
-                self.payloads = []
-                self.dimension = None
+        return generation
+
+    def _swap(
+        self,
+        index: faiss.Index,
+        payloads: List[Dict[str, Any]],
+        dimension: int,
+        model: Optional[str] = None,
+        touched: Optional[Iterable[str]] = None,
+    ) -> IndexGeneration:
+        """
+        Persist and publish a new base as the next generation (same model unless given).
+        Caller holds _write_lock. `touched` lists the keys an incremental write
+        changed; None means everything may have.
+        """
+        generation = self._new_generation(
+            index=index,
+            payloads=payloads,
+            dimension=dimension,
+            full_vectors=self._open_full_vectors(index, dimension),
+            model=model or self._current.model,
+        )
+        self._save(generation)
+        self._current = generation  # atomic reference swap; readers never see a partial state
+        self._log_write(generation, touched)
+        return generation
 
-    def _save(self):
-        """Persist index + payloads to disk."""
-        if self.index is not None:
-            faiss.write_index(self.index, self.index_path)
-        with open(self.payloads_path, "w", encoding="utf-8") as f:
-            json.dump(self.payloads, f, ensure_ascii=False)
+    def _publish(
+        self,
+        index: faiss.Index,
+        payloads: List[Dict[str, Any]],
+        dimension: int,
+        vectors_path: Optional[str] = None,
+        model: Optional[str] = None,
+    ):
+        """Swap in a fully built index + payloads (and full-precision vectors) and persist them."""
+        with self._write_lock:
+            if vectors_path:
+                # Existing memory maps keep the old file's inode alive until released
+                os.replace(vectors_path, self.vectors_path)
+            elif os.path.exists(self.vectors_path):
+                os.unlink(self.vectors_path)
+            self._swap(index, payloads, dimension, model)
+        logger.info(f"Published Faiss collection '{self.name}' with {index.ntotal} vectors")  # type: ignore
+
+    def _adopt_locked(self, other: "VectorStoreService"):
+        """
+        Publish another store's current generation (index, payloads, full vectors
+        and model) as this store's next one, e.g. a migration's shadow store.
+        Caller holds _write_lock; `other` must not be written to afterwards.
+        """
+        other.compact()
+        source = other.snapshot()
+        if source.full_vectors is not None:
+            os.replace(other.vectors_path, self.vectors_path)
+        elif os.path.exists(self.vectors_path):
+            os.unlink(self.vectors_path)
+        self._swap(source.index, source.payloads, source.dimension, source.model)
+        logger.info(f"Collection '{self.name}' now serves {source.model} ({source.index.ntotal} vectors)")  # type: ignore
 
     # ---------- Collection lifecycle ----------
 
@@ -70,11 +699,34 @@ class VectorStoreService:
         (Re)create a fresh Faiss index (cosine via normalized vectors).
         WARNING: This clears existing data.
         """
-        self.dimension = vector_size
-        self.index = faiss.IndexFlatIP(vector_size)  # inner product
-        self.payloads = []
-        self._save()
-        logger.info(f"Created Faiss collection: dim={vector_size}")
+        with self._write_lock:
+            self._create_locked(vector_size)
+
+    def _create_locked(self, vector_size: int):
+        if os.path.exists(self.vectors_path):
+            os.unlink(self.vectors_path)
+        self._swap(new_index(vector_size, self.storage), [], vector_size)
+        logger.info(f"Created Faiss collection: dim={vector_size}, storage={self.storage}")
+
+    def begin_rebuild(self, vector_size: int, model: Optional[str] = None) -> IndexBuilder:
+        """Start staging a replacement index; current data stays searchable until commit."""
+        return IndexBuilder(self, vector_size, model)
+
+    # Staged rebuilds addressed by id, so a rebuild can be driven over RPC (sharded mode)
+
+    def stage_begin(self, build_id: str, vector_size: int, model: Optional[str] = None):
+        self._staged[build_id] = self.begin_rebuild(vector_size, model)
+
+    def stage_add(self, build_id: str, vectors: List[List[float]], payloads: List[Dict[str, Any]]) -> int:
+        return self._staged[build_id].add(vectors, payloads)
+
+    def stage_commit(self, build_id: str) -> int:
+        return self._staged.pop(build_id).commit()
+
+    def stage_abort(self, build_id: str):
+        builder = self._staged.pop(build_id, None)
+        if builder is not None:
+            builder.abort()
 
     # ---------- Upsert/Search ----------
 
@@ -84,63 +736,348 @@ class VectorStoreService:
         payloads: List[Dict[str, Any]]
     ) -> int:
         """Insert vectors with metadata (IDs are implicit by order)."""
-        if self.index is None:
-            raise RuntimeError("Faiss index is not initialized. Call create_collection first.")
-
-        arr = np.array(vectors, dtype="float32")
-        arr = _normalize(arr)
-        self.index.add(arr)  # type: ignore
-        self.payloads.extend(payloads)
-
-        self._save()
+        with self._write_lock:
+            if self._current.index is None:
+                raise RuntimeError("Faiss index is not initialized. Call create_collection first.")
+            self._apply_locked([], vectors, payloads)
         logger.info(f"Upserted {len(vectors)} vectors into Faiss")
         return len(vectors)
 
+    def upsert_records(
+        self,
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]],
+        key: str = "ticket_id",
+        model: Optional[str] = None
+    ) -> int:
+        """
+        Insert or replace records by payload key (ticket_id).
+        Existing entries with the same key are removed and the new ones
+        appended, published as one generation.
+        With `model`, raises EmbeddingModelChanged if the collection no longer uses it.
+        """
+        with self._write_lock:
+            if model is not None and model != self._current.model:
+                raise EmbeddingModelChanged(f"Collection '{self.name}' now uses {self._current.model}, not {model}")
+            if self._current.index is None:
+                self._create_locked(vector_size=len(vectors[0]))
+            incoming = {ticket_key(v) for v in payload_column(payloads, key) if v is not None}
+            stale = self._rows_with(self._current, key, incoming)
+            self._apply_locked(stale, vectors, payloads)
+        logger.info(f"Upserted {len(vectors)} records by {key} ({len(stale)} replaced)")
+        return len(vectors)
+
+    def delete_records(self, keys: List[str], key: str = "ticket_id") -> int:
+        """Remove every entry whose payload key is in `keys`; returns the number removed."""
+        with self._write_lock:
+            if self._current.index is None:
+                return 0
+            stale = self._rows_with(self._current, key, {ticket_key(k) for k in keys})
+            if stale:
+                self._apply_locked(stale, [], [])
+        logger.info(f"Deleted {len(stale)} records by {key}")
+        return len(stale)
+
+    @staticmethod
+    def _rows_with(generation: IndexGeneration, key: str, wanted: Set[str]) -> List[int]:
+        """Live rows whose payload `key` is in `wanted`: id map lookups for ticket_id, a scan otherwise."""
+        if key == "ticket_id":
+            return sorted({row for k in wanted for row in generation.rows_of(k)})
+        rows = []
+        for row in generation.live_rows():
+            value = generation.payload(row).get(key)
+            if value is not None and ticket_key(value) in wanted:
+                rows.append(row)
+        return rows
+
+    def _apply_locked(self, stale: List[int], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        """
+        Publish the current generation plus one write: `stale` rows removed, vectors
+        appended. The base is shared, not copied; the write goes to the write-ahead
+        log, and the delta is compacted into a new base once it outgrows
+        DELTA_MAX_ROWS (or a trained storage mode has enough vectors to train).
+        Caller holds _write_lock.
+        """
+        current = self._current
+        dimension = current.dimension or len(vectors[0])
+        arr = _normalize(np.array(vectors, dtype="float32").reshape(-1, dimension))
+        generation, touched = self._with_delta(current, stale, arr, payloads)
+        self._append_delta(current, stale, arr, payloads)
+        self._current = generation  # atomic reference swap; readers never see a partial state
+        self._log_write(generation, touched)
+        if generation.delta_rows > settings.DELTA_MAX_ROWS or (
+            self._awaiting_training(generation.index)
+            and generation.count >= train_size(dimension, self.storage)
+        ):
+            self._compact_locked()
+
+    def _with_delta(
+        self, current: IndexGeneration, stale: List[int], arr: np.ndarray, payloads: List[Dict[str, Any]]
+    ) -> Tuple[IndexGeneration, Set[str]]:
+        """The generation after one write to `current` (sharing its base), and the keys the write touched."""
+        dead = current.dead | frozenset(stale)
+        overlay = dict(current.overlay)
+        touched: Set[str] = set()
+        for row in stale:
+            value = current.payload(row).get("ticket_id")
+            if value is not None:
+                key = ticket_key(value)
+                touched.add(key)
+                overlay[key] = tuple(r for r in current.rows_of(key) if r not in dead)
+        for offset, value in enumerate(payload_column(payloads, "ticket_id")):
+            if value is not None:
+                key = ticket_key(value)
+                touched.add(key)
+                overlay[key] = (overlay[key] if key in overlay else current.rows_of(key)) + (current.size + offset,)
+        tail_vectors = np.concatenate([current.tail_vectors, arr]) if len(current.tail_vectors) else arr
+        generation = self._new_generation(
+            index=current.index,
+            payloads=current.payloads,
+            dimension=current.dimension or arr.shape[1],
+            full_vectors=current.full_vectors,
+            payloads_nbytes=current.payloads_nbytes,
+            ids=current.ids,
+            dupes=current.dupes,
+            model=current.model,
+            base_id=current.base_id,
+            tail_vectors=tail_vectors,
+            tail_payloads=current.tail_payloads + tuple(payloads),
+            dead=dead,
+            overlay=overlay,
+        )
+        return generation, touched
+
+    def compact(self):
+        """Fold the current delta into a new base and persist it (writes do this on their own past DELTA_MAX_ROWS)."""
+        with self._write_lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """
+        Rebuild the base from the live rows: a copy of the index with removed rows
+        dropped and the tail added, or for a trained storage mode still waiting for
+        train_size() vectors, an exact flat stand-in, trained once enough exist
+        (training on a small incremental batch, e.g. the first sync into an empty
+        store, would fix the quantizer ranges or PCA basis from a handful of
+        tickets for good). Caller holds _write_lock.
+        """
+        current = self._current
+        if current.index is None or not current.delta_rows:
+            return
+        dimension = current.dimension
+        vectors = current.live_vectors() if self.keeps_full_vectors or self._awaiting_training(current.index) else None
+        if self._awaiting_training(current.index):
+            if len(vectors) >= train_size(dimension, self.storage):
+                index = train_index(vectors, self.storage)
+                logger.info(f"Trained {self.storage} index for '{self.name}' on {index.ntotal} vectors")  # type: ignore
+            else:
+                index = faiss.IndexFlatIP(dimension)  # an untrained index holds no vectors
+                index.add(vectors)
+        else:
+            index = faiss.clone_index(current.index)
+            dead_base = np.array(sorted(r for r in current.dead if r < current.base_rows), dtype="int64")
+            if len(dead_base):
+                index.remove_ids(dead_base)
+            if len(current.tail_live):
+                index.add(current.tail_vectors[current.tail_live])
+        if self.keeps_full_vectors:
+            os.makedirs(os.path.dirname(self.vectors_path), exist_ok=True)
+            # Written to a new file; readers of older generations keep the old inode mapped
+            with open(self.vectors_path + ".tmp", "wb") as f:
+                f.write(np.ascontiguousarray(vectors).tobytes())
+            os.replace(self.vectors_path + ".tmp", self.vectors_path)
+        # Same records under new row ids: nothing for changes_since() followers to re-read
+        self._swap(index, current.live_payloads(), dimension, touched=())
+        logger.info(f"Compacted '{self.name}' to {index.ntotal} vectors ({current.delta_rows} delta rows)")  # type: ignore
+
+    def _awaiting_training(self, index: faiss.Index) -> bool:
+        """A trained storage mode still holding an empty untrained index or the exact flat stand-in."""
+        return self.storage in TRAINED_MODES and (not index.is_trained or isinstance(index, faiss.IndexFlat))
+
     def search(
         self,
         query_vector: List[float],
         limit: int = 5,
-        score_threshold: float = 0.0
+        score_threshold: float = 0.0,
+        model: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Search similar vectors via inner product (cosine)."""
-        if self.index is None or self.index.ntotal == 0:  # type: ignore
-            return []
+        return self.search_batch([query_vector], limit, score_threshold, model)[0]
+
+    def search_batch(
+        self,
+        query_vectors: List[List[float]],
+        limit: int = 5,
+        score_threshold: float = 0.0,
+        model: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search several queries with one Faiss call; one result list per query.
+        Removed base rows are excluded inside the search, and rows appended since
+        the last compaction are scored exactly and merged in.
+        Pass the model the queries were embedded with to get EmbeddingModelChanged
+        (instead of a mismatched search) if a migration cut over in between.
+        """
+        generation = self._current  # one consistent generation for the whole batch
+        if model is not None and model != generation.model:
+            raise EmbeddingModelChanged(f"Collection '{self.name}' now uses {generation.model}, not {model}")
+        index = generation.index
+        if index is None or generation.count == 0 or len(query_vectors) == 0:
+            return [[] for _ in query_vectors]
 
-        q = np.array([query_vector], dtype="float32")
+        q = np.array(query_vectors, dtype="float32")
         q = _normalize(q)
-        scores, indices = self.index.search(q, limit)  # type: ignore
-        scores = scores[0].tolist()
-        indices = indices[0].tolist()
+        params = generation.search_params[0] if generation.search_params else None
+        if index.ntotal == 0:  # type: ignore
+            rows = [([], []) for _ in q]
+        elif generation.full_vectors is None:
+            scores, indices = index.search(q, limit, params=params)  # type: ignore
+            rows = list(zip(_as_cosine(index, scores).tolist(), indices.tolist()))
+        else:
+            rows = self._search_rescored(generation, q, limit, params)
+        if len(generation.tail_live):
+            rows = self._merge_tail(generation, q, limit, rows)
 
-        results: List[Dict[str, Any]] = []
-        for score, idx in zip(scores, indices):
-            if idx == -1:
-                continue
-            if score < score_threshold:
+        batch: List[List[Dict[str, Any]]] = []
+        for scores_row, indices_row in rows:
+            results: List[Dict[str, Any]] = []
+            for score, idx in zip(scores_row, indices_row):
+                if idx == -1:
+                    continue
+                if score < score_threshold:
+                    continue
+                results.append({
+                    "id": idx,
+                    "score": float(score),
+                    "payload": generation.payload(idx)
+                })
+            batch.append(results)
+        return batch
+
+    @staticmethod
+    def _merge_tail(generation: IndexGeneration, q: np.ndarray, limit: int, rows):
+        """Merge exact scores over the live tail rows into each query's base results."""
+        tail_ids = generation.tail_live + generation.base_rows
+        exact = q @ generation.tail_vectors[generation.tail_live].T
+        merged = []
+        for (scores_row, indices_row), tail_scores in zip(rows, exact):
+            top = np.argsort(-tail_scores)[:limit]
+            hits = [(s, i) for s, i in zip(scores_row, indices_row) if i != -1]
+            hits += zip(tail_scores[top].tolist(), tail_ids[top].tolist())
+            hits.sort(key=lambda hit: -hit[0])
+            merged.append(([s for s, _ in hits[:limit]], [i for _, i in hits[:limit]]))
+        return merged
+
+    def get_record(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a ticket by primary key: {"id", "payload"} or None."""
+        generation = self._current
+        idx = generation.row_of(ticket_key(ticket_id))
+        if idx is None:
+            return None
+        return {"id": idx, "payload": generation.payload(idx)}
+
+    def get_vector(self, ticket_id: str) -> Optional[List[float]]:
+        """
+        The stored (normalized) vector of a ticket, without running the model.
+        Read from the full-precision file when present, otherwise reconstructed
+        from the index codes.
+        """
+        generation = self._current
+        idx = generation.row_of(ticket_key(ticket_id))
+        if idx is None or generation.index is None:
+            return None
+        return generation.vector(idx).tolist()
+
+    def search_similar(
+        self,
+        ticket_id: str,
+        limit: int = 5,
+        score_threshold: float = 0.0
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Tickets most similar to an existing ticket (itself excluded); None if the ticket is unknown."""
+        vector = self.get_vector(ticket_id)
+        if vector is None:
+            return None
+        results = self.search_batch([vector], limit + 1, score_threshold)[0]
+        return [r for r in results if ticket_key(r["payload"].get("ticket_id")) != ticket_key(ticket_id)][:limit]
+
+    def _search_rescored(self, generation: IndexGeneration, q: np.ndarray, limit: int, params=None):
+        """First pass on the compact index, then exact cosine over each query's top candidates."""
+        _, candidates = generation.index.search(q, limit * settings.RESCORE_FACTOR, params=params)  # type: ignore
+        rows = []
+        for query, row in zip(q, candidates):
+            ids = row[row != -1]
+            if len(ids) == 0:
+                rows.append(([], []))
                 continue
-            payload = self.payloads[idx] if 0 <= idx < len(self.payloads) else {}
-            results.append({
-                "id": idx,
-                "score": float(score),
-                "payload": payload
-            })
-        return results
+            ids = np.sort(ids)  # ascending ids read the memory map sequentially
+            exact = np.asarray(generation.full_vectors[ids]) @ query  # type: ignore
+            order = np.argsort(-exact)[:limit]
+            rows.append((exact[order].tolist(), ids[order].tolist()))
+        return rows
 
     # ---------- Introspection/Access ----------
 
     def get_collection_info(self) -> Dict[str, Any]:
-        count = int(self.index.ntotal) if self.index is not None else 0  # type: ignore
+        generation = self._current
+        count = generation.count if generation.index is not None else 0
         return {
+            "name": self.name,
+            "dimension": generation.dimension,
             "vectors_count": count,
+            "delta_rows": generation.delta_rows,
+            "storage": self.storage,
+            "rescoring": generation.full_vectors is not None,
+            "embedding_model": generation.model,
+            "memory_bytes": self.memory_bytes(),
+            "generation": generation.number,
+            "live_generations": len(self._live_generations),
             "status": "ready" if count >= 0 else "uninitialized"
         }
 
+    def memory_bytes(self) -> int:
+        """
+        Approximate resident size of this collection.
+        Index codes, tail vectors and compact payloads are exact; plain payload
+        dicts (and the tail's) are estimated from their JSON size since Python
+        dicts cost a few times their serialized form. Memory-mapped
+        full-precision vectors live in the page cache and are not counted.
+        """
+        generation = self._current
+        index_bytes = int(generation.tail_vectors.nbytes)
+        if generation.index is not None:
+            index_bytes += int(generation.index.ntotal) * int(generation.index.sa_code_size())  # type: ignore
+        tail_bytes = sum(len(json.dumps(p, ensure_ascii=False)) for p in generation.tail_payloads) * PAYLOAD_MEMORY_FACTOR
+        if isinstance(generation.payloads, CompactPayloads):
+            return index_bytes + tail_bytes + generation.payloads.nbytes
+        return index_bytes + tail_bytes + generation.payloads_nbytes * PAYLOAD_MEMORY_FACTOR
+
     def get_all_payloads(self) -> List[Dict[str, Any]]:
         """Return all payloads (used by metrics)."""
-        return list(self.payloads)
+        return list(self._current.live_payloads())
+
+    def get_vectors_with_columns(self, fields: List[str]):
+        """
+        All stored vectors (normalized float32, one row per live record) with the
+        given payload fields as aligned columns {field: [value per row]}.
+        Uses the full-precision file when present, otherwise decodes the index.
+        Bulk jobs read columns so compact payloads are never expanded into a
+        dict per row.
+        """
+        generation = self._current
+        if generation.index is None or generation.count == 0:
+            return np.zeros((0, generation.dimension or 0), dtype="float32"), {field: [] for field in fields}
+        payloads = generation.live_payloads()
+        return generation.live_vectors(), {field: payload_column(payloads, field) for field in fields}
 
     def get_payloads_sample(self, limit: int = 100) -> List[Dict[str, Any]]:
-        return self.payloads[:limit]
+        generation = self._current
+        if not generation.delta_rows:
+            return generation.payloads[:limit]
+        return [generation.payload(row) for row in itertools.islice(generation.live_rows(), limit)]
+
+    def close(self):
+        """Release resources held outside this object (nothing for an in-process index)."""
 
 # Global instance
 vector_store = VectorStoreService()
@@ -1,21 +1,149 @@
-"""Logging configuration"""
+"""Logging configuration
+
+Every logger created with setup_logger() shares one in-process queue; a
+single listener thread formats records and writes them to stdout, so the
+calling thread only pays for building the LogRecord and a non-blocking
+put. Records are formatted in the listener (pass values as %-style args,
+not f-strings, on hot paths), rendered as one JSON object per line by
+default, and any `extra={...}` fields are kept as structured keys.
+
+Levels come from LOG_LEVEL, overridden per module by LOG_LEVELS
+(e.g. "app.services.retriever=debug,app.services.jira_sync=warning"; the
+longest matching prefix wins). DEBUG records are sampled at
+LOG_DEBUG_SAMPLE_RATE. When the queue is full, records are dropped and
+counted instead of blocking the request.
+"""
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+from app.config import settings
+
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, extra fields and exception text."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _SampleFilter(logging.Filter):
+    """Lets through only a `rate` fraction of DEBUG (and lower) records."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class _AsyncQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and leaves formatting to the listener thread."""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process: hand the record over as-is instead of formatting it here
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            try:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": "Log queue full; dropped %d records", "args": (dropped,),
+                }))
+            except queue.Full:
+                self.dropped += dropped
+
+
+def _parse_levels(spec: str) -> Dict[str, int]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        module, level = item.split("=", 1)
+        levels[module.strip()] = logging.getLevelName(level.strip().upper())
+    return {m: l for m, l in levels.items() if m and isinstance(l, int)}
+
+
+def level_for(name: str) -> int:
+    """Configured level for a logger name (longest LOG_LEVELS prefix, else LOG_LEVEL)."""
+    best: Optional[str] = None
+    for module in _MODULE_LEVELS:
+        if (name == module or name.startswith(module + ".")) and (best is None or len(module) > len(best)):
+            best = module
+    if best is not None:
+        return _MODULE_LEVELS[best]
+    level = logging.getLevelName(settings.LOG_LEVEL.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+_MODULE_LEVELS = _parse_levels(settings.LOG_LEVELS)
+_handler: Optional[_AsyncQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_sample_filter = _SampleFilter(settings.LOG_DEBUG_SAMPLE_RATE)
+_lock = threading.Lock()
+
+
+def _get_handler() -> _AsyncQueueHandler:
+    """Start the shared queue and listener thread on first use."""
+    global _handler, _listener
+    if _handler is None:
+        with _lock:
+            if _handler is None:
+                stream = logging.StreamHandler(sys.stdout)
+                if settings.LOG_FORMAT == "json":
+                    stream.setFormatter(JsonFormatter())
+                else:
+                    stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+                handler = _AsyncQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+                _listener = QueueListener(handler.queue, stream, respect_handler_level=False)
+                _listener.start()
+                atexit.register(_listener.stop)  # drain what is queued at shutdown
+                _handler = handler
+    return _handler
+
 
 def setup_logger(name: str) -> logging.Logger:
     """Configure and return a logger instance"""
     logger = logging.getLogger(name)
-    #logger.setLevel(logging.INFO)
-    logger.setLevel(logging.DEBUG)
-    
+    logger.setLevel(level_for(name))
+
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        #handler.setLevel(logging.INFO)
-        handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    
-    return logger
\ No newline at end of file
+        logger.addHandler(_get_handler())
+        logger.addFilter(_sample_filter)
+        logger.propagate = False
+
+    return logger
+
@@ -0,0 +1,90 @@
+"""Per-row vs column-wise record cleaning micro-benchmark
+
+Times DataIngestionService._clean_record over df.to_dict('records') (the
+previous parse_csv path) against DataIngestionService.clean_frame on the
+same synthetic CSV, and checks that both produce identical records.
+Embedding is not involved.
+
+Usage:
+    python -m benchmarks.bench_cleaning --tickets 200000 --repeat 3
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from app.services.data_ingestion import DataIngestionService
+from benchmarks.synthetic_jira import write_csv
+
+
+def _load_frame(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    return df
+
+
+def _per_row(df: pd.DataFrame):
+    return [DataIngestionService._clean_record(record) for record in df.to_dict('records')]
+
+
+def _same(a, b) -> bool:
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if x.keys() != y.keys():
+            return False
+        for key in x:
+            vx, vy = x[key], y[key]
+            if isinstance(vx, float) and isinstance(vy, float) and math.isnan(vx) and math.isnan(vy):
+                continue
+            if vx != vy or type(vx) is not type(vy):
+                return False
+    return True
+
+
+def _time(fn, df, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df.copy())
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record cleaning micro-benchmark")
+    parser.add_argument("--tickets", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_cleaning.json")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="workwise-bench-"), "tickets.csv")
+    write_csv(path, args.tickets)
+    df = _load_frame(path)
+    print(f"Loaded {len(df)} rows x {len(df.columns)} columns")
+
+    row_seconds, row_records = _time(_per_row, df, args.repeat)
+    col_seconds, col_records = _time(DataIngestionService.clean_frame, df, args.repeat)
+    identical = _same(row_records, col_records)
+
+    result = {
+        "rows": len(df),
+        "per_row_seconds": round(row_seconds, 3),
+        "column_seconds": round(col_seconds, 3),
+        "speedup": round(row_seconds / col_seconds, 2) if col_seconds else None,
+        "identical": identical,
+    }
+    print(f"per-row {row_seconds:.3f}s  column-wise {col_seconds:.3f}s  "
+          f"speedup {result['speedup']}x  identical={identical}")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {args.out}")
+    os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Parse time and memory of the ingest front end: CSV vs Parquet/Arrow
+
+Writes N synthetic tickets (plus --extra-columns filler columns, standing in
+for the custom fields a real Jira export carries) as CSV, Parquet and Arrow
+IPC, then runs the parse stage of an ingest job in a fresh subprocess per
+format and reports wall time and peak resident-set growth:
+
+    csv      DataIngestionService.load_data -> records + searchable texts
+    parquet  open_columnar + clean_arrow_batch per record batch (projected)
+    arrow    same, over a memory-mapped Arrow IPC file
+
+The columnar paths keep each batch's payloads as CompactPayloads and only
+the texts list as Python objects, which is what the ingest job hands to the
+embedding stage.
+
+Usage:
+    python -m benchmarks.bench_columnar_ingest --tickets 200000
+    python -m benchmarks.bench_columnar_ingest --tickets 500000 --formats csv,parquet --extra-columns 80
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_jira import FIELDS, generate_tickets
+
+FORMATS = ["csv", "parquet", "arrow"]
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm", encoding="utf-8") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _peak_rss_bytes() -> int:
+    """High-water RSS of this address space (ru_maxrss would include the parent's peak)."""
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return _rss_bytes()
+
+
+def _write_exports(workdir: str, count: int, extra_columns: int, seed: int) -> dict:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    filler = [f"Customfield {i}" for i in range(extra_columns)]
+    headers = [f.replace("_", " ").title() for f in FIELDS] + filler
+    paths = {fmt: os.path.join(workdir, "export" + ext) for fmt, ext in EXTENSIONS.items()}
+
+    columns = {h: [] for h in headers}
+    for i, ticket in enumerate(generate_tickets(count, seed)):
+        for field, header in zip(FIELDS, headers):
+            columns[header].append(ticket[field])
+        for header in filler:
+            columns[header].append(f"{header} value {i % 97} for an unused export column")
+    table = pa.table(columns)
+    del columns
+
+    pq.write_table(table, paths["parquet"], row_group_size=65536)
+    with ipc.new_file(paths["arrow"], table.schema) as writer:
+        writer.write_table(table, max_chunksize=65536)
+    table.to_pandas().to_csv(paths["csv"], index=False)
+    return paths
+
+
+def _measure(fmt: str, path: str, batch_rows: int):
+    """Child process: run the parse stage one way and print one JSON line of measurements."""
+    from app.services.data_ingestion import DataIngestionService
+    from app.services.payload_store import CompactPayloads
+
+    if fmt != "csv":
+        import pyarrow.ipc, pyarrow.parquet  # noqa: F401 -- library load is not parse cost (pandas is already imported)
+    baseline = _rss_bytes()
+    start = time.perf_counter()
+    if fmt == "csv":
+        payloads = DataIngestionService.load_data(path)
+        texts = [r["searchable_text"] for r in payloads]
+    else:
+        _, batches = DataIngestionService.open_columnar(path, batch_rows)
+        texts, parts = [], []
+        for batch in batches:
+            batch_texts, batch_payloads = DataIngestionService.clean_arrow_batch(batch)
+            texts.extend(batch_texts)
+            parts.append(batch_payloads)
+        payloads = CompactPayloads.concat_all(parts)
+    parse_s = time.perf_counter() - start
+    peak = _peak_rss_bytes() - baseline
+
+    print(json.dumps({
+        "format": fmt,
+        "tickets": len(texts),
+        "file_bytes": os.path.getsize(path),
+        "parse_s": round(parse_s, 2),
+        "tickets_per_s": round(len(texts) / parse_s),
+        "peak_rss_bytes": peak,
+        "payload_sample": payloads[len(texts) // 2]["ticket_id"],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar ingest parse benchmark")
+    parser.add_argument("--tickets", type=int, default=200_000)
+    parser.add_argument("--extra-columns", type=int, default=40)
+    parser.add_argument("--batch-rows", type=int, default=16384)
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_columnar_ingest.json")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _measure(args.child, args.path, args.batch_rows)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="workwise-bench-")
+    os.environ.setdefault("DATA_DIR", os.path.join(workdir, "data"))
+    start = time.perf_counter()
+    paths = _write_exports(workdir, args.tickets, args.extra_columns, args.seed)
+    print(f"Wrote {args.tickets} tickets x {len(FIELDS) + args.extra_columns} columns "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    runs = []
+    for fmt in [f.strip() for f in args.formats.split(",") if f.strip()]:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_columnar_ingest", "--child", fmt,
+             "--path", paths[fmt], "--batch-rows", str(args.batch_rows)],
+            check=True, capture_output=True, text=True, env=os.environ.copy(),
+        ).stdout
+        run = json.loads(next(line for line in reversed(out.splitlines()) if line.startswith('{"format"')))
+        runs.append(run)
+        print(f"{fmt:8s} {run['file_bytes'] / 1e6:8.1f} MB file  parse {run['parse_s']:6.2f}s  "
+              f"peak {run['peak_rss_bytes'] / 1e6:8.1f} MB")
+
+    by_format = {r["format"]: r for r in runs}
+    for fmt in ("parquet", "arrow"):
+        if "csv" in by_format and fmt in by_format:
+            print(f"{fmt} vs csv: {by_format['csv']['parse_s'] / by_format[fmt]['parse_s']:.1f}x faster, "
+                  f"{by_format['csv']['peak_rss_bytes'] / max(by_format[fmt]['peak_rss_bytes'], 1):.1f}x less peak memory")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"tickets": args.tickets, "extra_columns": args.extra_columns,
+                   "batch_rows": args.batch_rows, "runs": runs}, f, indent=2)
+    for path in paths.values():
+        os.remove(path)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Ingest embedding throughput vs. worker count
+
+Embeds the searchable_text of a synthetic corpus with
+EmbeddingService.embed_batch (single process, fixed batch_size=32) and
+with embed_batch_parallel at increasing worker counts, reporting
+tickets/second and speedup over the single-process baseline.
+
+Usage:
+    python -m benchmarks.bench_embedding_scaling --tickets 5000 --workers 1,2,4,8,16,32
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_jira import write_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding scaling benchmark")
+    parser.add_argument("--tickets", type=int, default=5_000)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--out", default="bench_embedding_scaling.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="workwise-bench-")
+    os.environ["DATA_DIR"] = os.path.join(workdir, "data")
+
+    from app.services.data_ingestion import DataIngestionService
+    from app.services.embeddings import embedding_service
+
+    export_path = write_csv(os.path.join(workdir, "jira_export.csv"), args.tickets)
+    texts = [r.get("searchable_text", "") for r in DataIngestionService.load_data(export_path)]
+
+    start = time.perf_counter()
+    embedding_service.embed_batch(texts)
+    baseline_s = time.perf_counter() - start
+    baseline_rate = len(texts) / baseline_s
+    runs = [{"mode": "embed_batch", "workers": 1, "seconds": round(baseline_s, 3),
+             "tickets_per_sec": round(baseline_rate, 1), "speedup": 1.0}]
+    print(f"embed_batch (batch_size=32): {baseline_rate:.1f} tickets/s")
+
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        # Warm-up starts the pool and loads the model in every worker
+        embedding_service.embed_batch_parallel(texts[: workers * 8], workers=workers,
+                                               token_budget=args.token_budget)
+        start = time.perf_counter()
+        embedding_service.embed_batch_parallel(texts, workers=workers, token_budget=args.token_budget)
+        elapsed = time.perf_counter() - start
+        rate = len(texts) / elapsed
+        # Processes that actually encoded (workers <= 1 encodes in process)
+        effective = embedding_service._pool_workers if workers > 1 else 1
+        runs.append({"mode": "embed_batch_parallel", "workers": workers, "effective_workers": effective,
+                     "seconds": round(elapsed, 3), "tickets_per_sec": round(rate, 1),
+                     "speedup": round(rate / baseline_rate, 2)})
+        print(f"embed_batch_parallel workers={workers} (effective {effective}): "
+              f"{rate:.1f} tickets/s ({rate / baseline_rate:.2f}x)")
+    embedding_service.shutdown_pool()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"tickets": len(texts), "cpu_count": os.cpu_count(), "runs": runs}, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Memory and query throughput of N API workers: a model per worker vs the shared embedding server
+
+Starts N worker processes that each create the embedding service the way
+an API worker does (EMBEDDING_MODE=local or remote) and fire concurrent
+single-query embeds at it, then reports the summed resident memory of all
+workers (+ the embedding server in remote mode), queries/s and, for remote
+mode, how many requests the server coalesced per forward pass.
+
+Usage:
+    python -m benchmarks.bench_embedding_server --workers 1,2,4
+    python -m benchmarks.bench_embedding_server --workers 4 --modes remote --threads 16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic_jira import QUERIES
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/statm", encoding="utf-8") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _worker(queries: int, threads: int):
+    """Child process: one API worker's embedding load; prints one JSON line when done."""
+    from app.services.embeddings import embedding_service
+
+    texts = [QUERIES[i % len(QUERIES)] + f" #{i}" for i in range(queries)]
+    print(json.dumps({"ready": True}), file=sys.stderr, flush=True)  # stdout carries the app's logs
+    sys.stdin.readline()  # start signal, so all workers run at the same time
+
+    def run(chunk):
+        for text in chunk:
+            embedding_service.embed_text(text, is_query=True)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=run, args=(texts[i::threads],)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stats = embedding_service.server_stats() if hasattr(embedding_service, "server_stats") else None
+    print(json.dumps({"seconds": elapsed, "rss": _rss_bytes(os.getpid()), "server": stats}), file=sys.stderr, flush=True)
+    sys.stdin.readline()  # stay alive until the parent has measured everyone
+
+
+def _read_json(proc) -> dict:
+    while True:
+        line = proc.stderr.readline()
+        if not line:
+            raise RuntimeError("worker exited early")
+        if line.startswith("{"):
+            return json.loads(line)
+
+
+def _stop_server(data_dir: str):
+    subprocess.run(["pkill", "-f", f"app.services.embedding_server --listen {data_dir}"])
+
+
+def _run(mode: str, workers: int, args, data_dir: str) -> dict:
+    env = dict(os.environ, EMBEDDING_MODE=mode, DATA_DIR=data_dir)
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_embedding_server", "--child",
+             "--queries", str(args.queries), "--threads", str(args.threads)],
+            env=env, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        _read_json(proc)
+    start = time.perf_counter()
+    for proc in procs:
+        proc.stdin.write("go\n")
+        proc.stdin.flush()
+    results = [_read_json(proc) for proc in procs]
+    wall = time.perf_counter() - start
+
+    rss = sum(r["rss"] for r in results)
+    server_rss = 0
+    if mode == "remote":
+        out = subprocess.run(["pgrep", "-f", f"app.services.embedding_server --listen {data_dir}"], capture_output=True, text=True)
+        server_rss = sum(_rss_bytes(int(pid)) for pid in out.stdout.split())
+    for proc in procs:
+        proc.stdin.write("done\n")
+        proc.stdin.flush()
+        proc.wait()
+    if mode == "remote":
+        _stop_server(data_dir)  # next run starts a fresh server, so its batch counters are per run
+    return {
+        "mode": mode,
+        "workers": workers,
+        "worker_rss_bytes": rss,
+        "server_rss_bytes": server_rss,
+        "total_rss_bytes": rss + server_rss,
+        "queries_per_s": round(workers * args.queries / wall, 1),
+        "server": results[-1]["server"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding server benchmark")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--modes", default="local,remote")
+    parser.add_argument("--queries", type=int, default=200, help="per worker")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent requests per worker")
+    parser.add_argument("--out", default="bench_embedding_server.json")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _worker(args.queries, args.threads)
+        return
+
+    data_dir = tempfile.mkdtemp(prefix="workwise-bench-")
+    runs = []
+    try:
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+                run = _run(mode, workers, args, data_dir)
+                runs.append(run)
+                print(f"{mode:6s} workers={workers}: {run['total_rss_bytes'] / 1e6:8.1f} MB total  "
+                      f"{run['queries_per_s']:8.1f} queries/s")
+    finally:
+        _stop_server(data_dir)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"queries_per_worker": args.queries, "threads": args.threads, "runs": runs}, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
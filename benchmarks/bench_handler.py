@@ -0,0 +1,89 @@
+"""Cold and warm latency of the serverless handler
+
+Each run starts a fresh Python process (as a new serverless worker would),
+imports handler.py and sends events to handler.handler() directly, so
+no RunPod account is needed. Reported per run:
+- cold: process start -> first response (interpreter, lazy imports,
+  model load, index load, first query)
+- warm: p50/p95 of later single-query events
+- batch: per-query latency when --batch queries are sent in one event
+
+The handler serves whatever index DATA_DIR / SNAPSHOT_BOOT_PATH point at.
+
+Usage:
+    DATA_DIR=/data python -m benchmarks.bench_handler --runs 3 --warm 50 --batch 16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.synthetic_jira import sample_queries
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORKER = r"""
+import json, sys, time
+t0 = float(sys.argv[1])
+queries = json.loads(sys.argv[2])
+warm, batch = int(sys.argv[3]), int(sys.argv[4])
+import handler
+first = handler.handler({"input": {"query": queries[0]}})
+cold_ms = (time.time() - t0) * 1000
+warm_ms = []
+for i in range(warm):
+    start = time.perf_counter()
+    handler.handler({"input": {"query": queries[i % len(queries)]}})
+    warm_ms.append((time.perf_counter() - start) * 1000)
+start = time.perf_counter()
+handler.handler({"input": {"queries": (queries * batch)[:batch]}})
+batch_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({"cold_ms": cold_ms, "load_seconds": first["latency"]["load_seconds"],
+                  "warm_ms": warm_ms, "batch_ms": batch_ms}))
+"""
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serverless handler latency benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh worker processes (cold starts)")
+    parser.add_argument("--warm", type=int, default=50, help="Warm single-query events per run")
+    parser.add_argument("--batch", type=int, default=16, help="Queries in the batched event")
+    parser.add_argument("--out", default="bench_handler.json")
+    args = parser.parse_args()
+
+    queries = sample_queries(max(args.batch, 8))
+    runs = []
+    for run in range(args.runs):
+        started = time.time()
+        proc = subprocess.run(
+            [sys.executable, "-c", _WORKER, str(started), json.dumps(queries), str(args.warm), str(args.batch)],
+            cwd=_PROJECT_ROOT, capture_output=True, text=True, check=True,
+        )
+        # Log lines may be flushed after the result line
+        result = json.loads(next(l for l in reversed(proc.stdout.splitlines()) if l.startswith('{"cold_ms"')))
+        warm_ms = result.pop("warm_ms")
+        result.update({
+            "warm_p50_ms": round(_percentile(warm_ms, 50), 2),
+            "warm_p95_ms": round(_percentile(warm_ms, 95), 2),
+            "batch_per_query_ms": round(result["batch_ms"] / args.batch, 2),
+            "cold_ms": round(result["cold_ms"], 1),
+        })
+        runs.append(result)
+        print(f"run {run + 1}: cold {result['cold_ms']:.0f} ms (load {result['load_seconds']:.2f}s), "
+              f"warm p50 {result['warm_p50_ms']} ms / p95 {result['warm_p95_ms']} ms, "
+              f"batched {result['batch_per_query_ms']} ms/query")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"runs": runs, "warm_events": args.warm, "batch": args.batch}, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Resident memory of payloads: plain dicts vs CompactPayloads
+
+Writes N cleaned synthetic tickets to a faiss_payloads.json file, then loads
+it in a fresh subprocess per mode and reports the resident-set growth, the
+bytes per ticket, the time to build the representation and the latency of
+materializing top-k result dicts (what search does per query):
+
+    dicts    json.load, as the store does with COMPACT_PAYLOADS=false
+    compact  json.load + CompactPayloads.from_records (COMPACT_PAYLOADS=true)
+
+Usage:
+    python -m benchmarks.bench_payloads --tickets 1000000
+    python -m benchmarks.bench_payloads --tickets 200000 --modes compact
+"""
+import argparse
+import ctypes
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_jira import generate_tickets
+
+MODES = ["dicts", "compact"]
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm", encoding="utf-8") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _trim():
+    """Collect garbage and hand freed heap pages back to the OS so RSS reflects live data."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _write_payloads(path: str, count: int, seed: int):
+    from app.services.data_ingestion import DataIngestionService
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, ticket in enumerate(generate_tickets(count, seed)):
+            f.write(", " if i else "")
+            f.write(json.dumps(DataIngestionService._clean_record(ticket), ensure_ascii=False))
+        f.write("]")
+
+
+def _measure(mode: str, path: str, k: int, lookups: int, seed: int):
+    """Child process: load the payloads one way and print one JSON line of measurements."""
+    from app.services.payload_store import CompactPayloads, payload_column
+
+    _trim()
+    baseline = _rss_bytes()
+    start = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        payloads = json.load(f)
+    if mode == "compact":
+        payloads = CompactPayloads.from_records(payloads)
+    build_s = time.perf_counter() - start
+    _trim()
+    resident = _rss_bytes() - baseline
+
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(payloads), size=(lookups, k))
+    start = time.perf_counter()
+    for row in rows:
+        [payloads[int(i)] for i in row]
+    topk_us = (time.perf_counter() - start) / lookups * 1e6
+
+    start = time.perf_counter()
+    payload_column(payloads, "status")
+    column_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        "mode": mode,
+        "tickets": len(payloads),
+        "resident_bytes": resident,
+        "bytes_per_ticket": round(resident / len(payloads), 1),
+        "build_s": round(build_s, 2),
+        "topk_materialize_us": round(topk_us, 2),
+        "column_scan_ms": round(column_ms, 1),
+        "layout": payloads.layout() if mode == "compact" else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payload memory benchmark")
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_payloads.json")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _measure(args.child, args.path, args.k, args.lookups, args.seed)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="workwise-bench-")
+    os.environ.setdefault("DATA_DIR", os.path.join(workdir, "data"))
+    path = os.path.join(workdir, "faiss_payloads.json")
+    start = time.perf_counter()
+    _write_payloads(path, args.tickets, args.seed)
+    json_bytes = os.path.getsize(path)
+    print(f"Wrote {args.tickets} tickets ({json_bytes / 1e6:.1f} MB JSON) in {time.perf_counter() - start:.1f}s")
+
+    runs = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_payloads", "--child", mode, "--path", path,
+             "--k", str(args.k), "--lookups", str(args.lookups), "--seed", str(args.seed)],
+            check=True, capture_output=True, text=True, env=os.environ.copy(),
+        ).stdout
+        run = json.loads(next(line for line in reversed(out.splitlines()) if line.startswith('{"mode"')))
+        runs.append(run)
+        print(f"{mode:8s} {run['resident_bytes'] / 1e6:8.1f} MB  {run['bytes_per_ticket']:7.1f} B/ticket  "
+              f"build {run['build_s']}s  top-{args.k} {run['topk_materialize_us']} us")
+
+    by_mode = {r["mode"]: r for r in runs}
+    if "dicts" in by_mode and "compact" in by_mode:
+        saved = by_mode["dicts"]["resident_bytes"] - by_mode["compact"]["resident_bytes"]
+        print(f"Saved {saved / 1e6:.1f} MB ({by_mode['dicts']['resident_bytes'] / by_mode['compact']['resident_bytes']:.1f}x)")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"tickets": args.tickets, "json_bytes": json_bytes, "k": args.k, "runs": runs}, f, indent=2)
+    os.remove(path)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Recall / memory / latency tradeoff of compact vector storage modes
+
+Builds one VectorStoreService per VECTOR_STORAGE mode over the same
+vectors and evaluates a held-out query set against exact float32 search:
+recall@k of the top-k ids, index memory and search latency.
+
+Vectors come from a .npy file (--vectors) or are produced by embedding a
+synthetic corpus with the configured EMBEDDING_MODEL. Held-out queries are
+tickets excluded from the index (embedded as queries) plus the synthetic
+natural-language queries.
+
+Usage:
+    python -m benchmarks.bench_quantization --tickets 20000 --holdout 500
+    python -m benchmarks.bench_quantization --vectors corpus.npy --holdout 1000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_jira import QUERIES, generate_tickets
+
+MODES = ["float32", "float16", "int8", "pca"]
+
+
+def _load_vectors(args):
+    if args.vectors:
+        corpus = np.load(args.vectors).astype("float32")
+        rng = np.random.default_rng(args.seed)
+        order = rng.permutation(len(corpus))
+        return corpus[order[args.holdout:]], corpus[order[:args.holdout]]
+
+    from app.services.data_ingestion import DataIngestionService
+    from app.services.embeddings import embedding_service
+
+    records = [DataIngestionService._clean_record(t) for t in generate_tickets(args.tickets + args.holdout, args.seed)]
+    texts = [r["searchable_text"] for r in records]
+    corpus = np.array(embedding_service.embed_batch(texts[:args.tickets]), dtype="float32")
+    held_out = [r["summary"] or "" for r in records[args.tickets:]] + list(QUERIES)
+    queries = np.array(embedding_service.embed_batch(held_out, is_query=True), dtype="float32")
+    return corpus, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact vector storage benchmark")
+    parser.add_argument("--tickets", type=int, default=20_000)
+    parser.add_argument("--holdout", type=int, default=500)
+    parser.add_argument("--vectors", help="Optional .npy corpus instead of embedding a synthetic one")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_quantization.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="workwise-bench-")
+    os.environ["DATA_DIR"] = os.path.join(workdir, "data")
+
+    from app.services.vector_store import VectorStoreService
+
+    corpus, queries = _load_vectors(args)
+    dim = corpus.shape[1]
+    payloads = [{"ticket_id": str(i)} for i in range(len(corpus))]
+    print(f"Corpus: {len(corpus)} x {dim}, held-out queries: {len(queries)}")
+
+    truth = None
+    runs = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        mode_dir = os.path.join(workdir, mode)
+        store = VectorStoreService(
+            index_path=os.path.join(mode_dir, "faiss.index"),
+            payloads_path=os.path.join(mode_dir, "faiss_payloads.json"),
+            name=mode,
+            storage=mode,
+        )
+        builder = store.begin_rebuild(dim)
+        builder.add(corpus, payloads)
+        builder.commit()
+
+        start = time.perf_counter()
+        found = [[r["id"] for r in store.search(q, limit=args.k, score_threshold=-1.0)] for q in queries]
+        latency_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        if truth is None:
+            truth = [set(ids) for ids in found] if mode == "float32" else None
+        recall = None
+        if truth is not None:
+            recall = float(np.mean([len(truth[i] & set(ids)) / args.k for i, ids in enumerate(found)]))
+
+        index_bytes = int(store.index.ntotal) * int(store.index.sa_code_size())
+        runs.append({
+            "mode": mode,
+            "index_bytes": index_bytes,
+            "bytes_per_vector": index_bytes / len(corpus),
+            "ram_reduction_vs_float32": round(len(corpus) * dim * 4 / index_bytes, 2),
+            "recall_at_k": round(recall, 4) if recall is not None else None,
+            "search_latency_ms": round(latency_ms, 3),
+        })
+        print(f"{mode:8s} {index_bytes / 1e6:8.1f} MB  recall@{args.k}={runs[-1]['recall_at_k']}  "
+              f"{latency_ms:.2f} ms/query")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"corpus": len(corpus), "dimension": dim, "queries": len(queries), "k": args.k, "runs": runs},
+                  f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
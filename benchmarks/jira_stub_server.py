@@ -0,0 +1,155 @@
+"""Local Jira REST stub for exercising the incremental sync
+
+Serves synthetic tickets from /rest/api/2/search with startAt/maxResults
+paging, ordered by (updated, key), and `updated >= "-Nm"` (relative) or
+`updated >= "yyyy/MM/dd HH:mm"` (UTC) JQL filtering. It can also
+inject 429 responses with Retry-After to exercise backoff, and can bump
+the `updated` time of some tickets to simulate changes between syncs.
+
+Usage:
+    python -m benchmarks.jira_stub_server --tickets 5000 --port 8089 --rate-limit-every 10
+    JIRA_BASE_URL=http://127.0.0.1:8089 curl -X POST localhost:7860/api/sync/jira
+
+POST /stub/touch?count=N marks N random tickets as updated now.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic_jira import generate_tickets
+
+_UPDATED_RE = re.compile(r'updated\s*>=\s*"(\d{4}/\d{2}/\d{2} \d{2}:\d{2})"')
+_RELATIVE_RE = re.compile(r'updated\s*>=\s*"-(\d+)m"')
+
+
+def _jira_time(value: str) -> str:
+    dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+def to_jira_issue(ticket: dict, updated: str) -> dict:
+    """Shape a synthetic ticket like a Jira REST v2 issue."""
+    def person(name):
+        return {"displayName": name} if name else None
+
+    return {
+        "key": ticket["ticket_id"],
+        "fields": {
+            "summary": ticket["summary"],
+            "description": ticket["description"] or None,
+            "status": {"name": ticket["status"]},
+            "priority": {"name": ticket["priority"]},
+            "project": {"key": ticket["project"]},
+            "issuetype": {"name": ticket["issue_type"]},
+            "components": [{"name": ticket["component"]}],
+            "assignee": person(ticket["assignee"]),
+            "reporter": person(ticket["reporter"]),
+            "created": _jira_time(ticket["created_date"]),
+            "resolutiondate": _jira_time(ticket["resolved_date"]) if ticket["resolved_date"] else None,
+            "labels": [l for l in ticket["labels"].split(",") if l],
+            "updated": updated,
+        },
+    }
+
+
+class JiraStub:
+    def __init__(self, tickets: int, rate_limit_every: int):
+        self.issues = [to_jira_issue(t, _jira_time(t["created_date"])) for t in generate_tickets(tickets)]
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def should_rate_limit(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            return bool(self.rate_limit_every) and self.requests % self.rate_limit_every == 0
+
+    def touch(self, count: int) -> int:
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+        with self.lock:
+            for issue in random.sample(self.issues, min(count, len(self.issues))):
+                issue["fields"]["updated"] = now
+                issue["fields"]["summary"] += " (updated)"
+        return count
+
+    def search(self, jql: str, start_at: int, max_results: int) -> dict:
+        issues = self.issues
+        since = None
+        match = _UPDATED_RE.search(jql or "")
+        if match:
+            since = datetime.strptime(match.group(1), "%Y/%m/%d %H:%M").replace(tzinfo=timezone.utc)
+        match = _RELATIVE_RE.search(jql or "")
+        if match:
+            since = datetime.now(timezone.utc) - timedelta(minutes=int(match.group(1)))
+        if since is not None:
+            issues = [
+                i for i in issues
+                if datetime.strptime(i["fields"]["updated"], "%Y-%m-%dT%H:%M:%S.%f%z") >= since
+            ]
+        issues = sorted(issues, key=lambda i: (i["fields"]["updated"], i["key"]))
+        return {
+            "startAt": start_at,
+            "maxResults": max_results,
+            "total": len(issues),
+            "issues": issues[start_at:start_at + max_results],
+        }
+
+
+def make_handler(stub: JiraStub):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict, headers: dict = None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/rest/api/2/search":
+                return self._send(404, {"errorMessages": ["Not found"]})
+            if stub.should_rate_limit():
+                return self._send(429, {"errorMessages": ["Rate limit exceeded"]}, {"Retry-After": "1"})
+            query = parse_qs(url.query)
+            self._send(200, stub.search(
+                query.get("jql", [""])[0],
+                int(query.get("startAt", ["0"])[0]),
+                int(query.get("maxResults", ["50"])[0]),
+            ))
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/stub/touch":
+                return self._send(404, {"errorMessages": ["Not found"]})
+            count = int(parse_qs(url.query).get("count", ["10"])[0])
+            self._send(200, {"touched": stub.touch(count)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Jira REST stub")
+    parser.add_argument("--tickets", type=int, default=5_000)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Return 429 on every Nth request")
+    args = parser.parse_args()
+
+    stub = JiraStub(args.tickets, args.rate_limit_every)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(stub))
+    print(f"Jira stub serving {args.tickets} issues on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
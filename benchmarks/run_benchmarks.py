@@ -0,0 +1,326 @@
+"""Reproducible benchmark and load-test runner for WorkWise
+
+Measures, against synthetic Jira exports:
+- ingest throughput through DataIngestionService -> EmbeddingService -> VectorStoreService
+- /api/ask p50/p95/p99 latency under concurrency (generator stubbed out)
+- /api/metrics latency
+- cold startup time and peak RSS
+
+All state lives in a throwaway DATA_DIR, results are written as JSON and
+can be compared against a stored baseline.
+
+Usage:
+    python -m benchmarks.run_benchmarks --tickets 10000 --out bench.json
+    python -m benchmarks.run_benchmarks --tickets 10000 --baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --tickets 10000 --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.synthetic_jira import sample_queries, write_export
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Direction of each metric suffix for baseline comparison
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_ms", "_seconds", "_rss_mb")
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max of latency samples given in seconds, reported in ms."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[idx] * 1000
+
+    return {
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# ---------- Suites ----------
+
+def bench_ingest(export_path: str) -> Dict[str, Any]:
+    """Parse, embed and index an export, timing each stage separately."""
+    from app.services.data_ingestion import DataIngestionService
+    from app.services.embeddings import embedding_service
+    from app.services.vector_store import vector_store
+
+    records, parse_s = _timed(DataIngestionService.load_data, export_path)
+    texts = [r.get("searchable_text", "") for r in records]
+    embeddings, embed_s = _timed(embedding_service.embed_batch, texts)
+
+    def index():
+        vector_store.create_collection(vector_size=embedding_service.get_dimension())
+        return vector_store.upsert_vectors(embeddings, records)
+
+    count, index_s = _timed(index)
+    total_s = parse_s + embed_s + index_s
+    return {
+        "records": count,
+        "parse_seconds": round(parse_s, 3),
+        "embed_seconds": round(embed_s, 3),
+        "index_seconds": round(index_s, 3),
+        "total_seconds": round(total_s, 3),
+        "parse_records_per_sec": round(count / parse_s, 1) if parse_s else None,
+        "embed_records_per_sec": round(count / embed_s, 1) if embed_s else None,
+        "index_records_per_sec": round(count / index_s, 1) if index_s else None,
+        "end_to_end_records_per_sec": round(count / total_s, 1) if total_s else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+class _ServerThread:
+    """Run the FastAPI app in-process with uvicorn so the generator can be stubbed."""
+
+    def __init__(self, port: int):
+        import uvicorn
+        from app.main import app
+
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 60
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("Benchmark server did not start within 60s")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def _stub_generator(latency_ms: float):
+    """Replace the Hugging Face call with a fixed-latency stub."""
+    from app.services.generator import generator
+
+    def generate(prompt: str, max_tokens: int = 512, temperature: float = 0.7) -> str:
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        return "Stubbed answer for benchmarking."
+
+    generator.generate = generate
+
+
+def _load(url: str, method: str, bodies: List[Any], concurrency: int) -> Dict[str, Any]:
+    """Fire requests at `url` from `concurrency` threads and collect latencies."""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+
+    def one(body):
+        start = time.perf_counter()
+        if method == "POST":
+            resp = session.post(url, json=body, timeout=120)
+        else:
+            resp = session.get(url, timeout=120)
+        return time.perf_counter() - start, resp.status_code != 200
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, bodies))
+    wall_s = time.perf_counter() - wall_start
+    latencies = [elapsed for elapsed, _ in outcomes]
+    errors = sum(failed for _, failed in outcomes)
+
+    result = _percentiles(latencies)
+    result.update({
+        "requests": len(bodies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_req_per_sec": round(len(bodies) / wall_s, 2) if wall_s else None,
+    })
+    return result
+
+
+def bench_http(requests_count: int, concurrency: int, port: int, stub_latency_ms: float) -> Dict[str, Any]:
+    """/api/ask and /api/metrics latency against the index built by bench_ingest."""
+    _stub_generator(stub_latency_ms)
+    queries = [{"query": q} for q in sample_queries(requests_count)]
+    with _ServerThread(port) as server:
+        # Warm up model and caches outside the measured window
+        _load(f"{server.base_url}/api/ask", "POST", queries[:concurrency], concurrency)
+        ask = _load(f"{server.base_url}/api/ask", "POST", queries, concurrency)
+        metrics = _load(f"{server.base_url}/api/metrics", "GET", [None] * max(10, requests_count // 10), 1)
+    return {"ask": ask, "metrics": metrics, "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def bench_startup(data_dir: str) -> Dict[str, Any]:
+    """Time a cold `import app.main` (model load + index load) in a fresh interpreter."""
+    code = (
+        "import json, resource, time\n"
+        "t = time.perf_counter()\n"
+        "import app.main\n"
+        "elapsed = time.perf_counter() - t\n"
+        "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "print('BENCH_RESULT ' + json.dumps({'startup_seconds': elapsed, 'rss': rss}))\n"
+    )
+    env = dict(os.environ, DATA_DIR=data_dir)
+    wall_start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    wall_s = time.perf_counter() - wall_start
+    line = next(l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT "))
+    data = json.loads(line[len("BENCH_RESULT "):])
+    rss_mb = data["rss"] / (1024 * 1024) if sys.platform == "darwin" else data["rss"] / 1024
+    return {
+        "import_seconds": round(data["startup_seconds"], 3),
+        "process_seconds": round(wall_s, 3),
+        "peak_rss_mb": round(rss_mb, 1),
+    }
+
+
+# ---------- Baseline comparison ----------
+
+def _flatten(d: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in d.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Return metrics that regressed by more than `tolerance` (fraction) vs the baseline."""
+    cur = _flatten(current["results"])
+    base = _flatten(baseline["results"])
+    regressions = []
+    for name, old in base.items():
+        new = cur.get(name)
+        if new is None or old == 0:
+            continue
+        change = (new - old) / abs(old)
+        if name.endswith(HIGHER_IS_BETTER) and change < -tolerance:
+            regressions.append({"metric": name, "baseline": old, "current": new, "change": round(change, 4)})
+        elif name.endswith(LOWER_IS_BETTER) and change > tolerance:
+            regressions.append({"metric": name, "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WorkWise benchmark suite")
+    parser.add_argument("--tickets", type=int, default=10_000, help="Synthetic corpus size (10k to 1M)")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="Number of /api/ask requests")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Simulated LLM latency")
+    parser.add_argument("--port", type=int, default=7899)
+    parser.add_argument("--suites", default="ingest,http,startup")
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Also write results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression fraction")
+    args = parser.parse_args()
+
+    suites = {s.strip() for s in args.suites.split(",") if s.strip()}
+    workdir = tempfile.mkdtemp(prefix="workwise-bench-")
+    data_dir = os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    # Must be set before any app module is imported
+    os.environ["DATA_DIR"] = data_dir
+
+    export_path = os.path.join(workdir, f"jira_export.{args.format}")
+    _, gen_s = _timed(write_export, export_path, args.tickets, args.format, args.seed)
+    print(f"Generated {args.tickets} synthetic tickets in {gen_s:.1f}s -> {export_path}")
+
+    results: Dict[str, Any] = {}
+    if "ingest" in suites:
+        print("Running ingest benchmark...")
+        results["ingest"] = bench_ingest(export_path)
+    if "http" in suites:
+        print("Running /api/ask and /api/metrics load test...")
+        results["http"] = bench_http(args.requests, args.concurrency, args.port, args.stub_latency_ms)
+    if "startup" in suites:
+        print("Measuring cold startup...")
+        results["startup"] = bench_startup(data_dir)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}:")
+            for r in regressions:
+                print(f"  {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Synthetic Jira export generator for benchmarks
+
+Produces deterministic Jira-like tickets carrying every field that
+DataIngestionService._clean_record folds into searchable_text, plus the
+date fields used by /api/metrics.
+
+Usage:
+    python -m benchmarks.synthetic_jira --tickets 100000 --format csv --out /tmp/jira.csv
+"""
+import argparse
+import csv
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+FIELDS = [
+    "ticket_id", "summary", "description", "status", "priority", "project",
+    "issue_type", "component", "module", "symptom_severity", "assignee",
+    "reporter", "created_date", "resolved_date", "labels",
+]
+
+PROJECTS = ["CORE", "WEB", "MOBILE", "BILLING", "INFRA", "DATA", "AUTH", "SEARCH"]
+STATUSES = ["Needs Triage", "In Progress", "Short Term Backlog", "Long Term Backlog",
+            "Gathering Interest", "Closed", "Done", "Resolved"]
+CLOSED_STATUSES = {"Closed", "Done", "Resolved"}
+PRIORITIES = ["Blocker", "Critical", "Major", "Minor", "Trivial"]
+ISSUE_TYPES = ["Bug", "Task", "Story", "Improvement", "Epic", "Sub-task"]
+COMPONENTS = ["API", "UI", "Database", "Cache", "Queue", "Scheduler", "Gateway", "Storage"]
+MODULES = ["login", "checkout", "reporting", "sync", "notifications", "export", "import", "search"]
+SEVERITIES = ["S1", "S2", "S3", "S4"]
+PEOPLE = [f"user{i:03d}" for i in range(200)]
+LABELS = ["regression", "customer", "performance", "security", "flaky", "ux", "tech-debt", "sla"]
+
+SUBJECTS = ["Login page", "Checkout flow", "Nightly export", "Search results", "Payment webhook",
+            "Report builder", "Mobile sync", "Email notifications", "Admin dashboard", "REST API"]
+PROBLEMS = ["times out under load", "returns HTTP 500", "shows stale data", "crashes on submit",
+            "is slow for large accounts", "drops records intermittently", "ignores user locale",
+            "leaks memory after deploy", "fails after token refresh", "renders incorrectly on Safari"]
+DETAILS = ["Observed in production since the last release.",
+           "Customer escalated through support.",
+           "Reproducible with the attached steps.",
+           "Only happens when the cache is cold.",
+           "Started after the database migration.",
+           "Affects roughly 5% of requests.",
+           "Logs show repeated connection resets.",
+           "Workaround is to retry the operation."]
+
+QUERIES = [
+    "Why does the login page time out?",
+    "Which critical bugs are still open in BILLING?",
+    "What problems do customers report with checkout?",
+    "Show me the status distribution of tickets",
+    "Are there memory leaks after deploys?",
+    "What is the trend of search performance issues over time?",
+    "Which tickets mention stale data in reports?",
+    "Summarize the open blocker issues",
+]
+
+
+def generate_tickets(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Yield `count` deterministic synthetic Jira tickets."""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    for i in range(count):
+        project = rng.choice(PROJECTS)
+        status = rng.choice(STATUSES)
+        created = start + timedelta(minutes=rng.randrange(0, 60 * 24 * 600))
+        resolved = None
+        if status in CLOSED_STATUSES:
+            resolved = created + timedelta(hours=rng.randrange(1, 24 * 30))
+        subject = rng.choice(SUBJECTS)
+        problem = rng.choice(PROBLEMS)
+        description = " ".join(rng.sample(DETAILS, k=rng.randint(1, 4)))
+        yield {
+            "ticket_id": f"{project}-{i + 1}",
+            "summary": f"{subject} {problem}",
+            "description": description if rng.random() > 0.05 else "",
+            "status": status,
+            "priority": rng.choice(PRIORITIES),
+            "project": project,
+            "issue_type": rng.choice(ISSUE_TYPES),
+            "component": rng.choice(COMPONENTS),
+            "module": rng.choice(MODULES) if rng.random() > 0.2 else "",
+            "symptom_severity": rng.choice(SEVERITIES),
+            "assignee": rng.choice(PEOPLE) if rng.random() > 0.1 else "",
+            "reporter": rng.choice(PEOPLE),
+            "created_date": created.strftime("%Y-%m-%d %H:%M:%S"),
+            "resolved_date": resolved.strftime("%Y-%m-%d %H:%M:%S") if resolved else "",
+            "labels": ",".join(rng.sample(LABELS, k=rng.randint(0, 3))),
+        }
+
+
+def write_csv(path: str, count: int, seed: int = 42) -> str:
+    """Write a synthetic Jira CSV export (column headers as Jira exports them)."""
+    headers = [f.replace("_", " ").title() for f in FIELDS]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for ticket in generate_tickets(count, seed):
+            writer.writerow([ticket[field] for field in FIELDS])
+    return path
+
+
+def write_json(path: str, count: int, seed: int = 42) -> str:
+    """Write a synthetic Jira JSON export in the `{"issues": [...]}` shape."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"issues": list(generate_tickets(count, seed))}, f)
+    return path
+
+
+def write_export(path: str, count: int, fmt: str = "csv", seed: int = 42) -> str:
+    """Write a synthetic export in the requested format."""
+    if fmt == "csv":
+        return write_csv(path, count, seed)
+    if fmt == "json":
+        return write_json(path, count, seed)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def sample_queries(count: int, seed: int = 7) -> List[str]:
+    """Return `count` natural-language queries for load tests."""
+    rng = random.Random(seed)
+    return [rng.choice(QUERIES) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Jira export")
+    parser.add_argument("--tickets", type=int, default=10_000)
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    write_export(args.out, args.tickets, args.format, args.seed)
+    print(f"Wrote {args.tickets} tickets to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
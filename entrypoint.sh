@@ -1,6 +1,11 @@
 #!/bin/bash
 set -e
-echo "🚀 Starting container in $(pwd)"
-ls -la
+echo "🚀 Starting container in $(pwd) (DEPLOYMENT_MODE=${DEPLOYMENT_MODE:-api})"
+
+if [ "${DEPLOYMENT_MODE:-api}" = "serverless" ]; then
+    echo "Launching RunPod serverless handler..."
+    exec python -u handler.py
+fi
+
 echo "Launching FastAPI..."
-exec python -m uvicorn app.main:app --host 0.0.0.0 --port 8000
+exec python -m uvicorn app.main:app --host 0.0.0.0 --port "${PORT:-7860}"
@@ -1,43 +1,100 @@
-import runpod
-from sentence_transformers import SentenceTransformer
-import faiss
-import torch
-import json
-
-# Load model once (stays in memory between calls)
-model = None
-index = None
-
-def load_models():
-    global model, index
-    if model is None:
-        print("Loading model...")
-        model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        model = model.to(device)
-        
-        # Initialize FAISS
-        dimension = 384
-        index = faiss.IndexFlatL2(dimension)
-        print("Models loaded!")
+"""RunPod serverless entry point backed by the same retrieval stack as the API
+
+Event input:
+    {"query": "..."}                              single question
+    {"queries": ["...", "..."], "top_k": 5,       batch; embedded in one call and
+     "collection": "default"}                     searched with one index call
+
+Heavy modules (torch, sentence-transformers, faiss) are imported on first
+use, so the worker process starts fast. When run as a worker, the model and
+index are loaded before the first job is accepted. Set SNAPSHOT_BOOT_PATH
+(or point DATA_DIR at a network volume) so the worker serves a persisted
+index; the model weights are baked into the image (see Dockerfile).
+"""
+import os
+import time
+
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_services = None
+_load_seconds = None
+_served = 0
+
+
+def load_services():
+    """Import and initialize the retrieval stack once per worker; returns the retriever."""
+    global _services, _load_seconds
+    if _services is None:
+        start = time.perf_counter()
+        from app.services.snapshots import snapshot_service
+        from app.services.retriever import retriever
+
+        snapshot_service.restore_on_boot()
+        _services = retriever
+        _load_seconds = time.perf_counter() - start
+        collections = retriever.collections
+        default = collections.default_name
+        info = collections.get(default).get_collection_info() if collections.exists(default) else {}
+        logger.info("Retrieval stack ready in %.2fs (%d vectors)", _load_seconds, info.get("vectors_count", 0))
+    return _services
+
+
+def _match(result):
+    payload = result["payload"]
+    return {
+        "ticket_id": payload.get("ticket_id"),
+        "score": round(result["score"], 4),
+        "payload": payload,
+    }
+
 
 def handler(event):
-    """RunPod serverless handler"""
-    load_models()
-    
-    input_data = event["input"]
-    query = input_data.get("query", "")
-    
-    # Your RAG logic
-    embedding = model.encode([query])
-    
-    # FAISS search (add your logic)
-    # distances, indices = index.search(embedding, k=5)
-    
+    """RunPod serverless handler: batch retrieval over the persisted index"""
+    global _served
+    started = time.perf_counter()
+    input_data = event.get("input") or {}
+    queries = input_data.get("queries")
+    if queries is None:
+        queries = [input_data.get("query", "")]
+    queries = [q for q in queries if isinstance(q, str) and q.strip()]
+    if not queries:
+        return {"status": "error", "error": "Provide 'query' or a non-empty 'queries' list"}
+
+    # Cold = this job loads the model and index. Not derived from _served: with HANDLER_PRELOAD the
+    # first job is warm, and a job rejected by the retriever must not leave the next one marked cold
+    cold = _services is None
+    retriever = load_services()
+    from app.services.collection_manager import CollectionNotFound
+
+    try:
+        top_k = int(input_data.get("top_k") or 0) or None
+        batches = retriever.retrieve_batch(queries, top_k=top_k, collection=input_data.get("collection"))
+    except (ValueError, CollectionNotFound) as e:
+        return {"status": "error", "error": str(e)}
+
+    _served += 1
+    total_ms = (time.perf_counter() - started) * 1000
     return {
-        "embedding": embedding[0].tolist(),
-        "status": "success"
+        "status": "success",
+        "results": [
+            {"query": q, "matches": [_match(r) for r in results]}
+            for q, results in zip(queries, batches)
+        ],
+        "latency": {
+            "cold_start": cold,
+            "load_seconds": round(_load_seconds, 3) if cold else 0.0,
+            "handler_ms": round(total_ms, 2),
+            "per_query_ms": round(total_ms / len(queries), 2),
+            "requests_served": _served,
+        },
     }
 
+
 if __name__ == "__main__":
-    runpod.serverless.start({"handler": handler})
\ No newline at end of file
+    import runpod
+
+    if os.getenv("HANDLER_PRELOAD", "true").lower() == "true":
+        load_services()
+    runpod.serverless.start({"handler": handler})
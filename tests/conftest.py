@@ -0,0 +1,5 @@
+"""Shared test setup: app.config reads DATA_DIR at import, so point it at a scratch directory first."""
+import os
+import tempfile
+
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="workwise-tests-"))
@@ -0,0 +1,58 @@
+"""Reads never create collections; concurrent loads of one collection share a store"""
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("faiss")
+
+from app.config import settings
+from app.services.collection_manager import CollectionManager, CollectionNotFound
+from app.services.vector_store import VectorStoreService
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "COLLECTIONS_DIR", str(tmp_path / "collections"))
+    monkeypatch.setattr(settings, "VECTOR_STORE_MODE", "single")
+    default = VectorStoreService(str(tmp_path / "faiss.index"), str(tmp_path / "faiss_payloads.json"))
+    return CollectionManager(default, memory_budget_mb=64)
+
+
+def test_unknown_collection_is_not_created_on_read(manager):
+    with pytest.raises(CollectionNotFound):
+        manager.get("missing")
+    assert not manager.exists("missing")
+    assert "missing" not in manager.get_stats()["resident_collections"]
+
+
+def test_default_collection_always_exists(manager):
+    assert manager.exists(manager.default_name)
+    assert manager.get().get_collection_info()["vectors_count"] == 0
+
+
+def test_created_collection_reloads_once(manager):
+    with manager.pinned("tickets", create=True) as store:
+        store.upsert_records([[1.0, 0.0]], [{"ticket_id": 1}])
+    assert manager.evict("tickets")
+
+    loaded = []
+    threads = [threading.Thread(target=lambda: loaded.append(manager.get("tickets"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(store) for store in loaded}) == 1
+    assert len(loaded[0].payloads) == 1
+    assert os.path.isdir(settings.COLLECTIONS_DIR)
+
+
+def test_sharded_listing_includes_collections_only_on_shards(manager, monkeypatch):
+    class Pool:
+        def broadcast(self, collection, method, *args):
+            assert method == "collection_names"
+            return [{"remote"}, set()]
+
+    monkeypatch.setattr("app.services.collection_manager.get_shard_pool", lambda: Pool())
+    manager.sharded = True
+    assert "remote" in {c["name"] for c in manager.list_collections()}
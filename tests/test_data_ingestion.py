@@ -0,0 +1,38 @@
+"""Column-wise CSV cleaning must match the per-record path"""
+import numpy as np
+import pandas as pd
+
+from app.services.data_ingestion import DataIngestionService
+
+
+def _frame():
+    return pd.DataFrame({
+        "ticket_id": [101, 102, 103, 104],
+        "summary": ["Login fails", "", "Timeout on export", None],
+        "description": ["None", "Stack trace attached", np.nan, "Works after retry"],
+        "status": ["Open", "Closed", "Open", "In Progress"],
+        "priority": ["High", None, "Low", "High"],
+        "story_points": [3.0, np.nan, 0.0, 5.0],
+        "created_date": ["2024-01-02", "2024-01-03", "", "2024-01-05"],
+    })
+
+
+def test_clean_frame_matches_clean_record():
+    df = _frame()
+    expected = [DataIngestionService._clean_record(r) for r in df.to_dict("records")]
+    assert DataIngestionService.clean_frame(_frame()) == expected
+
+
+def test_float_ticket_ids_read_back_as_ints(tmp_path):
+    path = tmp_path / "export.csv"
+    pd.DataFrame({"Ticket ID": [123, None, 7], "Summary": ["a", "b", "c"]}).to_csv(path, index=False)
+    records = DataIngestionService.parse_csv(str(path))
+    assert [r["ticket_id"] for r in records] == [123, None, 7]
+    assert all(type(r["ticket_id"]) is int for r in records if r["ticket_id"] is not None)
+
+
+def test_clean_record_normalizes_float_ids_like_clean_frame():
+    df = pd.DataFrame({"ticket_id": [5.0, np.nan, 6.5], "summary": ["a", "b", "c"]})
+    expected = [DataIngestionService._clean_record(r) for r in df.to_dict("records")]
+    assert [r["ticket_id"] for r in expected] == [5, None, 6.5]
+    assert DataIngestionService.clean_frame(df.copy()) == expected
@@ -0,0 +1,39 @@
+"""The incremental JQL bound must never start after the requested instant"""
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from app.config import settings
+from app.services.jira_sync import JiraSyncService
+
+NOW = datetime(2024, 3, 10, 12, 0, 30, tzinfo=timezone.utc)
+
+
+def _bound_minutes(jql):
+    return int(re.search(r'updated >= "-(\d+)m"', jql).group(1))
+
+
+@pytest.mark.parametrize("age", [
+    timedelta(seconds=1), timedelta(seconds=59), timedelta(seconds=60),
+    timedelta(seconds=61), timedelta(minutes=90, seconds=5), timedelta(days=3),
+])
+def test_bound_covers_since(monkeypatch, age):
+    monkeypatch.setattr(settings, "JIRA_SYNC_JQL", "")
+    minutes = _bound_minutes(JiraSyncService()._jql(NOW - age, now=NOW))
+    bound = NOW - timedelta(minutes=minutes)
+    assert bound <= NOW - age  # never excludes `since`
+    assert NOW - age - bound < timedelta(minutes=1)  # and re-reads less than a minute extra
+
+
+def test_bound_is_relative_so_server_timezone_does_not_matter(monkeypatch):
+    monkeypatch.setattr(settings, "JIRA_SYNC_JQL", "project = OPS")
+    jql = JiraSyncService()._jql(NOW - timedelta(minutes=5), now=NOW)
+    assert jql == '(project = OPS) AND updated >= "-5m" ORDER BY updated ASC, key ASC'
+
+
+def test_full_sync_has_no_bound(monkeypatch):
+    monkeypatch.setattr(settings, "JIRA_SYNC_JQL", "")
+    assert JiraSyncService()._jql(None) == "ORDER BY updated ASC, key ASC"
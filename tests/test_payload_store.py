@@ -0,0 +1,62 @@
+"""CompactPayloads must read back exactly the records it was built from"""
+import numpy as np
+
+from app.services.payload_store import CompactPayloads, payload_column, ticket_key
+
+
+def _records(n, offset=0):
+    records = []
+    for i in range(offset, offset + n):
+        record = {
+            "ticket_id": f"PROJ-{i}",
+            "summary": f"Login fails for user {i}",
+            "status": ["Open", "In Progress", "Closed"][i % 3],
+            "priority": None if i % 7 == 0 else ["Low", "High"][i % 2],
+            "story_points": i % 5,
+            "created_date": f"2024-01-{1 + i % 28:02d}",
+            "labels": ["auth", "ui"][: i % 3],
+        }
+        if i % 4 == 0:
+            record["component"] = "gateway"  # a second row shape
+        records.append(record)
+    return records
+
+
+def test_round_trip():
+    records = _records(50)
+    payloads = CompactPayloads.from_records(records)
+    assert len(payloads) == len(records)
+    assert list(payloads) == records
+    assert payloads[17] == records[17]
+    assert payloads[-1] == records[-1]
+
+
+def test_from_columns_matches_from_records():
+    records = [{"ticket_id": i, "summary": f"s{i}", "status": "Open"} for i in range(10)]
+    columns = {key: [r[key] for r in records] for key in records[0]}
+    assert list(CompactPayloads.from_columns(columns)) == list(CompactPayloads.from_records(records))
+
+
+def test_take_and_concat():
+    first, second = _records(30), _records(20, offset=30)
+    payloads = CompactPayloads.from_records(first)
+    rows = np.array([0, 5, 29, 3])
+    assert list(payloads.take(rows)) == [first[i] for i in rows]
+    assert list(payloads.concat(CompactPayloads.from_records(second))) == first + second
+    assert list(payloads.extend(second)) == first + second
+    parts = [CompactPayloads.from_records(_records(10, offset=o)) for o in range(0, 50, 10)]
+    assert list(CompactPayloads.concat_all(parts)) == _records(50)
+
+
+def test_column_fills_absent_keys():
+    records = _records(12)
+    payloads = CompactPayloads.from_records(records)
+    assert payloads.column("component") == [r.get("component") for r in records]
+    assert payload_column(payloads, "ticket_id") == payload_column(records, "ticket_id")
+
+
+def test_ticket_key_drops_integral_float_suffix():
+    assert ticket_key(123.0) == "123"
+    assert ticket_key(123) == "123"
+    assert ticket_key(1.5) == "1.5"
+    assert ticket_key("PROJ-1") == "PROJ-1"
@@ -0,0 +1,13 @@
+"""Routing of records to shards"""
+from app.services.sharded_store import _route, shard_for
+
+
+def test_route_uses_ticket_id_zero():
+    buckets = _route([[0.0], [1.0]], [{"ticket_id": 0, "searchable_text": "a"}, {"ticket_id": "0"}], 64)
+    assert list(buckets) == [shard_for("0", 64)]
+    assert len(buckets[shard_for("0", 64)][1]) == 2
+
+
+def test_route_spreads_keyless_records_by_text():
+    buckets = _route([[0.0]], [{"ticket_id": None, "searchable_text": "printer jam"}], 64)
+    assert list(buckets) == [shard_for("printer jam", 64)]
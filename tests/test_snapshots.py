@@ -0,0 +1,112 @@
+"""Snapshot export/import round trips and the checks that reject bad bundles"""
+import hashlib
+import json
+import os
+import tarfile
+import uuid
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+from app.config import settings
+from app.services import snapshots
+from app.services.collection_manager import collection_manager
+from app.services.snapshots import MANIFEST_NAME, SnapshotError, SnapshotService
+
+
+class _Embedder:
+    def get_dimension(self):
+        return 4
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "get_embedding_service", lambda *args: _Embedder())
+    monkeypatch.setattr(settings, "VECTOR_STORAGE", "float32")
+    return SnapshotService(str(tmp_path / "snapshots"))
+
+
+def _collection(count=5):
+    """A new collection with `count` records; returns its name and vectors."""
+    name = f"snap-{uuid.uuid4().hex[:8]}"
+    vectors = np.random.default_rng(count).standard_normal((count, 4)).astype("float32")
+    with collection_manager.pinned(name, create=True) as store:
+        store.upsert_records(vectors.tolist(), [{"ticket_id": f"T-{i}", "status": "Open"} for i in range(count)])
+    return name, vectors
+
+
+def _unpack(bundle, directory):
+    with tarfile.open(bundle) as tar:
+        tar.extractall(directory)
+    return str(directory)
+
+
+def _rewrite(directory, rel, data):
+    """Replace a bundle file and its manifest entry, so the checksums still match."""
+    with open(os.path.join(directory, rel), "wb") as f:
+        f.write(data)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["files"][rel] = {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def test_export_import_round_trip(service):
+    source, vectors = _collection()
+    manifest = service.export(source)
+    assert manifest["record_count"] == 5 and os.path.exists(manifest["path"])
+
+    target = f"copy-{uuid.uuid4().hex[:8]}"
+    result = service.import_snapshot(manifest["path"], target)
+    assert result["loaded_records"] == 5
+    store = collection_manager.get(target)
+    assert store.search(vectors[3].tolist(), limit=1)[0]["payload"]["ticket_id"] == "T-3"
+    assert store.get_record("T-4")["payload"]["status"] == "Open"
+
+
+def test_checksum_mismatch_is_rejected(service, tmp_path):
+    source, vectors = _collection()
+    bundle = _unpack(service.export(source)["path"], tmp_path / "bundle")
+    with open(os.path.join(bundle, "faiss_payloads.json"), "r+b") as f:
+        f.write(b"{")  # same size, different bytes
+
+    with pytest.raises(SnapshotError, match="Checksum mismatch"):
+        service.import_snapshot(bundle, source)
+    assert collection_manager.get(source).get_collection_info()["vectors_count"] == 5
+
+
+@pytest.mark.parametrize("rel", ["../escape.json", "/etc/passwd", "analytics/../../escape.json"])
+def test_materialize_rejects_path_traversal(tmp_path, rel):
+    with pytest.raises(SnapshotError, match="Unsafe path"):
+        SnapshotService._materialize(str(tmp_path), {rel: {}}, str(tmp_path / "staging"))
+    assert not os.path.exists(tmp_path / "escape.json")
+
+
+def test_restore_on_boot_runs_once(service, monkeypatch):
+    source, _ = _collection()
+    target = f"boot-{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(settings, "SNAPSHOT_BOOT_PATH", service.export(source)["path"])
+    monkeypatch.setattr(settings, "SNAPSHOT_BOOT_COLLECTION", target)
+
+    assert service.restore_on_boot()["loaded_records"] == 5
+    collection_manager.get(target).upsert_records([[1.0, 0.0, 0.0, 0.0]], [{"ticket_id": "T-new"}])
+    assert service.restore_on_boot() is None  # already restored; later writes are kept
+    assert collection_manager.get(target).get_collection_info()["vectors_count"] == 6
+
+
+def test_corrupt_index_keeps_serving_the_previous_data(service, tmp_path):
+    source, _ = _collection()
+    bundle = _unpack(service.export(source)["path"], tmp_path / "bundle")
+    _rewrite(bundle, "faiss.index", b"not a faiss index")
+
+    target, vectors = _collection(3)
+    with pytest.raises(Exception):
+        service.import_snapshot(bundle, target)
+    store = collection_manager.get(target)
+    assert store.get_collection_info()["vectors_count"] == 3
+    assert store.search(vectors[0].tolist(), limit=1)[0]["payload"]["ticket_id"] == "T-0"
@@ -0,0 +1,79 @@
+"""Parsing and answering count/distribution/trend questions from a FieldIndex"""
+from datetime import date
+
+import pytest
+
+pytest.importorskip("faiss")
+
+from app.services.structured_query import FieldIndex, StructuredQueryRouter
+
+TODAY = date(2026, 10, 19)
+
+PAYLOADS = [
+    {"ticket_id": "B-1", "status": "Open", "priority": "Critical", "project": "BILLING", "issue_type": "Bug",
+     "assignee": "alice", "created_date": "2026-09-10"},
+    {"ticket_id": "B-2", "status": "Closed", "priority": "Critical", "project": "BILLING", "issue_type": "Bug",
+     "created_date": "2026-10-05", "resolved_date": "2026-10-12"},
+    {"ticket_id": "C-1", "status": "In Progress", "priority": "Major", "project": "CORE", "issue_type": "Task",
+     "created_date": "2026-09-28"},
+    {"ticket_id": "C-2", "status": "Open", "priority": "Minor", "project": "CORE", "issue_type": "Bug",
+     "created_date": "2025-06-01"},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return FieldIndex(PAYLOADS)
+
+
+def _ask(question, index):
+    router = StructuredQueryRouter()
+    query = router.parse(question, index, today=TODAY)
+    return query, (router.evaluate(query, index, "t") if query is not None else None)
+
+
+@pytest.mark.parametrize("question, kind, matched", [
+    ("how many open critical bugs in project billing?", "count", ["B-1"]),
+    ("how many bugs are there?", "count", ["B-2", "B-1", "C-2"]),
+    ("how many tickets assigned to alice", "count", ["B-1"]),
+    ("how many tickets were created last month?", "count", ["C-1", "B-1"]),
+    ("how many tickets created in the past month", "count", ["B-2", "C-1"]),
+    ("how many tickets created last year", "count", ["C-2"]),
+    ("how many tickets resolved this month", "count", ["B-2"]),
+    ("tickets by priority for core", "distribution", ["C-1", "C-2"]),
+    ("monthly trend of bugs", "trend", ["B-2", "B-1", "C-2"]),
+    ("why are billing bugs failing?", None, None),
+    ("how many tickets mention memory leaks", None, None),
+    ("how many tickets assigned to nobody", None, None),
+])
+def test_parse(index, question, kind, matched):
+    query, result = _ask(question, index)
+    if kind is None:
+        assert query is None
+        return
+    assert query.kind == kind
+    assert result["sources"] == matched[:3]
+
+
+def test_count_answer_is_singular_for_one(index):
+    _, result = _ask("how many open critical bugs in project billing?", index)
+    assert result["answer"] == ("There is 1 open Critical Bug ticket in project BILLING "
+                                "(25.0% of the 4 tickets in collection 't').")
+
+
+@pytest.mark.parametrize("question, phrase, date_range", [
+    ("how many tickets created last month", "created in September 2026", (date(2026, 9, 1), date(2026, 9, 30))),
+    ("how many tickets created last week", "created in the week of 2026-10-12", (date(2026, 10, 12), date(2026, 10, 18))),
+    ("how many tickets created in the past month", "created in the last 30 days", (date(2026, 9, 19), None)),
+    ("how many tickets created in the last 2 weeks", "created in the last 14 days", (date(2026, 10, 5), None)),
+])
+def test_relative_dates(index, question, phrase, date_range):
+    query, result = _ask(question, index)
+    assert query.date_range == date_range
+    assert phrase in result["answer"]
+
+
+def test_trend_answer_reports_the_total(index):
+    _, result = _ask("monthly trend of bugs", index)
+    assert result["answer"].startswith("3 Bug tickets in total, bucketed per month by created date from 2025-06 to 2026-10")
+    assert [p["value"] for p in result["chart_data"]] == [1, 1, 1]
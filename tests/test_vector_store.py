@@ -0,0 +1,161 @@
+"""Trained storage modes, primary-key lookups, the write delta and the write log of VectorStoreService"""
+import os
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from app.config import settings
+from app.services.vector_store import VectorStoreService, build_id_map
+
+
+def _store(tmp_path, storage="float32"):
+    return VectorStoreService(
+        index_path=os.path.join(tmp_path, "faiss.index"),
+        payloads_path=os.path.join(tmp_path, "faiss_payloads.json"),
+        name="test",
+        storage=storage,
+    )
+
+
+def _records(start, stop):
+    return [{"ticket_id": f"T-{i}", "searchable_text": f"ticket {i}"} for i in range(start, stop)]
+
+
+def _recall_at_1(store, vectors, records):
+    hits = 0
+    for vector, record in zip(vectors, records):
+        results = store.search(vector.tolist(), limit=1)
+        hits += bool(results) and results[0]["payload"]["ticket_id"] == record["ticket_id"]
+    return hits / len(records)
+
+
+@pytest.fixture
+def small_training(monkeypatch):
+    monkeypatch.setattr(settings, "QUANTIZER_TRAIN_SIZE", 200)
+    monkeypatch.setattr(settings, "PCA_DIM", 16)
+
+
+@pytest.mark.parametrize("storage", ["int8", "pca"])
+def test_first_small_upsert_does_not_train(tmp_path, small_training, storage):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((401, 32)).astype("float32")
+    records = _records(0, 401)
+    store = _store(tmp_path, storage)
+
+    store.upsert_records(vectors[:1].tolist(), records[:1])
+    assert store._awaiting_training(store.index)  # served exactly until train_size vectors exist
+    assert _recall_at_1(store, vectors[:1], records[:1]) == 1.0
+
+    store.upsert_records(vectors[1:].tolist(), records[1:])
+    assert not isinstance(store.index, faiss.IndexFlat)
+    assert store.index.is_trained and store.index.ntotal == 401
+    assert _recall_at_1(store, vectors[:50], records[:50]) >= 0.9
+
+
+def test_pca_waits_for_pca_dim_vectors(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "QUANTIZER_TRAIN_SIZE", 10)
+    monkeypatch.setattr(settings, "PCA_DIM", 64)
+    vectors = np.random.default_rng(1).standard_normal((80, 128)).astype("float32")
+    store = _store(tmp_path, "pca")
+
+    store.upsert_records(vectors[:20].tolist(), _records(0, 20))
+    assert store._awaiting_training(store.index)
+    store.upsert_records(vectors[20:].tolist(), _records(20, 80))
+    assert isinstance(store.index, faiss.IndexPreTransform) and store.index.ntotal == 80
+
+
+def test_rebuild_below_train_size_serves_flat_index(tmp_path, small_training):
+    vectors = np.random.default_rng(2).standard_normal((50, 32)).astype("float32")
+    store = _store(tmp_path, "pca")
+    builder = store.begin_rebuild(32)
+    builder.add(vectors.tolist(), _records(0, 50))
+    assert builder.commit() == 50
+    assert isinstance(store.index, faiss.IndexFlatIP)
+    assert _recall_at_1(store, vectors, _records(0, 50)) == 1.0
+
+
+def test_build_id_map():
+    payloads = [{"ticket_id": "A"}, {"ticket_id": 7.0}, {"ticket_id": None}, {"ticket_id": "A"}, {"ticket_id": 8}]
+    assert build_id_map(payloads) == {"A": 3, "7": 1, "8": 4}
+
+
+def test_float_ids_are_found_by_their_integer_form(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_records([[1.0, 0.0], [0.0, 1.0]], [{"ticket_id": 123.0}, {"ticket_id": 9.0}])
+    assert store.get_record("123")["id"] == 0
+    assert store.delete_records(["9"]) == 1
+    assert _store(tmp_path).get_record("123") is not None  # the persisted id map agrees
+
+
+def test_upsert_replaces_mixed_type_ids(tmp_path):
+    store = _store(tmp_path)
+    for ticket_id in (123, "123", 123.0):
+        store.upsert_records([[1.0, 0.0]], [{"ticket_id": ticket_id}])
+    assert len(store.payloads) == 1
+    assert store.get_record("123")["payload"]["ticket_id"] == 123.0
+
+
+def test_changes_since(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_records(np.eye(4, dtype="float32").tolist(), _records(0, 4))
+    number = store.snapshot().number
+    assert store.changes_since(number) == set()
+
+    store.upsert_records([[0.0, 1.0, 1.0, 0.0]], _records(1, 2))
+    store.delete_records(["T-3"])
+    assert store.changes_since(number) == {"T-1", "T-3"}
+
+    store.reload()
+    assert store.changes_since(number) is None  # replaced wholesale; callers rescan
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16"])
+def test_writes_share_the_base_until_compaction(tmp_path, storage):
+    vectors = np.eye(8, dtype="float32")
+    store = _store(tmp_path, storage)
+    store.upsert_records(vectors[:6].tolist(), _records(0, 6))
+    store.compact()
+    base = store.index
+
+    store.upsert_records(vectors[6:7].tolist(), _records(6, 7))
+    store.upsert_records(vectors[7:8].tolist(), _records(1, 2))  # replaces a base row
+    store.delete_records(["T-2"])
+    assert store.index is base and base.ntotal == 6
+    assert store.get_collection_info()["vectors_count"] == 6
+
+    for reopened in (False, True):
+        if reopened:
+            store = _store(tmp_path, storage)  # the delta is replayed from the write-ahead log
+        assert store.search(vectors[6].tolist(), limit=1)[0]["payload"]["ticket_id"] == "T-6"
+        assert store.search(vectors[7].tolist(), limit=1)[0]["payload"]["ticket_id"] == "T-1"
+        assert "T-2" not in {r["payload"]["ticket_id"] for r in store.search(vectors[2].tolist(), limit=8)}
+        assert store.get_vector("T-1") == vectors[7].tolist()
+        assert store.get_record("T-2") is None
+
+    store.compact()
+    assert store.index.ntotal == 6 and store.get_collection_info()["delta_rows"] == 0
+    assert not os.path.exists(store.delta_path)
+    assert sorted(p["ticket_id"] for p in store.get_all_payloads()) == ["T-0", "T-1", "T-3", "T-4", "T-5", "T-6"]
+
+
+def test_delta_is_compacted_past_max_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DELTA_MAX_ROWS", 3)
+    vectors = np.eye(4, dtype="float32")
+    store = _store(tmp_path)
+    for i in range(4):
+        store.upsert_records(vectors[i:i + 1].tolist(), _records(i, i + 1))
+    assert store.index.ntotal == 4 and store.get_collection_info()["delta_rows"] == 0
+    assert _recall_at_1(store, vectors, _records(0, 4)) == 1.0
+
+
+def test_failed_reload_keeps_serving(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_records(np.eye(2, dtype="float32").tolist(), _records(0, 2))
+    store.compact()
+    with open(store.index_path, "wb") as f:
+        f.write(b"not an index")
+    with pytest.raises(Exception):
+        store.reload()
+    assert store.get_record("T-1") is not None